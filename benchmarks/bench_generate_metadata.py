@@ -0,0 +1,30 @@
+"""
+Benchmark generating metadata for a wide dataset.
+
+Usage: python benchmarks/bench_generate_metadata.py [n_columns]
+"""
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from piargus import MicroData
+
+
+def main(n_columns=2000):
+    rng = np.random.default_rng(0)
+    dataset = pd.DataFrame({f"var{i}": rng.integers(0, 10, 100) for i in range(n_columns)})
+
+    print(f"Generating metadata for {n_columns} columns:")
+    first = timeit.timeit(lambda: MicroData(dataset).generate_metadata(), number=1)
+    print(f"{'first call':>20}: {1000 * first:8.2f} ms")
+
+    microdata = MicroData(dataset)
+    microdata.generate_metadata()
+    number, total = timeit.Timer(microdata.generate_metadata).autorange()
+    print(f"{'repeated call':>20}: {1000 * total / number:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,68 @@
+"""
+Benchmark reading a metadata file for a wide dataset.
+
+Usage: python benchmarks/bench_metadata.py [n_columns]
+"""
+import shlex
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+from piargus import MetaData
+from piargus.inputspec.metadata import Column
+
+
+def make_rda(filepath, n_columns):
+    metadata = MetaData()
+    for i in range(n_columns):
+        column = Column(f"var{i}", length=20, missing=["99"] if i % 10 == 0 else None)
+        column["RECODABLE"] = True
+        column["NUMERIC"] = i % 2 == 0
+        column["TOTCODE"] = '"Total"'
+        if i % 3 == 0:
+            column["HIERARCHICAL"] = True
+            column["HIERLEVELS"] = "1 2 1"
+        metadata[f"var{i}"] = column
+    metadata.to_rda(filepath)
+
+
+def from_rda_shlex(filepath):
+    """Reference parser based on shlex, as used in earlier versions."""
+    metadata = MetaData()
+    column = None
+    with open(filepath) as reader:
+        for line in reader:
+            arguments = shlex.split(line, posix=False)
+            head = arguments.pop(0)
+            if head.startswith("<"):
+                value = " ".join(arguments) if arguments else True
+                if column:
+                    column[head[1:-1]] = value
+                else:
+                    metadata.status_markers[head[1:-1]] = value
+            else:
+                column = Column(head, arguments[0], arguments[1:])
+                metadata[head] = column
+    return metadata
+
+
+def main(n_columns=5000):
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = Path(directory) / "metadata.rda"
+        make_rda(filepath, n_columns)
+
+        timings = {
+            "shlex": lambda: from_rda_shlex(filepath),
+            "from_rda": lambda: MetaData.from_rda(filepath, cache=False),
+            "from_rda (cached)": lambda: MetaData.from_rda(filepath),
+        }
+
+        print(f"Reading rda-file with {n_columns} columns:")
+        for name, func in timings.items():
+            number, total = timeit.Timer(func).autorange()
+            print(f"{name:>20}: {1000 * total / number:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
@@ -1,31 +1,49 @@
+from .artefactstore import ArtefactStore
+from .batchprogram import BatchProgram, BatchCommand
 from .batchwriter import BatchWriter
 from .constants import *
-from .inputspec import InputData, MetaData, MicroData, TableData, CodeList
-from .inputspec.hierarchy import Hierarchy, FlatHierarchy, TreeHierarchy, \
-    TreeHierarchyNode, Node, LevelHierarchy
-from .job import Job, JobSetupError
+from .inputspec import InputData, MetaData, MicroData, TableData, CodeList, Cube
+from .inputspec.hierarchy import Hierarchy, FlatHierarchy, LevelHierarchy
+from .job import Job, JobSetupError, setup_all
+from .journal import Journal
 from .outputspec import Table, Apriori, TreeRecode
 from .outputspec.safetyrule import *
-from .result import TauArgusException, ArgusReport, TableResult
+from .result import TauArgusException, ArgusReport, TableResult, LogbookSummary, ResourceUsage
+from .pipeline import Pipeline, PipelineResult
+from .scheduling import JobFeatures, RuntimeModel, Scheduler, ScheduledRun
 from .tauargus import TauArgus
+from .workqueue import WorkQueue
 
 __version__ = "1.0.3"
 
 __all__ = [
     "Apriori",
+    "ArtefactStore",
     "TauArgus",
     "TauArgusException",
     "BatchWriter",
+    "BatchProgram",
+    "BatchCommand",
     "CodeList",
     "TreeRecode",
     "Job",
     "JobSetupError",
+    "setup_all",
+    "Pipeline",
+    "PipelineResult",
+    "Journal",
+    "WorkQueue",
+    "JobFeatures",
+    "RuntimeModel",
+    "Scheduler",
+    "ScheduledRun",
 
     # Inputdata
     "InputData",
     "MetaData",
     "MicroData",
     "TableData",
+    "Cube",
 
     # Hierarchy
     "Hierarchy",
@@ -54,6 +72,8 @@ __all__ = [
     # Result
     "ArgusReport",
     "TableResult",
+    "LogbookSummary",
+    "ResourceUsage",
 
     # Constants
     "SAFE",
@@ -72,3 +92,19 @@ __all__ = [
     "ROUNDING",
     "TABULAR_ADJUSTMENT",
 ]
+
+
+def __getattr__(name):
+    # TreeHierarchy requires littletree, which is only imported when it is used
+    if name in {"TreeHierarchy", "TreeHierarchyNode", "Node"}:
+        from .inputspec import hierarchy
+
+        value = getattr(hierarchy, name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,62 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Union
+
+DIGEST_LENGTH = 16
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class ArtefactStore:
+    """
+    Directory where input files for TauArgus are stored by content.
+
+    Jobs that share a store write each distinct input file only once.
+    Files are named after a hash of their content,
+    so identical microdata, metadata, hierarchies and codelists are reused by all jobs.
+    Files are never modified after they have been written,
+    which makes it safe to share a store between jobs that run concurrently.
+    """
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory).absolute()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({str(self.directory)!r})"
+
+    def save(self, obj, write: Callable[[Path], Any], kind: str, suffix: str) -> Path:
+        """Save an artefact in the store.
+
+        :param obj: Object to save. Its filepath will point to the stored file afterwards.
+        :param write: Function that writes obj to the path it is given.
+        :param kind: Kind of artefact. Used as prefix of the filename.
+        :param suffix: Extension of the file.
+        :returns: Path of the stored file.
+        """
+        fd, tmp_name = tempfile.mkstemp(prefix=".tmp_", suffix=suffix, dir=self.directory)
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+
+        try:
+            write(tmp_path)
+            digest = _file_digest(tmp_path)
+            filepath = self.directory / f"{kind}_{digest}{suffix}"
+            if filepath.exists():
+                tmp_path.unlink()
+            else:
+                os.replace(tmp_path, filepath)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+        obj.filepath = filepath
+        return filepath
+
+
+def _file_digest(filepath) -> str:
+    sha = hashlib.sha256()
+    with open(filepath, 'rb') as reader:
+        while chunk := reader.read(READ_CHUNK_SIZE):
+            sha.update(chunk)
+    return sha.hexdigest()[:DIGEST_LENGTH]
@@ -0,0 +1,240 @@
+import hashlib
+import io
+import re
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Optional, Sequence
+
+COMMAND_PATTERN = re.compile(r"^<(?P<command>[A-Za-z]+)>\s*(?P<arg>.*?)\s*$")
+
+# Position of the table number within the arguments of commands that refer to a table
+TABLE_FIELDS = {
+    "APRIORI": 1,
+    "RECODE": 0,
+    "SUPPRESS": 0,
+    "WRITETABLE": 0,
+}
+
+# Commands that have their arguments enclosed in parentheses
+PARENTHESIZED_COMMANDS = {"SUPPRESS", "WRITETABLE"}
+
+
+class BatchCommand(NamedTuple):
+    """A single command in a batch file."""
+    command: str
+    arg: Optional[str] = None
+
+    def __str__(self):
+        if self.arg is None:
+            return f"<{self.command}>"
+        else:
+            return f"<{self.command}>\t{self.arg}"
+
+    @classmethod
+    def parse(cls, line: str) -> "BatchCommand":
+        """Parse a line of a batch file."""
+        match = COMMAND_PATTERN.match(line.strip())
+        if not match:
+            raise ValueError(f"Not a batch command: {line!r}")
+
+        command, arg = match["command"].upper(), match["arg"]
+        return cls(command, arg or None)
+
+    @property
+    def table(self) -> Optional[int]:
+        """The number of the table this command applies to.
+
+        Returns None if the command doesn't refer to a table.
+        Table number 0 is used for linked suppression of all tables.
+        """
+        span = self._table_span()
+        if span is None:
+            return None
+        return int(self.arg[span[0]:span[1]])
+
+    def with_table(self, table: int) -> "BatchCommand":
+        """Return a copy of this command that applies to another table."""
+        span = self._table_span()
+        if span is None:
+            raise ValueError(f"Command {self.command} doesn't refer to a table.")
+        arg = f"{self.arg[:span[0]]}{table}{self.arg[span[1]:]}"
+        return self._replace(arg=arg)
+
+    def _table_span(self):
+        field = TABLE_FIELDS.get(self.command)
+        if field is None or self.arg is None:
+            return None
+
+        start, end = 0, len(self.arg)
+        if self.command in PARENTHESIZED_COMMANDS:
+            start = self.arg.find("(") + 1
+            end = self.arg.rfind(")")
+            if start == 0 or end < start:
+                raise ValueError(f"Expected arguments in parentheses: {str(self)!r}")
+
+        spans = _field_spans(self.arg, start, end)
+        if field >= len(spans):
+            raise ValueError(f"Missing table number: {str(self)!r}")
+
+        field_start, field_end = spans[field]
+        match = re.search(r"\d+", self.arg[field_start:field_end])
+        if match is None:
+            raise ValueError(f"Missing table number: {str(self)!r}")
+        return field_start + match.start(), field_start + match.end()
+
+
+class BatchProgram:
+    """
+    In-memory representation of a batch file.
+
+    A batch program is a sequence of commands.
+    It can be read from an existing batch file, modified and written again.
+    This makes it possible to combine or split batch files
+    without generating the input files again.
+    """
+    @classmethod
+    def from_arb(cls, file) -> "BatchProgram":
+        """Read from a batch file (extension .arb)."""
+        if not hasattr(file, 'read'):
+            with open(file) as reader:
+                program = cls.from_arb(reader)
+            program.filepath = Path(file)
+            return program
+
+        commands = []
+        for line in file:
+            line = line.strip()
+            if line and not line.startswith("//"):
+                commands.append(BatchCommand.parse(line))
+
+        return cls(commands)
+
+    def __init__(self, commands: Iterable[BatchCommand] = ()):
+        self.commands: List[BatchCommand] = [BatchCommand(*command) for command in commands]
+        self.filepath = None
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.commands})"
+
+    def __str__(self):
+        return self.to_arb()
+
+    def __len__(self):
+        return len(self.commands)
+
+    def __iter__(self):
+        return iter(self.commands)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.__class__(self.commands[index])
+        return self.commands[index]
+
+    def __eq__(self, other):
+        if isinstance(other, BatchProgram):
+            return self.commands == other.commands
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self.commands))
+
+    def __add__(self, other):
+        if isinstance(other, BatchProgram):
+            return self.__class__([*self.commands, *other.commands])
+        return NotImplemented
+
+    def append(self, command: str, arg: Optional[str] = None) -> BatchCommand:
+        """Add a command at the end."""
+        batch_command = BatchCommand(command, arg)
+        self.commands.append(batch_command)
+        return batch_command
+
+    def digest(self) -> str:
+        """Hash of the content. Programs with equal commands have the same digest."""
+        return hashlib.sha256(self.to_arb().encode()).hexdigest()
+
+    @classmethod
+    def join(cls, programs: Iterable["BatchProgram"], separator: str = "CLEAR") -> "BatchProgram":
+        """Combine several programs into one, so they can be run by a single TauArgus process.
+
+        :param programs: Programs to combine.
+        :param separator: Command to insert after each program.
+        """
+        commands = []
+        for program in programs:
+            commands.extend(program)
+            commands.append(BatchCommand(separator))
+        return cls(commands)
+
+    def split(self, separator: str = "CLEAR") -> List["BatchProgram"]:
+        """Split a program into parts. This is the reverse of join."""
+        parts = [[]]
+        for command in self.commands:
+            if command.command == separator:
+                parts.append([])
+            else:
+                parts[-1].append(command)
+
+        if not parts[-1]:
+            parts.pop()
+
+        return [self.__class__(part) for part in parts]
+
+    def select_tables(self, tables: Sequence[int]) -> "BatchProgram":
+        """Make a program that only handles some of the tables.
+
+        The selected tables are renumbered in the order in which they are specified.
+        Commands for linked suppression (table 0) are kept.
+
+        :param tables: Numbers of the tables to keep, starting at 1.
+        """
+        tables = set(tables)
+        renumber = {0: 0}
+        commands = []
+        specified = 0
+        keep_specification = False
+        for command in self.commands:
+            if command.command == "SPECIFYTABLE":
+                specified += 1
+                keep_specification = specified in tables
+                if keep_specification:
+                    renumber[specified] = len(renumber)
+                    commands.append(command)
+            elif command.command == "SAFETYRULE":
+                if keep_specification:
+                    commands.append(command)
+            elif command.table is not None:
+                if command.table in renumber:
+                    commands.append(command.with_table(renumber[command.table]))
+            else:
+                commands.append(command)
+
+        return self.__class__(commands)
+
+    def to_arb(self, file=None):
+        """Write to a batch file (extension .arb)."""
+        if file is None:
+            buffer = io.StringIO()
+            self.to_arb(buffer)
+            return buffer.getvalue()
+        elif not hasattr(file, 'write'):
+            with open(file, 'w') as writer:
+                self.to_arb(writer)
+            self.filepath = Path(file)
+        else:
+            file.writelines(f"{command}\n" for command in self.commands)
+
+
+def _field_spans(text, start, end):
+    """Find the spans of comma-separated fields, ignoring commas within quotes."""
+    spans = []
+    field_start = start
+    in_quotes = False
+    for position in range(start, end):
+        char = text[position]
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ',' and not in_quotes:
+            spans.append((field_start, position))
+            field_start = position + 1
+    spans.append((field_start, end))
+    return spans
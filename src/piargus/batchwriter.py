@@ -1,3 +1,4 @@
+from .batchprogram import BatchCommand, BatchProgram
 from .constants import FREQUENCY_RESPONSE
 from .outputspec.safetyrule import make_safety_rule
 from .helpers import format_argument
@@ -9,21 +10,27 @@ class BatchWriter:
 
     Usually the heavy work can be done by creating a Job.
     However, this class can still be used for direct low-level control.
+    If no file is given, the commands are only collected in `program`.
     """
-    def __init__(self, file):
+    def __init__(self, file=None):
         self._file = file
         self._commands = list()
 
+    @property
+    def program(self) -> BatchProgram:
+        """The commands that have been written so far."""
+        return BatchProgram(self._commands)
+
     def write_command(self, command, arg=None):
-        if arg is None:
-            self._file.write(f"<{command}>\n")
-        else:
-            self._file.write(f"<{command}>\t{arg}\n")
-        return command, arg
+        batch_command = BatchCommand(command, arg)
+        self._commands.append(batch_command)
+        if self._file is not None:
+            self._file.write(f"{batch_command}\n")
+        return batch_command
 
     def logbook(self, log_file):
         """Write LOGBOOK to batch file."""
-        self.write_command('LOGBOOK', format_argument(log_file))
+        return self.write_command('LOGBOOK', format_argument(log_file))
 
     def open_microdata(self, microdata):
         """Write OPENMICRODATA to batch file."""
@@ -64,7 +71,7 @@ class BatchWriter:
         if compute_totals is None:
             return self.write_command("READTABLE")
         else:
-            return self.write_command("READTABLE", int(compute_totals))
+            return self.write_command("READTABLE", str(int(compute_totals)))
 
     def apriori(self, filename, table, separator=',', ignore_error=False, expand_trivial=True):
         """Write APRIORI to batch file."""
@@ -0,0 +1,392 @@
+"""
+Command line interface for piargus.
+
+Run all jobs described by a manifest:
+
+    piargus run manifest.toml
+
+Run jobs from a shared work queue, for example on several hosts:
+
+    piargus worker //server/share/queue --program TauArgus.exe
+
+A manifest describes the input data and the jobs to run on them:
+
+    program = "C:/Programs/TauArgus/TauArgus.exe"
+    directory = "tau"
+    workers = 4
+
+    [inputs.companies]
+    microdata = "data/microdata.csv"
+    hierarchies = { regio = "regio.hrc", sbi = [2, 1, 1] }
+    total_codes = { sbi = "TTTT" }
+
+    [[jobs]]
+    name = "income"
+    input = "companies"
+
+    [[jobs.tables]]
+    explanatory = ["sbi", "regio"]
+    response = "income"
+    safety_rule = "P(10)"
+    suppress_method = "OPT"
+
+Relative paths are relative to the manifest.
+"""
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from .artefactstore import ArtefactStore
+from .inputspec import CodeList, MetaData, MicroData, TableData
+from .inputspec.hierarchy import LevelHierarchy
+from .job import Job
+from .journal import Journal
+from .outputspec import Apriori, Table, TreeRecode
+from .pipeline import Pipeline
+from .tauargus import TauArgus
+from .workqueue import WorkQueue
+
+JOURNAL_NAME = ".piargus-journal.jsonl"
+
+# Options of an input that are passed to MicroData or TableData as they are
+MICRODATA_OPTIONS = {"weight", "request", "request_values", "holding", "column_lengths"}
+TABLEDATA_OPTIONS = {
+    "explanatory", "response", "shadow", "cost", "labda", "frequency", "top_contributors",
+    "lower_protection_level", "upper_protection_level", "status_indicator", "status_markers",
+    "safety_rule", "suppress_method", "suppress_method_args", "column_lengths",
+}
+TABLE_OPTIONS = {
+    "explanatory", "response", "shadow", "cost", "labda", "safety_rule", "suppress_method",
+    "suppress_method_args",
+}
+JOB_OPTIONS = {"linked_suppress_method", "linked_suppress_method_args", "interactive"}
+
+
+class ManifestError(Exception):
+    """Exception to raise when a manifest is invalid."""
+
+
+class Manifest:
+    """Jobs described by a manifest file."""
+    @classmethod
+    def from_toml(cls, file) -> "Manifest":
+        """Read a manifest from a toml-file."""
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("Reading manifests requires Python 3.11+ or the tomli package. "
+                                  "Install it with `pip install piargus[cli]`.") from None
+
+        filepath = Path(file)
+        with open(filepath, 'rb') as reader:
+            spec = tomllib.load(reader)
+        return cls(spec, filepath.absolute().parent)
+
+    def __init__(self, spec: Mapping[str, Any], base_directory="."):
+        """
+        Create a manifest.
+
+        :param spec: Specification of the manifest, for example read from toml.
+        :param base_directory: Directory to which paths in the specification are relative.
+        """
+        self.spec = spec
+        self.base_directory = Path(base_directory)
+        self._inputs = {}
+        self._inputs_lock = threading.Lock()
+
+        if not isinstance(spec.get("jobs"), list):
+            raise ManifestError("Manifest should contain at least one [[jobs]].")
+
+        names = [self._job_name(i, job_spec) for i, job_spec in enumerate(spec["jobs"])]
+        if len(set(names)) != len(names):
+            raise ManifestError("Job names should be unique.")
+
+        for job_spec in spec["jobs"]:
+            if job_spec.get("input") not in spec.get("inputs", {}):
+                raise ManifestError(f"Job refers to unknown input {job_spec.get('input')!r}.")
+
+    @property
+    def program(self) -> str:
+        return self.spec.get("program", "TauArgus")
+
+    @property
+    def directory(self) -> Path:
+        return self.resolve(self.spec.get("directory", "tau"))
+
+    @property
+    def workers(self) -> int:
+        return int(self.spec.get("workers", 1))
+
+    @property
+    def job_names(self) -> List[str]:
+        return [self._job_name(i, job_spec) for i, job_spec in enumerate(self.spec["jobs"])]
+
+    def resolve(self, path) -> Path:
+        """Make a path from the manifest absolute."""
+        return (self.base_directory / path).absolute()
+
+    def fingerprint(self, name: str) -> str:
+        """Hash of everything that determines the outcome of a job.
+
+        This includes the specification of the job and its input,
+        and the size and modification time of the files they refer to.
+        """
+        job_spec = self._job_spec(name)
+        input_spec = self.spec["inputs"][job_spec["input"]]
+        files = sorted({str(path) for path in self._referenced_files(input_spec, job_spec)})
+        file_stats = []
+        for path in files:
+            try:
+                stat = Path(path).stat()
+                file_stats.append([path, stat.st_size, stat.st_mtime_ns])
+            except FileNotFoundError:
+                file_stats.append([path, None, None])
+
+        content = json.dumps([self.program, input_spec, job_spec, file_stats],
+                             sort_keys=True, default=str)
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def create_job(self, name: str, store: Optional[ArtefactStore] = None) -> Job:
+        """Create a job (without setting it up)."""
+        job_spec = self._job_spec(name)
+        unknown = set(job_spec) - JOB_OPTIONS - {"name", "input", "tables"}
+        if unknown:
+            raise ManifestError(f"Unknown options for job {name}: {sorted(unknown)}")
+
+        input_data = self._get_input(job_spec["input"])
+        tables = {}
+        for t, table_spec in enumerate(job_spec.get("tables", []), 1):
+            table_name = table_spec.get("name", f"table-{t}")
+            tables[table_name] = self._create_table(table_spec)
+
+        if not tables:
+            if not isinstance(input_data, TableData):
+                raise ManifestError(f"Job {name} has no tables.")
+            tables = None
+
+        metadata = self.spec["inputs"][job_spec["input"]].get("metadata")
+        if metadata is not None:
+            metadata = MetaData.from_rda(self.resolve(metadata))
+
+        options = {key: job_spec[key] for key in JOB_OPTIONS if key in job_spec}
+        return Job(input_data, tables, metadata=metadata, directory=self.directory, name=name,
+                   store=store, setup=False, **options)
+
+    def _job_name(self, index, job_spec) -> str:
+        return str(job_spec.get("name", f"job{index + 1}"))
+
+    def _job_spec(self, name) -> Mapping[str, Any]:
+        for i, job_spec in enumerate(self.spec["jobs"]):
+            if self._job_name(i, job_spec) == name:
+                return job_spec
+        raise KeyError(name)
+
+    def _get_input(self, input_name):
+        # Inputs are shared by all jobs that use them, so they are only read once
+        with self._inputs_lock:
+            if input_name not in self._inputs:
+                self._inputs[input_name] = self._create_input(input_name)
+            return self._inputs[input_name]
+
+    def _create_input(self, input_name):
+        import pandas as pd
+
+        spec = dict(self.spec["inputs"][input_name])
+        read_options = {"sep": spec.pop("separator", ","), "dtype": spec.pop("dtype", None)}
+        hierarchies = {col: self._create_hierarchy(hierarchy)
+                       for col, hierarchy in spec.pop("hierarchies", {}).items()}
+        codelists = {col: CodeList.from_cdl(self.resolve(codelist))
+                     for col, codelist in spec.pop("codelists", {}).items()}
+        total_codes = spec.pop("total_codes", None)
+        # Metadata is passed to the jobs
+        spec.pop("metadata", None)
+
+        if "microdata" in spec:
+            dataset = pd.read_csv(self.resolve(spec.pop("microdata")), **read_options)
+            cls, allowed = MicroData, MICRODATA_OPTIONS
+        elif "tabledata" in spec:
+            dataset = pd.read_csv(self.resolve(spec.pop("tabledata")), **read_options)
+            cls, allowed = TableData, TABLEDATA_OPTIONS
+        else:
+            raise ManifestError(f"Input {input_name} needs either microdata or tabledata.")
+
+        unknown = set(spec) - allowed
+        if unknown:
+            raise ManifestError(f"Unknown options for input {input_name}: {sorted(unknown)}")
+
+        if total_codes is not None:
+            spec["total_codes"] = total_codes
+
+        return cls(dataset, hierarchies=hierarchies, codelists=codelists, **spec)
+
+    def _create_hierarchy(self, spec):
+        if isinstance(spec, str):
+            from .inputspec.hierarchy import TreeHierarchy
+
+            return TreeHierarchy.from_hrc(self.resolve(spec))
+        elif isinstance(spec, list):
+            return LevelHierarchy(spec)
+        else:
+            raise ManifestError(f"Hierarchy should be a hrc-file or a list of levels: {spec!r}")
+
+    def _create_table(self, spec):
+        spec = dict(spec)
+        spec.pop("name", None)
+        recodes = {col: recode if isinstance(recode, int)
+                   else TreeRecode.from_grc(self.resolve(recode))
+                   for col, recode in spec.pop("recodes", {}).items()}
+        apriori = spec.pop("apriori", ())
+        if isinstance(apriori, str):
+            apriori = Apriori.from_hst(self.resolve(apriori))
+
+        unknown = set(spec) - TABLE_OPTIONS
+        if unknown:
+            raise ManifestError(f"Unknown options for table: {sorted(unknown)}")
+
+        return Table(recodes=recodes, apriori=apriori, **spec)
+
+    def _referenced_files(self, input_spec, job_spec):
+        for key in ["microdata", "tabledata", "metadata"]:
+            if key in input_spec:
+                yield self.resolve(input_spec[key])
+        for hierarchy in input_spec.get("hierarchies", {}).values():
+            if isinstance(hierarchy, str):
+                yield self.resolve(hierarchy)
+        for codelist in input_spec.get("codelists", {}).values():
+            yield self.resolve(codelist)
+        for table_spec in job_spec.get("tables", []):
+            if isinstance(table_spec.get("apriori"), str):
+                yield self.resolve(table_spec["apriori"])
+            for recode in table_spec.get("recodes", {}).values():
+                if isinstance(recode, str):
+                    yield self.resolve(recode)
+
+
+def run_manifest(
+    manifest: Manifest,
+    program: Optional[str] = None,
+    workers: Optional[int] = None,
+    force: bool = False,
+    out=None,
+) -> Dict[str, str]:
+    """Run the jobs of a manifest.
+
+    Jobs that succeeded before are skipped if their inputs haven't changed.
+    The outcome of every job is recorded in a journal in the output directory as soon as it
+    finishes, so an interrupted run resumes where it stopped.
+
+    :param manifest: The manifest to run.
+    :param program: TauArgus program to use instead of the one in the manifest.
+    :param workers: Number of TauArgus processes instead of the number in the manifest.
+    :param force: Whether to run jobs even if they are unchanged.
+    :param out: Where to write progress. Defaults to stdout.
+    :returns: Status of each job: "success", "failed" or "skipped".
+    """
+    if out is None:
+        out = sys.stdout
+
+    directory = manifest.directory
+    directory.mkdir(parents=True, exist_ok=True)
+    journal = Journal(directory / JOURNAL_NAME)
+
+    statuses = {}
+    fingerprints = {}
+    pending = []
+    for name in manifest.job_names:
+        fingerprints[name] = manifest.fingerprint(name)
+        entry = journal.get(name)
+        if (not force and journal.is_done(name, fingerprints[name])
+                and all(Path(output).exists() for output in entry["outputs"])):
+            statuses[name] = "skipped"
+        else:
+            pending.append(name)
+
+    store = ArtefactStore(directory / "store")
+    tau = TauArgus(program or manifest.program)
+    pipeline = Pipeline(tau, run_workers=workers or manifest.workers)
+    # Jobs are created lazily, so inputs are only read when a job needs them.
+    # The name of the job may differ from the name in the manifest, so both the factory
+    # and the job it created are mapped to the name in the manifest.
+    manifest_names = {}
+
+    def factory(name):
+        def create_job():
+            job = manifest.create_job(name, store=store)
+            manifest_names[job] = name
+            return job
+
+        manifest_names[create_job] = name
+        return create_job
+
+    factories = [factory(name) for name in pending]
+
+    start = time.perf_counter()
+    for result in pipeline.run(factories):
+        name = manifest_names[result.job]
+        statuses[name] = result.status
+        if result.is_succesful:
+            outputs = [str(table.filepath_out) for table in result.job.tables.values()]
+            journal.record(name, fingerprints[name], "success", result.report, outputs=outputs)
+            print(f"{name}: success", file=out)
+        else:
+            journal.record(name, fingerprints[name], "failed", result.report)
+            reason = result.error if result.error is not None else result.report
+            print(f"{name}: failed\n{reason}", file=out)
+    elapsed = time.perf_counter() - start
+    journal.compact()
+
+    counts = {status: list(statuses.values()).count(status)
+              for status in ["success", "failed", "skipped"]}
+    throughput = len(pending) / elapsed if elapsed > 0 else 0.0
+    print(f"{len(statuses)} jobs: {counts['success']} succeeded, {counts['failed']} failed, "
+          f"{counts['skipped']} skipped in {elapsed:.1f} s ({throughput:.2f} jobs/s)", file=out)
+    return statuses
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="piargus", description="Protect tables with TauArgus.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the jobs in a manifest.")
+    run_parser.add_argument("manifest", help="Toml-file describing the jobs.")
+    run_parser.add_argument("--program", help="Location of TauArgus.")
+    run_parser.add_argument("--workers", type=int, help="Number of TauArgus processes.")
+    run_parser.add_argument("--force", action="store_true",
+                            help="Also run jobs that are unchanged since the last run.")
+
+    worker_parser = subparsers.add_parser("worker", help="Run jobs from a work queue.")
+    worker_parser.add_argument("queue", help="Directory of the work queue.")
+    worker_parser.add_argument("--program", default="TauArgus", help="Location of TauArgus.")
+    worker_parser.add_argument("--wait", action="store_true",
+                               help="Wait for new jobs when the queue is empty.")
+    worker_parser.add_argument("--poll-interval", type=float, default=1.0,
+                               help="Seconds between checks for new jobs.")
+
+    args = parser.parse_args(argv)
+    if args.command == "worker":
+        queue = WorkQueue(args.queue)
+        n_jobs = queue.work(TauArgus(args.program), wait=args.wait,
+                            poll_interval=args.poll_interval)
+        print(f"{n_jobs} jobs run")
+        return 0
+
+    try:
+        manifest = Manifest.from_toml(args.manifest)
+    except (ManifestError, OSError) as err:
+        parser.error(str(err))
+
+    statuses = run_manifest(manifest, program=args.program, workers=args.workers,
+                            force=args.force)
+    return 1 if "failed" in statuses.values() else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -37,3 +37,17 @@ def slugify(value, allow_unicode=False) -> str:
         value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode('ascii')
     value = re.sub(r'[^\w\s-]', '', value.lower())
     return re.sub(r'[-\s]+', '-', value).strip('-_')
+
+
+def as_codes(values):
+    """Convert values to codes, without the decimals of integers that pandas stored as floats.
+
+    :param values: Series or Index without missing values.
+    :returns: Array of str.
+    """
+    import pandas as pd
+
+    if pd.api.types.is_float_dtype(values) and (values % 1 == 0).all():
+        # A column of integers becomes float if it contains missing values
+        values = values.astype("int64")
+    return values.astype(str).to_numpy()
@@ -3,6 +3,7 @@ from .microdata import MicroData
 from .tabledata import TableData
 from .metadata import MetaData
 from .codelist import CodeList
+from .cube import Cube
 
 __all__ = [
     "InputData",
@@ -10,4 +11,5 @@ __all__ = [
     "TableData",
     "MetaData",
     "CodeList",
+    "Cube",
 ]
@@ -0,0 +1,181 @@
+from typing import Dict, Iterable, Sequence
+
+from ..helpers import as_codes
+from .hierarchy import FlatHierarchy, Hierarchy, LevelHierarchy
+
+
+class CodeEncoding:
+    """
+    Replace the codes of explanatory variables by short numbers.
+
+    Long codes make every field in the files for TauArgus wide.
+    The encoded codes are the positions of the original codes,
+    so they can be mapped back with a single lookup.
+    Decoding gives the original values, so integer codes remain integers.
+    """
+    @classmethod
+    def from_input_data(cls, input_data, columns: Iterable[str]) -> "CodeEncoding":
+        """Collect the codes of columns from the dataset, hierarchies and codelists.
+
+        Columns with a LevelHierarchy are not encoded, because their codes are meaningful.
+        Columns are only encoded if that makes their codes shorter.
+        """
+        import pandas as pd
+
+        dataset = input_data.dataset
+        codes = {}
+        for col in columns:
+            hierarchy = input_data.hierarchies.get(col)
+            if col not in dataset.columns or isinstance(hierarchy, LevelHierarchy):
+                continue
+
+            # Codes of the dataset keep their dtype, other codes are only known as str
+            values = pd.Index(dataset[col].dropna().unique())
+            values = values[~pd.Index(as_codes(values)).duplicated()]
+            extra = []
+            if hierarchy is not None:
+                extra.append(hierarchy.total_code)
+                if hasattr(hierarchy, "root"):
+                    extra.extend(node.code for node in hierarchy.root.iter_descendants())
+            if col in input_data.codelists:
+                extra.extend(input_data.codelists[col].iter_codes())
+
+            extra = pd.Index(extra, dtype=object).unique()
+            extra = extra[~extra.isin(as_codes(values))]
+            col_codes = values.append(extra) if len(extra) else values
+            lengths = pd.Index(as_codes(col_codes)).str.len()
+            if len(col_codes) and len(str(len(col_codes) - 1)) < lengths.max():
+                codes[col] = col_codes
+
+        return cls(codes)
+
+    def __init__(self, codes: Dict[str, Sequence]):
+        """
+        :param codes: For each column the original codes. A code is encoded as its position.
+        """
+        import pandas as pd
+
+        self.codes = {col: pd.Index(col_codes) for col, col_codes in codes.items()}
+        # The codes as they are written in files, to look up positions
+        self._keys = {col: pd.Index(as_codes(col_codes), dtype=object)
+                      for col, col_codes in self.codes.items()}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({list(self.codes)})"
+
+    def __contains__(self, col):
+        return col in self.codes
+
+    def encode(self, col, values):
+        """Encode an array of codes. Missing values remain missing."""
+        import pandas as pd
+
+        values = pd.Series(values)
+        present = values.notna()
+        encoded = pd.Series(None, index=values.index, dtype=object)
+        if present.any():
+            positions = self._keys[col].get_indexer(as_codes(values[present]))
+            encoded[present] = positions.astype(str)
+        return encoded
+
+    def encode_code(self, col, code) -> str:
+        try:
+            return str(self._keys[col].get_loc(str(code).strip()))
+        except KeyError:
+            raise ValueError(f"Code {code!r} doesn't occur in {col}.") from None
+
+    def decode(self, col, values):
+        """Decode an array of encoded codes. Unknown codes are left as they are.
+
+        Decoded codes get back their original values, including their type.
+        """
+        import numpy as np
+        import pandas as pd
+
+        values = pd.Index(values).astype(str).str.strip()
+        positions = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy()
+        col_codes = self.codes[col]
+        known = (positions >= 0) & (positions < len(col_codes))
+        decoded = np.asarray(values, dtype=object).copy()
+        decoded[known] = col_codes.take(positions[known].astype(np.int64))
+        # Integer codes become integers again, unless unknown codes such as totals remain
+        return pd.Index(decoded, name=values.name).infer_objects()
+
+    def decode_index(self, index):
+        """Decode the levels of an index that are encoded."""
+        import pandas as pd
+
+        if isinstance(index, pd.MultiIndex):
+            levels = [self.decode(name, index.get_level_values(name)) if name in self else
+                      index.get_level_values(name) for name in index.names]
+            return pd.MultiIndex.from_arrays(levels, names=index.names)
+        elif index.name in self:
+            return self.decode(index.name, index)
+        else:
+            return index
+
+    def encode_input_data(self, input_data):
+        """Make a copy of input data in which the codes are encoded."""
+        import copy
+
+        encoded = copy.copy(input_data)
+        encoded.dataset = input_data.dataset.copy(deep=False)
+        encoded.hierarchies = dict(input_data.hierarchies)
+        encoded.codelists = dict(input_data.codelists)
+        encoded.column_lengths = {col: length for col, length in input_data.column_lengths.items()
+                                  if col not in self}
+        encoded.filepath = None
+        encoded.encoding = self
+        encoded._column_infos = dict()
+        encoded._metadata_columns = dict()
+        encoded._encoded_copies = dict()
+        encoded._digest = None
+
+        for col in self.codes:
+            encoded.dataset[col] = self.encode(col, input_data.dataset[col])
+            if col in input_data.hierarchies:
+                encoded.hierarchies[col] = self.encode_hierarchy(col, input_data.hierarchies[col])
+            if col in input_data.codelists:
+                encoded.codelists[col] = self.encode_codelist(col, input_data.codelists[col])
+
+        return encoded
+
+    def encode_hierarchy(self, col, hierarchy: Hierarchy) -> Hierarchy:
+        total_code = self.encode_code(col, hierarchy.total_code)
+        if not hasattr(hierarchy, "root"):
+            return FlatHierarchy(total_code=total_code)
+
+        from .hierarchy import TreeHierarchy, TreeHierarchyNode
+
+        root = TreeHierarchyNode(total_code)
+        stack = [(child, root) for child in reversed(hierarchy.root.children)]
+        while stack:
+            node, parent = stack.pop()
+            encoded_node = TreeHierarchyNode(self.encode_code(col, node.code), parent=parent)
+            stack.extend((child, encoded_node) for child in reversed(node.children))
+
+        return TreeHierarchy(root, indent=hierarchy.indent)
+
+    def encode_codelist(self, col, codelist):
+        from .codelist import CodeList
+
+        labels = {self.encode_code(col, code): codelist[code] for code in codelist.iter_codes()}
+        return CodeList(labels)
+
+    def encode_recode(self, col, recode):
+        from ..outputspec import TreeRecode
+
+        if col not in self:
+            return recode
+        return TreeRecode([self.encode_code(col, code) for code in recode.codes])
+
+    def encode_apriori(self, explanatory: Sequence[str], apriori):
+        from ..outputspec.apriori import Apriori, AprioriChange
+
+        encoded = Apriori(separator=apriori.separator, ignore_error=apriori.ignore_error,
+                          expand_trivial=apriori.expand_trivial)
+        for change in apriori.changes:
+            cell = [self.encode_code(col, code) if col in self else code
+                    for col, code in zip(explanatory, change.cell)]
+            encoded.changes.append(AprioriChange(cell, change.code, change.parameters))
+        return encoded
@@ -1,7 +1,5 @@
 from pathlib import Path
 
-import pandas as pd
-
 
 class CodeList:
     """Describe a codelist for use with TauArgus.
@@ -13,6 +11,8 @@ class CodeList:
     @classmethod
     def from_cdl(cls, file):
         """Read cdl file."""
+        import pandas as pd
+
         df = pd.read_csv(file, index_col=0, header=None)
         codelist = CodeList(df.iloc[:, 0])
         if isinstance(file, (str, Path)):
@@ -22,6 +22,8 @@ class CodeList:
 
     def __init__(self, codes):
         """Create a codelist."""
+        import pandas as pd
+
         if hasattr(codes, 'keys'):
             self._codes = pd.Series(codes)
         else:
@@ -0,0 +1,214 @@
+from typing import Dict, Hashable, List, Mapping, Optional, Sequence
+
+from ..helpers import as_codes
+from .hierarchy import FlatHierarchy, Hierarchy
+
+FREQUENCY_COLUMN = "freq"
+
+
+class Cube:
+    """
+    Aggregate of microdata at the finest level of detail.
+
+    Tables with a subset of the explanatory variables are derived from this aggregate
+    instead of from the microdata. The size of the aggregate is bounded by the number of
+    non-empty cells, regardless of the number of records.
+
+    Usually created by `MicroData.cube`.
+    """
+    def __init__(
+        self,
+        dataset,
+        explanatory: Sequence[str],
+        responses: Sequence[str] = (),
+        top_k: int = 0,
+        hierarchies: Optional[Mapping[str, Hierarchy]] = None,
+    ):
+        """
+        Aggregate a dataset.
+
+        :param dataset: DataFrame containing microdata.
+        :param explanatory: Variables of the most detailed table.
+        :param responses: Variables to sum.
+        :param top_k: Number of largest contributions to keep for each response.
+        :param hierarchies: Hierarchies of the explanatory variables, used for margins.
+        """
+        if hierarchies is None:
+            hierarchies = {}
+
+        self.explanatory = list(explanatory)
+        self.responses = list(responses)
+        self.top_k = top_k
+        self.hierarchies = {col: hierarchies.get(col) or FlatHierarchy()
+                            for col in self.explanatory}
+        self._tables = {}
+
+        # Records with a missing code don't belong to any cell
+        records = dataset[self.explanatory].copy(deep=False)
+        records[FREQUENCY_COLUMN] = 1
+        for response in self.responses:
+            records[response] = dataset[response]
+            for column in self.top_columns(response)[:1]:
+                records[column] = dataset[response]
+
+        self.aggregate = aggregate(records, self.explanatory, self.sum_columns,
+                                   self._top_columns_by_response(), top_k)
+        self.aggregate.index = _as_code_index(self.aggregate.index)
+
+    def __repr__(self):
+        return (f"<{self.__class__.__name__} explanatory={self.explanatory} "
+                f"responses={self.responses} cells={len(self.aggregate)}>")
+
+    @property
+    def sum_columns(self) -> List[str]:
+        return [FREQUENCY_COLUMN, *self.responses]
+
+    def top_columns(self, response) -> List[str]:
+        """Columns containing the largest contributions to a response."""
+        return [f"{response}_top{i}" for i in range(1, self.top_k + 1)]
+
+    def table(self, explanatory: Sequence[str], margins: bool = False):
+        """Get the aggregate for some of the explanatory variables.
+
+        :param explanatory: Subset of the explanatory variables of the cube.
+        :param margins: Whether to add margins according to the hierarchies.
+        :returns: DataFrame indexed by the explanatory variables, containing the frequency,
+            the sum of each response and its top contributions.
+        """
+        explanatory = list(explanatory)
+        unknown = set(explanatory) - set(self.explanatory)
+        if unknown:
+            raise ValueError(f"Variables {sorted(unknown)} are not part of the cube.")
+
+        key = tuple(explanatory), margins
+        if key not in self._tables:
+            if margins:
+                # Roll up the table without margins, which is smaller than the cube
+                result = rollup(self.table(explanatory).reset_index(), explanatory,
+                                self.hierarchies, self.sum_columns,
+                                self._top_columns_by_response(), self.top_k)
+            elif explanatory == self.explanatory:
+                result = self.aggregate
+            else:
+                result = aggregate(self.aggregate.reset_index(), explanatory, self.sum_columns,
+                                   self._top_columns_by_response(), self.top_k)
+            self._tables[key] = result
+
+        return self._tables[key]
+
+    def to_tabledata(self, explanatory: Sequence[str], response: str, **kwargs):
+        """Create TableData for some of the explanatory variables, including margins.
+
+        :param explanatory: Subset of the explanatory variables of the cube.
+        :param response: Response variable of the table.
+        :param kwargs: Passed to TableData.
+        """
+        from .tabledata import TableData
+
+        columns = [FREQUENCY_COLUMN, response, *self.top_columns(response)]
+        dataset = self.table(explanatory, margins=True)[columns].reset_index()
+        top_contributors = self.top_columns(response)
+        dataset[top_contributors] = dataset[top_contributors].fillna(0)
+        hierarchies = {col: self.hierarchies[col] for col in explanatory}
+        return TableData(dataset, explanatory, response, frequency=FREQUENCY_COLUMN,
+                         top_contributors=top_contributors, hierarchies=hierarchies, **kwargs)
+
+    def _top_columns_by_response(self) -> Dict[str, List[str]]:
+        return {response: self.top_columns(response) for response in self.responses}
+
+
+def aggregate(
+    frame,
+    keys: Sequence[Hashable],
+    sum_columns: Sequence[Hashable],
+    top_columns: Mapping[Hashable, Sequence[Hashable]] = None,
+    top_k: int = 0,
+):
+    """Aggregate cells to the level of keys.
+
+    :param frame: DataFrame containing keys, sum_columns and top_columns.
+    :param keys: Columns to group by.
+    :param sum_columns: Columns to sum.
+    :param top_columns: For each response, the columns with its largest contributions.
+        The largest top_k of all contributions within a group are kept.
+    :param top_k: Number of contributions to keep.
+    :returns: DataFrame indexed by keys.
+    """
+    import numpy as np
+
+    keys = list(keys)
+    grouped = frame.groupby(keys, sort=False, observed=True)
+    result = grouped[list(sum_columns)].sum()
+    if not top_k or not top_columns:
+        return result
+
+    # Numbers the groups in the same order as the rows of result, -1 for dropped rows
+    group_ids = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    for columns in top_columns.values():
+        present = [column for column in columns if column in frame.columns]
+        if not present:
+            continue
+
+        # Sort all contributions by group and then from large to small to rank them
+        values = frame[present].to_numpy(dtype=np.float64).ravel()
+        groups = np.repeat(group_ids, len(present))
+        valid = ~np.isnan(values) & (groups >= 0)
+        values, groups = values[valid], groups[valid]
+        order = np.lexsort((-values, groups))
+        values, groups = values[order], groups[order]
+        ranks = np.arange(len(groups)) - np.searchsorted(groups, groups)
+
+        is_top = ranks < top_k
+        tops = np.full((len(result), top_k), np.nan)
+        tops[groups[is_top], ranks[is_top]] = values[is_top]
+        for i, column in enumerate(columns[:top_k]):
+            result[column] = tops[:, i]
+
+    return result
+
+
+def rollup(
+    frame,
+    keys: Sequence[str],
+    hierarchies: Mapping[str, Hierarchy],
+    sum_columns: Sequence[Hashable],
+    top_columns: Mapping[Hashable, Sequence[Hashable]] = None,
+    top_k: int = 0,
+):
+    """Aggregate cells and add the margins of each hierarchy.
+
+    :param frame: DataFrame with a row for each cell.
+    :param keys: Explanatory columns.
+    :param hierarchies: Hierarchy for each key. Keys without hierarchy only get a total.
+    :returns: DataFrame indexed by keys, with a row for each cell and each margin.
+    """
+    import pandas as pd
+
+    keys = list(keys)
+    result = frame
+    for key in keys:
+        hierarchy = hierarchies.get(key) or FlatHierarchy()
+        codes = result[key].astype(str)
+        ancestors = hierarchy.get_ancestors(codes.unique())
+        margins = pd.DataFrame(
+            [(code, ancestor) for code, code_ancestors in ancestors.items()
+             for ancestor in code_ancestors],
+            columns=["_code", "_margin"])
+
+        upper = codes.to_frame("_code").join(result.drop(columns=key)).merge(margins, on="_code")
+        upper = upper.drop(columns="_code").rename(columns={"_margin": key})
+        result = pd.concat([result.assign(**{key: codes}), upper], ignore_index=True)
+        result = aggregate(result, keys, sum_columns, top_columns, top_k).reset_index()
+
+    return result.set_index(keys)
+
+
+def _as_code_index(index):
+    """Convert the cell keys of an aggregate to codes."""
+    import pandas as pd
+
+    if isinstance(index, pd.MultiIndex):
+        return pd.MultiIndex.from_arrays(
+            [as_codes(index.get_level_values(i)) for i in range(index.nlevels)],
+            names=index.names)
+    return pd.Index(as_codes(index), name=index.name)
@@ -1,7 +1,20 @@
 from .levelhierarchy import LevelHierarchy
 from .flathierarchy import FlatHierarchy
-from .treehierarchy import TreeHierarchy, TreeHierarchyNode, Node
 from .hierarchy import Hierarchy
 
 __all__ = ["Hierarchy", "TreeHierarchy", "LevelHierarchy", "FlatHierarchy", "TreeHierarchyNode",
            "Node"]
+
+# These require littletree, which is only imported when they are used
+_TREE_HIERARCHY_NAMES = {"TreeHierarchy", "TreeHierarchyNode", "Node"}
+
+
+def __getattr__(name):
+    if name in _TREE_HIERARCHY_NAMES:
+        from . import treehierarchy
+
+        value = getattr(treehierarchy, name)
+        globals()[name] = value
+        return value
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
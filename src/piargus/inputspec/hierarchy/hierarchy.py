@@ -1,4 +1,4 @@
-from typing import Sequence
+from typing import Dict, Iterable, List, Sequence
 
 DEFAULT_TOTAL_CODE = "Total"
 
@@ -9,6 +9,13 @@ class Hierarchy:
     is_hierarchical: bool = None
     total_code: str
 
+    def get_ancestors(self, codes: Iterable[str]) -> Dict[str, List[str]]:
+        """For each code, get the codes of the cells that contain it.
+
+        The ancestors are ordered from parent to total code.
+        """
+        return {code: [self.total_code] for code in codes}
+
     def __new__(cls, *args, **kwargs):
         if cls is Hierarchy:
             return cls._create_child_object(*args, **kwargs)
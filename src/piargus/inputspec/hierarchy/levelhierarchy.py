@@ -1,3 +1,6 @@
+from itertools import accumulate
+from typing import Dict, Iterable, List
+
 from .hierarchy import Hierarchy, DEFAULT_TOTAL_CODE
 
 
@@ -24,3 +27,12 @@ class LevelHierarchy(Hierarchy):
     @property
     def code_length(self) -> int:
         return sum(self.levels)
+
+    def get_ancestors(self, codes: Iterable[str]) -> Dict[str, List[str]]:
+        """For each code, get the codes of the cells that contain it.
+
+        The ancestors are ordered from parent to total code.
+        """
+        widths = list(accumulate(self.levels))[-2::-1]
+        return {code: [code[:width] for width in widths if width < len(code)] + [self.total_code]
+                for code in codes}
@@ -1,11 +1,14 @@
+import copy
 import io
 import os
+from collections import Counter
 from pathlib import Path
-from typing import Mapping, Sequence, Tuple, Iterable, Optional
+from typing import Dict, List, Mapping, Sequence, Tuple, Iterable, Optional
 
 import littletree
 from littletree.serializers import RowSerializer, RelationSerializer
 
+from ...helpers import as_codes
 from .hierarchy import Hierarchy, DEFAULT_TOTAL_CODE
 from .hrcserializer import HRCSerializer
 
@@ -64,9 +67,13 @@ class TreeHierarchy(Hierarchy):
 
     @property
     def code_length(self) -> int:
+        """Length of the longest code (the total code excluded).
+
+        This is kept up to date when nodes are added or removed.
+        Assign a value to override it. Delete it to remove the override.
+        """
         if self._code_length is None:
-            codes = [descendant.code for descendant in self.root.iter_descendants()]
-            self._code_length = max(map(len, codes))
+            return self.root.code_index.max_length
         return self._code_length
 
     @code_length.setter
@@ -77,6 +84,30 @@ class TreeHierarchy(Hierarchy):
     def code_length(self):
         self._code_length = None
 
+    @property
+    def depth_counts(self) -> Dict[int, int]:
+        """Number of codes at each depth. Children of the total code have depth 1."""
+        depths = self.root.code_index.depths
+        return {depth: depths[depth] for depth in sorted(depths)}
+
+    def get_ancestors(self, codes: Iterable[str]) -> Dict[str, List[str]]:
+        """For each code, get the codes of the cells that contain it.
+
+        The ancestors are ordered from parent to total code.
+        Codes that don't occur in the hierarchy are only contained in the total.
+        """
+        total_code = self.total_code
+        paths = {}
+        stack = [(child, [total_code]) for child in self.root.children]
+        while stack:
+            node, ancestors = stack.pop()
+            paths.setdefault(node.code, ancestors)
+            if node.children:
+                child_ancestors = [node.code, *ancestors]
+                stack.extend((child, child_ancestors) for child in node.children)
+
+        return {code: paths.get(code, [total_code]) for code in codes}
+
     @classmethod
     def from_hrc(cls, file, indent='@', total_code=DEFAULT_TOTAL_CODE):
         """Create hierarchy from a hrc-file."""
@@ -113,6 +144,42 @@ class TreeHierarchy(Hierarchy):
         tree.code = total_code
         return cls(tree, indent=indent)
 
+    @classmethod
+    def from_frame(cls, frame, levels=None, indent='@', total_code=DEFAULT_TOTAL_CODE):
+        """Construct from a DataFrame with a column for each level.
+
+        Each row is a path from the top level to the bottom level.
+        A missing value ends a path early.
+
+        :param frame: DataFrame containing the codes.
+        :param levels: Columns from the top level to the bottom level. Default: all columns.
+        """
+        import numpy as np
+        import pandas as pd
+
+        if levels is None:
+            levels = list(frame.columns)
+
+        paths = frame[levels].drop_duplicates()
+        root = TreeHierarchyNode(total_code)
+        nodes = [root]
+        parent_ids = np.zeros(len(paths), dtype=np.int64)
+        for level in levels:
+            column = paths[level]
+            present = column.notna().to_numpy() & (parent_ids >= 0)
+            code_ids, codes = pd.factorize(as_codes(column[present]))
+
+            # Number each distinct (parent, code) pair in order of appearance
+            pair_ids, pairs = pd.factorize(parent_ids[present] * len(codes) + code_ids)
+            nodes = [TreeHierarchyNode(code, parent=nodes[parent_id])
+                     for parent_id, code in zip((pairs // len(codes)).tolist(),
+                                                codes[pairs % len(codes)])]
+
+            parent_ids = np.full(len(paths), -1, dtype=np.int64)
+            parent_ids[present] = pair_ids
+
+        return cls(root, indent=indent)
+
     @classmethod
     def from_relations(cls, relations, child_name="code", parent_name="parent"):
         """Construct from child-parent list."""
@@ -149,17 +216,35 @@ class TreeHierarchy(Hierarchy):
 
 
 class TreeHierarchyNode(littletree.Node):
-    __slots__ = ()
+    __slots__ = "_code_index"
 
     def __init__(self, code=None, children=(), parent=None):
         if code is None:
             code = DEFAULT_TOTAL_CODE
-        if isinstance(children, Mapping):
+        if not children:
+            pass
+        elif isinstance(children, Mapping):
             children = [TreeHierarchyNode(code=k, children=v) for k, v in children.items()]
         elif isinstance(children, Sequence):
             children = [child if isinstance(child, TreeHierarchyNode) else TreeHierarchyNode(child)
                         for child in children]
-        super().__init__(identifier=str(code), children=children, parent=parent)
+        self._code_index = None
+        super().__init__(identifier=str(code), parent=parent)
+        self._cdict = _ChildDict(self)
+        if children:
+            self.update(children, check_loop=parent is not None)
+
+    @property
+    def code_index(self) -> "CodeIndex":
+        """Code lengths and depths of all descendants.
+
+        On a root, the index is built once and then updated as the tree changes.
+        """
+        if self._parent is not None:
+            return CodeIndex.from_node(self)
+        if self._code_index is None:
+            self._code_index = CodeIndex.from_node(self)
+        return self._code_index
 
     @property
     def code(self):
@@ -170,6 +255,14 @@ class TreeHierarchyNode(littletree.Node):
     def code(self, new_code):
         self.identifier = str(new_code)
 
+    def __reduce__(self):
+        # Make the tree picklable, so hierarchies can be sent to other processes
+        return self.__class__, (self.code, list(self.children))
+
+    def __deepcopy__(self, memo):
+        # littletree would copy the tree as plain nodes, which have no codes
+        return self.__class__(self.code, [copy.deepcopy(child, memo) for child in self.children])
+
     def __repr__(self):
         if self.is_leaf:
             return f"Node({self.code!r})"
@@ -180,5 +273,116 @@ class TreeHierarchyNode(littletree.Node):
         return self.code
 
 
+class CodeIndex:
+    """Count code lengths and depths below a node."""
+    __slots__ = "lengths", "depths"
+
+    @classmethod
+    def from_node(cls, node) -> "CodeIndex":
+        index = cls()
+        for code, child in node._cdict.items():
+            index.add(code, child, 1)
+        return index
+
+    def __init__(self):
+        self.lengths = Counter()
+        self.depths = Counter()
+
+    @property
+    def max_length(self) -> int:
+        return max(self.lengths, default=0)
+
+    def add(self, code, node, depth):
+        """Count node and its descendants if node is placed at depth under code."""
+        self._update(code, node, depth, 1)
+
+    def remove(self, code, node, depth):
+        """Uncount node and its descendants if node was placed at depth under code."""
+        self._update(code, node, depth, -1)
+
+    def _update(self, code, node, depth, delta):
+        # The code is passed separately, because it's updated after renaming a node
+        lengths, depths = self.lengths, self.depths
+        lengths[len(code)] += delta
+        depths[depth] += delta
+        if node._cdict:
+            for descendant, item in node.iter_descendants(with_item=True):
+                lengths[len(descendant._identifier)] += delta
+                depths[depth + item.depth] += delta
+
+        # Remove counts that dropped to zero, so max_length stays correct
+        if delta < 0:
+            for counter in lengths, depths:
+                for key in [key for key, count in counter.items() if not count]:
+                    del counter[key]
+
+
+class _ChildDict(dict):
+    """Children of a TreeHierarchyNode, that keeps the CodeIndex of the root up to date."""
+    __slots__ = "owner"
+
+    def __init__(self, owner):
+        super().__init__()
+        self.owner = owner
+
+    def _find_index(self):
+        node, depth = self.owner, 1
+        while node._parent is not None:
+            node = node._parent
+            depth += 1
+        return getattr(node, "_code_index", None), depth
+
+    def __setitem__(self, code, node):
+        old_node = self.get(code)
+        super().__setitem__(code, node)
+        if old_node is not node:
+            # An attached node is no longer a root, so its index would go stale
+            if isinstance(node, TreeHierarchyNode):
+                node._code_index = None
+            index, depth = self._find_index()
+            if index is not None:
+                if old_node is not None:
+                    index.remove(code, old_node, depth)
+                index.add(code, node, depth)
+
+    def __delitem__(self, code):
+        node = self[code]
+        super().__delitem__(code)
+        index, depth = self._find_index()
+        if index is not None:
+            index.remove(code, node, depth)
+
+    def pop(self, code, *default):
+        node = self.get(code)
+        result = super().pop(code, *default)
+        if node is not None:
+            index, depth = self._find_index()
+            if index is not None:
+                index.remove(code, node, depth)
+        return result
+
+    def clear(self):
+        index, depth = self._find_index()
+        if index is not None:
+            for code, node in self.items():
+                index.remove(code, node, depth)
+        super().clear()
+
+    def update(self, *args, **kwargs):
+        for code, node in dict(*args, **kwargs).items():
+            self[code] = node
+
+    def popitem(self):
+        if not self:
+            raise KeyError("popitem(): dictionary is empty")
+        code = next(reversed(self))
+        return code, self.pop(code)
+
+    def setdefault(self, code, default=None):
+        if code not in self:
+            self[code] = default
+        return self[code]
+
+
 # Alias for easier use
 Node = TreeHierarchyNode
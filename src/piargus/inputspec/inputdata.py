@@ -1,9 +1,9 @@
 import abc
-import warnings
-from typing import Dict
-
-from pandas.core.dtypes.common import is_string_dtype, is_categorical_dtype, is_bool_dtype
+import os
+import threading
+from typing import Dict, Iterable, NamedTuple
 
+from ..artefactstore import _file_digest
 from .hierarchy import FlatHierarchy, Hierarchy
 from .metadata import MetaData, Column
 from .codelist import CodeList
@@ -11,6 +11,30 @@ from .codelist import CodeList
 DEFAULT_COLUMN_LENGTH = 20
 
 
+class ColumnInfo(NamedTuple):
+    """Facts about a column that only depend on its dtype."""
+    is_numeric: bool
+    is_float: bool
+    is_bool: bool
+    is_categorical: bool
+    is_string: bool
+
+    @classmethod
+    def from_dtype(cls, dtype) -> "ColumnInfo":
+        # Import lazily, because pandas is slow to import
+        import pandas as pd
+        from pandas.api.types import (is_string_dtype, is_bool_dtype, is_numeric_dtype,
+                                      is_float_dtype)
+
+        return cls(
+            is_numeric=is_numeric_dtype(dtype),
+            is_float=is_float_dtype(dtype),
+            is_bool=is_bool_dtype(dtype),
+            is_categorical=isinstance(dtype, pd.CategoricalDtype),
+            is_string=is_string_dtype(dtype),
+        )
+
+
 class InputData(metaclass=abc.ABCMeta):
     """Abstract base class for a dataset that needs to be protected by Tau Argus."""
     def __init__(
@@ -53,6 +77,13 @@ class InputData(metaclass=abc.ABCMeta):
         self.column_lengths = column_lengths
         self.hierarchies = hierarchies
         self.filepath = None
+        self.encoding = None
+        self._column_infos = dict()
+        self._metadata_columns = dict()
+        self._encoded_copies = dict()
+        self._digest = None
+        # Jobs that share this input data may be set up from several threads
+        self._lock = threading.RLock()
 
         for col, total_code in total_codes.items():
             if col in self.hierarchies:
@@ -60,6 +91,16 @@ class InputData(metaclass=abc.ABCMeta):
             else:
                 self.hierarchies[col] = FlatHierarchy(total_code=total_code)
 
+    def __getstate__(self):
+        # Locks can't be pickled or shared with copies
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
+
     @abc.abstractmethod
     def to_csv(self, target):
         """Save data to a file in the csv-format which tau-argus requires."""
@@ -67,15 +108,84 @@ class InputData(metaclass=abc.ABCMeta):
 
     @abc.abstractmethod
     def generate_metadata(self) -> MetaData:
-        """Generate metadata corresponding to the input data."""
-        self.resolve_column_lengths()
+        """Generate metadata corresponding to the input data.
+
+        The metadata of a column is only generated again if something changed that affects it,
+        such as its dtype, length, hierarchy or codelist.
+        """
+        with self._lock:
+            self.resolve_column_lengths()
+            settings = self._metadata_settings()
+
+            metadata = MetaData()
+            for col, dtype in self.dataset.dtypes.items():
+                key = (
+                    settings,
+                    self.column_info(col, dtype),
+                    self.column_lengths[col],
+                    _hierarchy_key(self.hierarchies.get(col)),
+                    _codelist_key(self.codelists.get(col)),
+                )
+                cached = self._metadata_columns.get(col)
+                if cached is None or cached[0] != key:
+                    cached = key, self._generate_column(col)
+                    self._metadata_columns[col] = cached
 
-        metadata = MetaData()
-        for col in self.dataset.columns:
-            metadata[col] = Column(col, length=self.column_lengths[col])
+                metadata[col] = cached[1].copy()
 
         return metadata
 
+    def _generate_column(self, col) -> Column:
+        """Generate metadata for a single column."""
+        return Column(col, length=self.column_lengths[col])
+
+    def _metadata_settings(self) -> tuple:
+        """Settings of the input data that affect the metadata of every column."""
+        return ()
+
+    def encode_codes(self, columns: Iterable[str]) -> "InputData":
+        """Get a copy of the input data in which the codes of columns are short numbers.
+
+        The copy is reused when the same columns are encoded again,
+        so jobs that share input data also share the encoded copy.
+        The mapping back to the original codes is available as `encoding`.
+        """
+        from .codeencoding import CodeEncoding
+
+        key = frozenset(columns)
+        with self._lock:
+            if key not in self._encoded_copies:
+                encoding = CodeEncoding.from_input_data(self, sorted(key))
+                self._encoded_copies[key] = encoding.encode_input_data(self)
+            return self._encoded_copies[key]
+
+    def _content_digest(self) -> str:
+        """Get a hash of the content of the file at filepath.
+
+        The hash is cached until the modification time or size of the file changes,
+        so jobs that share input data only read it once.
+        """
+        with self._lock:
+            stat = os.stat(self.filepath)
+            key = str(self.filepath), stat.st_mtime_ns, stat.st_size
+            if self._digest is None or self._digest[0] != key:
+                self._digest = key, _file_digest(self.filepath)
+            return self._digest[1]
+
+    def column_info(self, col, dtype=None) -> ColumnInfo:
+        """Get facts about the dtype of a column.
+
+        These are cached until the dtype of the column changes.
+        """
+        if dtype is None:
+            dtype = self.dataset[col].dtype
+
+        cached = self._column_infos.get(col)
+        if cached is None or (cached[0] is not dtype and cached[0] != dtype):
+            cached = dtype, ColumnInfo.from_dtype(dtype)
+            self._column_infos[col] = cached
+        return cached[1]
+
     def resolve_column_lengths(self, default=DEFAULT_COLUMN_LENGTH):
         """Make sure each column has a length.
 
@@ -86,24 +196,26 @@ class InputData(metaclass=abc.ABCMeta):
 
         :param default: The length to use for numbers and other datatypes.
         """
-        dataset = self.dataset
-
-        for col in dataset.columns:
-            if col not in self.column_lengths:
-                if col in self.hierarchies and hasattr(self.hierarchies[col], "code_length"):
-                    column_length = self.hierarchies[col].code_length
-                elif col in self.codelists:
-                    column_length = self.codelists[col].code_length
-                elif is_categorical_dtype(dataset[col].dtype):
-                    column_length = dataset[col].cat.categories.str.len().max()
-                elif is_string_dtype(dataset[col].dtype):
-                    column_length = dataset[col].str.len().max()
-                elif is_bool_dtype(dataset[col].dtype):
-                    column_length = 1
-                else:
-                    column_length = default
-
-                self.column_lengths[col] = column_length
+        with self._lock:
+            dataset = self.dataset
+
+            for col in dataset.columns:
+                if col not in self.column_lengths:
+                    column_info = self.column_info(col)
+                    if col in self.hierarchies and hasattr(self.hierarchies[col], "code_length"):
+                        column_length = self.hierarchies[col].code_length
+                    elif col in self.codelists:
+                        column_length = self.codelists[col].code_length
+                    elif column_info.is_categorical:
+                        column_length = dataset[col].cat.categories.str.len().max()
+                    elif column_info.is_string:
+                        column_length = dataset[col].str.len().max()
+                    elif column_info.is_bool:
+                        column_length = 1
+                    else:
+                        column_length = default
+
+                    self.column_lengths[col] = column_length
 
     @property
     def hierarchies(self):
@@ -125,3 +237,23 @@ class InputData(metaclass=abc.ABCMeta):
         self._codelists = {col: codelist
                            if isinstance(codelist, CodeList) else CodeList(codelist)
                            for col, codelist in value.items()}
+
+
+def _hierarchy_key(hierarchy):
+    if hierarchy is None:
+        return None
+
+    return (
+        type(hierarchy),
+        getattr(hierarchy, "filepath", None),
+        getattr(hierarchy, "indent", None),
+        tuple(getattr(hierarchy, "levels", ())),
+        hierarchy.total_code,
+    )
+
+
+def _codelist_key(codelist):
+    if codelist is None:
+        return None
+
+    return codelist.filepath
@@ -1,13 +1,20 @@
+import copy
 import io
+import os
 import re
-import shlex
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
 from .codelist import CodeList
-from .hierarchy import Hierarchy, LevelHierarchy, TreeHierarchy, FlatHierarchy
+from .hierarchy import Hierarchy, LevelHierarchy, FlatHierarchy
 
-PROPERTY_PATTERN = re.compile(r"\<(.*)\>")
+# Same tokens as shlex.split(line, posix=False)
+TOKEN_PATTERN = re.compile(r""""[^"]*"|'[^']*'|[^ \t\r\n"'][^ \t\r\n]*|["']""")
+
+# Maximum number of parsed rda-files to keep
+RDA_CACHE_SIZE = 32
 
 
 class MetaData:
@@ -23,28 +30,59 @@ class MetaData:
     This class can be used directly when an existing rda file needs to be used.
     An existing file can be loaded by MetaData.from_rda and passed to Job.
     """
+    _rda_cache = OrderedDict()
+    _rda_cache_lock = threading.Lock()
+
     @classmethod
-    def from_rda(cls, file):
+    def from_rda(cls, file, cache: bool = True):
+        """Read metadata from an rda-file.
+
+        :param file: Path or file object to read from.
+        :param cache: Whether to reuse the result of an earlier call for the same path.
+            The cache is invalidated when the file is modified.
+        """
         if not hasattr(file, 'read'):
-            with open(file) as reader:
-                metadata = cls.from_rda(reader)
-                metadata.filepath = Path(file)
+            filepath = Path(file)
+            if not cache:
+                with open(filepath) as reader:
+                    metadata = cls.from_rda(reader)
+                metadata.filepath = filepath
                 return metadata
 
+            stat = os.stat(filepath)
+            key = filepath.absolute()
+            version = stat.st_mtime_ns, stat.st_size
+            with cls._rda_cache_lock:
+                cached = cls._rda_cache.get(key)
+                if cached is not None and cached[0] == version:
+                    cls._rda_cache.move_to_end(key)
+                    return cached[1].copy()
+
+            metadata = cls.from_rda(filepath, cache=False)
+            with cls._rda_cache_lock:
+                cls._rda_cache[key] = version, metadata.copy()
+                while len(cls._rda_cache) > RDA_CACHE_SIZE:
+                    cls._rda_cache.popitem(last=False)
+            return metadata
+
         column = None
         metadata = MetaData()
         for line in file:
-            arguments = shlex.split(line, posix=False)
-            head = arguments.pop(0)
+            arguments = _tokenize(line)
+            if not arguments:
+                continue
 
-            match = PROPERTY_PATTERN.match(head)
-            if match:
-                variable = match.group(1)
+            head = arguments[0]
+            end = head.rfind('>')
+            if head[0] == '<' and end > 0:
+                variable = head[1:end]
 
-                if arguments:
-                    [value] = arguments
-                else:
+                if len(arguments) == 1:
                     value = True
+                elif len(arguments) == 2:
+                    value = arguments[1]
+                else:
+                    value = ' '.join(arguments[1:])
 
                 if column:
                     column[variable] = value
@@ -53,7 +91,10 @@ class MetaData:
                 else:
                     metadata.status_markers[variable] = value
             else:
-                column = Column(head, *arguments)
+                if len(arguments) > 2:
+                    column = Column(head, arguments[1], arguments[2:])
+                else:
+                    column = Column(head, *arguments[1:])
                 metadata[head] = column
 
         return metadata
@@ -83,6 +124,13 @@ class MetaData:
         self._columns[key] = value
         self._columns[key].name = key
 
+    def copy(self) -> "MetaData":
+        """Copy metadata including its columns."""
+        columns = {name: column.copy() for name, column in self._columns.items()}
+        metadata = MetaData(columns, self.separator, self.status_markers.copy())
+        metadata.filepath = self.filepath
+        return metadata
+
     def to_rda(self, file=None):
         """Save metadata to rda-file."""
         if file is None:
@@ -122,6 +170,12 @@ class Column:
         """Set a column attribute."""
         self._data[key] = value
 
+    def copy(self) -> "Column":
+        """Copy column metadata."""
+        column = Column(self.name, self.width, copy.copy(self.missing))
+        column._data = self._data.copy()
+        return column
+
     def __str__(self):
         if self.missing:
             missing_str = ' '.join(map(str, self.missing))
@@ -170,6 +224,8 @@ class Column:
 
         if self["RECODABLE"]:
             if self["HIERCODELIST"]:
+                from .hierarchy import TreeHierarchy
+
                 hierarchy = TreeHierarchy.from_hrc(self["HIERCODELIST"], indent=self["HIERLEADSTRING"])
             elif self["HIERLEVELS"]:
                 levels = map(int, self['HIERLEVELS'].split())
@@ -198,3 +254,14 @@ class Column:
             return CodeList.from_cdl(self["CODELIST"])
         else:
             return None
+
+
+def _tokenize(line: str) -> List[str]:
+    """Split a line of an rda-file in the same way as shlex.split(line, posix=False)."""
+    if '"' not in line and "'" not in line:
+        return line.split()
+
+    tokens = TOKEN_PATTERN.findall(line)
+    if '"' in tokens or "'" in tokens:
+        raise ValueError("No closing quotation")
+    return tokens
@@ -1,9 +1,8 @@
 from pathlib import Path
 from typing import Optional, Sequence, Any
 
-from pandas.core.dtypes.common import is_bool_dtype, is_numeric_dtype, is_float_dtype
-
-from .metadata import MetaData
+from .cube import Cube
+from .metadata import MetaData, Column
 from .inputdata import InputData
 
 
@@ -46,19 +45,6 @@ class MicroData(InputData):
     def generate_metadata(self) -> MetaData:
         """Generates a metadata file for free format micro data."""
         metadata = super().generate_metadata()
-        for col in self.dataset.columns:
-            metacol = metadata[col]
-            col_dtype = self.dataset[col].dtype
-            metacol['NUMERIC'] = is_numeric_dtype(col_dtype)
-            metacol['RECODABLE'] = True
-            if is_float_dtype(col_dtype):
-                metacol['DECIMALS'] = 10
-
-            if col in self.hierarchies:
-                metacol.set_hierarchy(self.hierarchies[col])
-
-            if col in self.codelists:
-                metacol.set_codelist(self.codelists[col])
 
         if self.weight is not None:
             metadata[self.weight]["WEIGHT"] = True
@@ -71,7 +57,39 @@ class MicroData(InputData):
 
         return metadata
 
+    def cube(
+        self,
+        explanatory: Sequence[str],
+        responses: Sequence[str] = (),
+        top_k: int = 0,
+    ) -> Cube:
+        """Aggregate the microdata once, to derive tables with fewer variables from.
+
+        :param explanatory: Variables of the most detailed table.
+        :param responses: Variables to sum.
+        :param top_k: Number of largest contributions to keep for each response.
+        """
+        return Cube(self.dataset, explanatory, responses, top_k, hierarchies=self.hierarchies)
+
+    def _generate_column(self, col) -> Column:
+        metacol = super()._generate_column(col)
+        column_info = self.column_info(col)
+        metacol['NUMERIC'] = column_info.is_numeric
+        metacol['RECODABLE'] = True
+        if column_info.is_float:
+            metacol['DECIMALS'] = 10
+
+        if col in self.hierarchies:
+            metacol.set_hierarchy(self.hierarchies[col])
+
+        if col in self.codelists:
+            metacol.set_codelist(self.codelists[col])
+
+        return metacol
+
     def to_csv(self, file=None, na_rep=""):
+        from pandas.api.types import is_bool_dtype
+
         dataset = self.dataset.copy(deep=False)
         for col in self.dataset.columns:
             if is_bool_dtype(col):
@@ -0,0 +1,160 @@
+"""
+Generate synthetic microdata, hierarchies and tables for benchmarks and load tests.
+
+The codes of a variable with depth `d` and fan-out `f` consist of `d` parts,
+one for each level, which are numbered from 1 to `f`.
+For example, with depth 2 and fan-out 12, the codes are `"0101"`, `"0102"`, ..., `"1212"`.
+This way the same codes can be described by a `TreeHierarchy` or a `LevelHierarchy`.
+
+All randomness comes from the seed, so the same arguments always give the same data.
+"""
+from typing import Mapping, Optional, Sequence, Tuple
+
+from .hierarchy import Hierarchy, LevelHierarchy
+from .hierarchy.hierarchy import DEFAULT_TOTAL_CODE
+from .microdata import MicroData
+from .tabledata import TableData
+
+TREE = "tree"
+LEVEL = "level"
+
+
+def level_codes(depth: int, fan_out: int):
+    """Return a DataFrame with a column for each level and a row for each code.
+
+    The column of a level contains the code of the ancestor at that level.
+    The last column contains the codes themselves.
+    """
+    import numpy as np
+    import pandas as pd
+
+    if depth < 1 or fan_out < 1:
+        raise ValueError("depth and fan_out should be positive")
+
+    width = len(str(fan_out))
+    numbers = np.arange(fan_out ** depth)
+    columns = {}
+    prefix = pd.Series([""] * len(numbers), dtype=object)
+    for level in range(depth):
+        part = numbers // fan_out ** (depth - level - 1) % fan_out + 1
+        prefix = prefix + pd.Series(part).astype(str).str.zfill(width)
+        columns[f"level{level + 1}"] = prefix
+
+    return pd.DataFrame(columns)
+
+
+def make_hierarchy(
+    depth: int,
+    fan_out: int,
+    kind: str = TREE,
+    total_code: str = DEFAULT_TOTAL_CODE,
+) -> Hierarchy:
+    """Create a hierarchy of the given depth, in which every node has fan_out children.
+
+    :param kind: Either "tree" for a TreeHierarchy or "level" for a LevelHierarchy.
+    """
+    if kind == TREE:
+        from .hierarchy import TreeHierarchy
+
+        return TreeHierarchy.from_frame(level_codes(depth, fan_out), total_code=total_code)
+    elif kind == LEVEL:
+        return LevelHierarchy([len(str(fan_out))] * depth, total_code=total_code)
+    else:
+        raise ValueError(f"kind should be {TREE!r} or {LEVEL!r}, not {kind!r}")
+
+
+def make_microdata(
+    n_rows: int,
+    explanatory: Mapping[str, Tuple[int, int]],
+    responses: Sequence[str] = ("income",),
+    *,
+    skew: float = 1.0,
+    tail: float = 1.5,
+    holdings: Optional[int] = None,
+    weight: bool = False,
+    kind: str = TREE,
+    seed: Optional[int] = None,
+) -> MicroData:
+    """Generate microdata.
+
+    :param n_rows: Number of records.
+    :param explanatory: For each explanatory variable its depth and fan-out.
+    :param responses: Names of the response variables.
+    :param skew: How unequally records are spread over the codes.
+        The frequency of the code with rank r is proportional to `r ** -skew`.
+        With 0, all codes are equally likely.
+    :param tail: Shape of the Pareto distribution of the contributions.
+        Smaller values give a few very large contributions that dominate their cells.
+    :param holdings: Number of holdings to which the records belong, if any.
+    :param weight: Whether to add a sampling weight.
+    :param kind: Kind of hierarchy to attach: "tree" or "level".
+    :param seed: Seed of the random generator.
+    """
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    columns = {}
+    hierarchies = {}
+    for col, (depth, fan_out) in explanatory.items():
+        codes = level_codes(depth, fan_out).iloc[:, -1].to_numpy()
+        columns[col] = pd.Categorical.from_codes(_skewed_choice(rng, len(codes), n_rows, skew),
+                                                 categories=codes)
+        hierarchies[col] = make_hierarchy(depth, fan_out, kind=kind)
+
+    for response in responses:
+        columns[response] = np.round((rng.pareto(tail, n_rows) + 1) * 100, 2)
+
+    holding = None
+    if holdings is not None:
+        holding = "holding"
+        names = np.char.add("H", np.arange(holdings).astype(str))
+        columns[holding] = pd.Categorical.from_codes(
+            rng.integers(0, holdings, n_rows, dtype=np.int32), categories=names)
+
+    weight_column = None
+    if weight:
+        weight_column = "weight"
+        columns[weight_column] = np.round(rng.uniform(1, 10, n_rows), 2)
+
+    dataset = pd.DataFrame(columns)
+    return MicroData(dataset, hierarchies=hierarchies, holding=holding, weight=weight_column)
+
+
+def make_tabledata(
+    n_rows: int,
+    explanatory: Mapping[str, Tuple[int, int]],
+    response: str = "income",
+    *,
+    top_k: int = 2,
+    skew: float = 1.0,
+    tail: float = 1.5,
+    kind: str = TREE,
+    seed: Optional[int] = None,
+    **kwargs,
+) -> TableData:
+    """Generate tabular data including all hierarchical totals.
+
+    The table is aggregated from microdata generated by `make_microdata`.
+
+    :param n_rows: Number of records that the table is aggregated from.
+    :param explanatory: For each explanatory variable its depth and fan-out.
+    :param response: Name of the response variable.
+    :param top_k: Number of top contributors to include.
+    :param kwargs: Passed to TableData.
+    """
+    microdata = make_microdata(n_rows, explanatory, [response], skew=skew, tail=tail,
+                               kind=kind, seed=seed)
+    cube = microdata.cube(list(explanatory), [response], top_k=top_k)
+    return cube.to_tabledata(list(explanatory), response, **kwargs)
+
+
+def _skewed_choice(rng, n_codes, size, skew):
+    """Draw code numbers of which the frequency follows a power law."""
+    import numpy as np
+
+    weights = np.arange(1, n_codes + 1, dtype=np.float64) ** -skew
+    cdf = np.cumsum(weights[rng.permutation(n_codes)])
+    cdf /= cdf[-1]
+    choice = np.searchsorted(cdf, rng.random(size), side="right")
+    return np.minimum(choice, n_codes - 1).astype(np.int32)
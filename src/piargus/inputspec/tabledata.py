@@ -2,9 +2,10 @@ from pathlib import Path
 from typing import Dict, Collection
 from typing import Optional, Sequence, Iterable, Union, Any
 
-from .hierarchy import Hierarchy
+from ..helpers import as_codes
+from .hierarchy import FlatHierarchy, Hierarchy
 from .inputdata import InputData
-from .metadata import MetaData
+from .metadata import MetaData, Column
 from ..constants import SAFE, UNSAFE, PROTECTED, OPTIMAL
 from ..outputspec import Table, Apriori
 
@@ -102,35 +103,200 @@ class TableData(InputData, Table):
     def generate_metadata(self) -> MetaData:
         """Generates a metadata file for tabular data."""
         metadata = super().generate_metadata()
-        for col in self.dataset.columns:
-            metacol = metadata[col]
-
-            if col in {self.response, self.shadow, self.cost,
-                       self.lower_protection_level, self.upper_protection_level}:
-                metacol['NUMERIC'] = True
-            if col in self.hierarchies:
-                metacol["RECODABLE"] = True
-                metacol.set_hierarchy(self.hierarchies[col])
-            if col in self.codelists:
-                metacol["RECODABLE"] = True
-                metacol.set_codelist(self.codelists[col])
-
-            if col in self.explanatory:
-                metacol["RECODABLE"] = True
-            elif col in self.top_contributors:
-                metacol["MAXSCORE"] = True
-            elif col == self.lower_protection_level:
-                metacol['LOWERPL'] = True
-            elif col == self.upper_protection_level:
-                metacol['UPPERPL'] = True
-            elif col == self.frequency:
-                metacol['FREQUENCY'] = True
-            elif col == self.status_indicator:
-                metacol['STATUS'] = True
-                metadata.status_markers = self.status_markers
+        if self.status_indicator in self.dataset.columns:
+            metadata.status_markers = self.status_markers
 
         return metadata
 
+    def _metadata_settings(self) -> tuple:
+        return (
+            self.response,
+            self.shadow,
+            self.cost,
+            self.lower_protection_level,
+            self.upper_protection_level,
+            self.frequency,
+            self.status_indicator,
+            tuple(self.explanatory),
+            tuple(self.top_contributors),
+        )
+
+    def _generate_column(self, col) -> Column:
+        metacol = super()._generate_column(col)
+
+        if col in {self.response, self.shadow, self.cost,
+                   self.lower_protection_level, self.upper_protection_level}:
+            metacol['NUMERIC'] = True
+        if col in self.hierarchies:
+            metacol["RECODABLE"] = True
+            metacol.set_hierarchy(self.hierarchies[col])
+        if col in self.codelists:
+            metacol["RECODABLE"] = True
+            metacol.set_codelist(self.codelists[col])
+
+        if col in self.explanatory:
+            metacol["RECODABLE"] = True
+        elif col in self.top_contributors:
+            metacol["MAXSCORE"] = True
+        elif col == self.lower_protection_level:
+            metacol['LOWERPL'] = True
+        elif col == self.upper_protection_level:
+            metacol['UPPERPL'] = True
+        elif col == self.frequency:
+            metacol['FREQUENCY'] = True
+        elif col == self.status_indicator:
+            metacol['STATUS'] = True
+
+        return metacol
+
+    def check_additivity(
+        self,
+        columns: Optional[Sequence[str]] = None,
+        rtol: float = 1e-9,
+        atol: float = 1e-6,
+    ):
+        """Check that every total equals the sum of the cells it contains.
+
+        For each explanatory variable, the cells are summed to their parent in the hierarchy,
+        while the other variables are kept fixed.
+        Only totals of which at least one part occurs in the dataset are checked.
+        Rows with a missing code don't belong to any cell and are ignored.
+
+        :param columns: Columns that should add up.
+            Default: the response, shadow, cost and frequency columns that are present.
+        :param rtol: Relative tolerance of the comparison.
+        :param atol: Absolute tolerance of the comparison.
+        :returns: DataFrame with a row for each total that doesn't match,
+            containing the cell, the variable along which was summed, the column,
+            the actual and expected value and their difference.
+            The largest differences come first. Totals that are missing have no actual value.
+        """
+        import numpy as np
+        import pandas as pd
+
+        keys = list(self.explanatory)
+        if columns is None:
+            columns = [col for col in [self.response, self.shadow, self.cost, self.frequency]
+                       if col is not None and col in self.dataset.columns]
+        columns = list(dict.fromkeys(columns))
+
+        dataset = self.dataset[self.dataset[keys].notna().all(axis=1)]
+        frame = pd.DataFrame({key: as_codes(dataset[key]) for key in keys}, index=dataset.index)
+        for col in columns:
+            frame[col] = pd.to_numeric(dataset[col], errors="coerce")
+        actual = frame.groupby(keys, sort=False)[columns].sum()
+
+        violations = []
+        for key in keys:
+            hierarchy = self.hierarchies.get(key) or FlatHierarchy()
+            codes = frame[key]
+            ancestors = hierarchy.get_ancestors(codes.unique())
+            parents = codes.map({code: code_ancestors[0]
+                                 for code, code_ancestors in ancestors.items()
+                                 if code != hierarchy.total_code})
+            has_parent = parents.notna()
+
+            parts = frame[has_parent].assign(**{key: parents[has_parent]})
+            expected = parts.groupby(keys, sort=False)[columns].sum()
+            compared = expected.join(actual, how="left", rsuffix="_actual")
+            for col in columns:
+                is_violation = ~np.isclose(compared[f"{col}_actual"], compared[col],
+                                           rtol=rtol, atol=atol)
+                violation = pd.DataFrame({
+                    "variable": key,
+                    "column": col,
+                    "actual": compared.loc[is_violation, f"{col}_actual"],
+                    "expected": compared.loc[is_violation, col],
+                })
+                violations.append(violation.reset_index())
+
+        result = pd.concat(violations, ignore_index=True)
+        result["difference"] = result["actual"] - result["expected"]
+        order = result["difference"].abs().sort_values(ascending=False, na_position="first").index
+        return result.loc[order].reset_index(drop=True)
+
+    def with_totals(self) -> "TableData":
+        """Get a copy in which all totals are computed from the most detailed cells.
+
+        For each explanatory variable, a margin is added for every level of its hierarchy.
+        Totals are computed for the response, shadow, cost and frequency.
+        The top contributors of a total are the largest top contributors of its parts.
+        Totals that are already in the dataset are computed again.
+        Other columns, such as the status, are kept for existing cells and empty for new cells.
+        Codes that occur in the dataset keep their values, so integer codes remain integers.
+        Rows with a missing code don't belong to any cell and are left out.
+        The copy has its own hierarchies and codelists.
+        """
+        import copy
+
+        import numpy as np
+        import pandas as pd
+
+        from .cube import rollup
+
+        keys = list(self.explanatory)
+        sum_columns = list(dict.fromkeys(
+            col for col in [self.response, self.shadow, self.cost, self.frequency]
+            if col is not None))
+        top_columns = list(self.top_contributors)
+
+        dataset = self.dataset[self.dataset[keys].notna().all(axis=1)]
+        codes = pd.DataFrame({key: as_codes(dataset[key]) for key in keys}, index=dataset.index)
+        is_detail = np.ones(len(dataset), dtype=bool)
+        for key in keys:
+            hierarchy = self.hierarchies.get(key) or FlatHierarchy()
+            ancestors = hierarchy.get_ancestors(codes[key].unique())
+            margins = {hierarchy.total_code}.union(
+                *(code_ancestors for code, code_ancestors in ancestors.items()
+                  if code != hierarchy.total_code))
+            is_detail &= ~codes[key].isin(margins).to_numpy()
+
+        detail = codes[is_detail].join(dataset.loc[is_detail, sum_columns + top_columns])
+        result = rollup(detail, keys, self.hierarchies, sum_columns,
+                        {self.response: top_columns}, len(top_columns)).reset_index()
+        result[top_columns] = result[top_columns].fillna(0)
+
+        other_columns = [col for col in dataset.columns
+                         if col not in {*keys, *sum_columns, *top_columns}]
+        if other_columns:
+            others = codes.join(dataset[other_columns]).drop_duplicates(subset=keys)
+            result = result.merge(others, on=keys, how="left")
+
+        # Only new codes, such as those of margins, are left as str
+        for key in keys:
+            lookup = pd.Series(dataset[key].to_numpy(), index=codes[key])
+            lookup = lookup[~lookup.index.duplicated()]
+            positions = lookup.index.get_indexer(result[key])
+            values = result[key].to_numpy(dtype=object)
+            values[positions >= 0] = lookup.to_numpy()[positions[positions >= 0]]
+            result[key] = pd.Series(values, index=result.index).infer_objects()
+
+        # The total codes are already part of the hierarchies
+        with_totals = TableData(
+            result[list(dataset.columns)],
+            self.explanatory,
+            self.response,
+            self.shadow,
+            self.cost,
+            self.labda,
+            hierarchies=copy.deepcopy(self.hierarchies),
+            total_codes={},
+            frequency=self.frequency,
+            top_contributors=self.top_contributors,
+            lower_protection_level=self.lower_protection_level,
+            upper_protection_level=self.upper_protection_level,
+            status_indicator=self.status_indicator,
+            status_markers=self.status_markers,
+            safety_rule=self.safety_rule,
+            apriori=self.apriori,
+            suppress_method=self.suppress_method,
+            suppress_method_args=self.suppress_method_args,
+            codelists=copy.deepcopy(self.codelists),
+            column_lengths=dict(self.column_lengths),
+        )
+        with_totals.encoding = self.encoding
+        return with_totals
+
     def to_csv(self, file=None, na_rep=""):
         result = self.dataset.to_csv(file, index=False, header=False, na_rep=na_rep)
         if isinstance(file, (str, Path)):
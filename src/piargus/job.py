@@ -1,7 +1,11 @@
+import hashlib
+import uuid
+from concurrent.futures import Executor, ThreadPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 from tempfile import TemporaryDirectory
-from typing import Optional, Union, Mapping, Hashable, Iterable, Sequence, Any
+from typing import Optional, Union, Mapping, Hashable, Iterable, Sequence, Any, Iterator
 
+from .artefactstore import ArtefactStore, _file_digest
 from .batchwriter import BatchWriter
 from .inputspec import InputData, TableData, MetaData
 from .outputspec import Table, TreeRecode
@@ -25,6 +29,8 @@ class Job:
         name: Optional[str] = None,
         logbook: Union[bool, str] = True,
         interactive: bool = False,
+        store: Optional[ArtefactStore] = None,
+        encode_codes: bool = False,
         setup: bool = True,
     ):
         """
@@ -53,6 +59,10 @@ class Job:
         :param name: Name from which to derive the name of some temporary files.
         :param logbook: Whether this job should create its own logging file.
         :param interactive: Whether the gui should be opened.
+        :param store: Where to write input files that can be shared with other jobs.
+            If omitted, input files are written to `directory`.
+        :param encode_codes: Whether to replace the codes of explanatory variables by short numbers
+            in the files for TauArgus. Results are decoded again by `Table.load_result`.
         :param setup: Whether to set up the job immediately. (required before run).
         """
 
@@ -69,6 +79,15 @@ class Job:
         self.name = name
         self.logbook = logbook
         self.interactive = interactive
+        self.store = store
+        # Encoded copies of the aprioris and recodes of tables, which belong to this job
+        self._encoded_aprioris = {}
+        self._encoded_recodes = {}
+
+        if encode_codes:
+            columns = {var for table in self.tables.values()
+                       for var in table.find_variables(numeric=False)}
+            self.input_data = input_data.encode_codes(columns)
 
         if setup:
             self.setup()
@@ -76,6 +95,12 @@ class Job:
     def __str__(self):
         return self.name
 
+    def __getstate__(self):
+        # The temporary directory belongs to the original job and should not be pickled
+        state = self.__dict__.copy()
+        state['_tmp_directory'] = None
+        return state
+
     @property
     def name(self):
         """Name of the job."""
@@ -84,7 +109,7 @@ class Job:
     @name.setter
     def name(self, value):
         if value is None:
-            value = f'job_{id(self)}'
+            value = f'job_{uuid.uuid4().hex[:12]}'
         self._name = slugify(value)
 
     @property
@@ -151,10 +176,23 @@ class Job:
 
     def setup(self, check=True):
         """Generate all files required for TauArgus to run."""
+        self._setup_inputs()
+        self._setup_job(check)
+
+    def _setup_inputs(self):
+        """Generate the files that only depend on input data.
+
+        Jobs that share input data may do this at the same time, but only one generates them.
+        """
+        self._setup_directories()
+        with self.input_data._lock:
+            self._setup_input_data()
+            self._setup_hierarchies()
+            self._setup_codelists()
+
+    def _setup_job(self, check=True):
+        """Generate the files of this job. Inputs should be set up already."""
         self._setup_directories()
-        self._setup_input_data()
-        self._setup_hierarchies()
-        self._setup_codelists()
         self._setup_metadata()
         self._setup_tables()
         self._setup_batch()
@@ -170,11 +208,19 @@ class Job:
         output_directory.mkdir(exist_ok=True)
         self.workdir.mkdir(parents=True, exist_ok=True)
 
+    def _save_input(self, obj, write, default: Path, kind: str):
+        """Write an input file to the store if there is one or to default otherwise."""
+        if self.store is not None:
+            self.store.save(obj, write, kind=kind, suffix=default.suffix)
+        else:
+            write(default)
+            obj.filepath = default
+
     def _setup_input_data(self):
-        name = f"{self.name}_{type(self.input_data).__name__.casefold()}"
-        default = self.directory / 'input' / f"{name}.csv"
+        kind = type(self.input_data).__name__.casefold()
+        default = self.directory / 'input' / f"{self.name}_{kind}.csv"
         if not self.input_data.filepath:
-            self.input_data.to_csv(default)
+            self._save_input(self.input_data, self.input_data.to_csv, default, kind)
 
     def _setup_metadata(self):
         if not self.metadata:
@@ -183,38 +229,72 @@ class Job:
         name = f"{self.name}_{type(self.input_data).__name__.casefold()}"
         default = self.directory / 'input' / f"{name}.rda"
         if not self.metadata.filepath:
-            self.metadata.to_rda(default)
+            self._save_input(self.metadata, self.metadata.to_rda, default, 'metadata')
 
     def _setup_hierarchies(self):
         self.input_data.resolve_column_lengths()
         for col, hierarchy in self.input_data.hierarchies.items():
             if hasattr(hierarchy, 'filepath') and not hierarchy.filepath:
                 default = self.directory / 'input' / f'{col}_hierarchy.hrc'
-                hierarchy.to_hrc(default, length=self.input_data.column_lengths[col])
+                length = self.input_data.column_lengths[col]
+                self._save_input(hierarchy, lambda path: hierarchy.to_hrc(path, length=length),
+                                 default, 'hierarchy')
 
     def _setup_codelists(self):
         self.input_data.resolve_column_lengths()
         for col, codelist in self.input_data.codelists.items():
             if not codelist.filepath:
                 default = self.directory / 'input' / f'{col}_codelist.cdl'
-                codelist.to_cdl(default, length=self.input_data.column_lengths[col])
+                length = self.input_data.column_lengths[col]
+                self._save_input(codelist, lambda path: codelist.to_cdl(path, length=length),
+                                 default, 'codelist')
 
     def _setup_tables(self):
+        encoding = self.input_data.encoding
+        recode_files = {}
+        self._encoded_aprioris = {}
+        self._encoded_recodes = {}
         for t_name, table in self.tables.items():
+            table.code_encoding = encoding
+            tablename = f'{self.name}_{slugify(t_name)}'
             if table.filepath_out is None:
-                tablename = f'{self.name}_{slugify(t_name)}'
                 table.filepath_out = self.directory / 'output' / f"{tablename}.csv"
 
-            if table.apriori and table.apriori.filepath is None:
-                tablename = f'{self.name}_{slugify(t_name)}'
+            if table.apriori and _is_encoded(encoding, table.explanatory):
+                # The apriori of the caller keeps referring to the original codes
+                apriori = encoding.encode_apriori(table.explanatory, table.apriori)
                 default = self.directory / 'input' / f'{tablename}_apriori.hst'
-                table.apriori.to_hst(default)
+                self._save_input(apriori, apriori.to_hst, default, 'apriori')
+                self._encoded_aprioris[t_name] = apriori
+            elif table.apriori and table.apriori.filepath is None:
+                default = self.directory / 'input' / f'{tablename}_apriori.hst'
+                self._save_input(table.apriori, table.apriori.to_hst, default, 'apriori')
 
             for col, recode in table.recodes.items():
-                if isinstance(recode, TreeRecode) and recode.filepath is None:
-                    tablename = f'{self.name}_{slugify(t_name)}'
-                    default = self.directory / 'input' / f"{tablename}_{col}_recode.grc"
-                    recode.to_grc(default, length=self.input_data.column_lengths[col])
+                if not isinstance(recode, TreeRecode):
+                    continue
+
+                encoded = _is_encoded(encoding, [col])
+                if recode.filepath is not None and not encoded:
+                    continue
+
+                length = self.input_data.column_lengths[col]
+                # Tables often share a recode, which only needs to be written once.
+                # Encoded codes differ per column, so then the column matters as well.
+                key = tuple(recode.codes), length
+                if encoded:
+                    key += (col,)
+                    recode = encoding.encode_recode(col, recode)
+                    self._encoded_recodes[t_name, col] = recode
+
+                if key in recode_files:
+                    recode.filepath = recode_files[key]
+                    continue
+
+                default = self.directory / 'input' / f"{tablename}_{col}_recode.grc"
+                self._save_input(recode, lambda path: recode.to_grc(path, length=length),
+                                 default, 'recode')
+                recode_files[key] = recode.filepath
 
     def _setup_batch(self):
         with open(self.batch_filepath, 'w') as batch:
@@ -237,17 +317,19 @@ class Job:
             else:
                 writer.read_microdata()
 
-            for t_index, table in enumerate(self.tables.values(), 1):
+            for t_index, (t_name, table) in enumerate(self.tables.items(), 1):
                 if table.apriori:
+                    apriori = self._encoded_aprioris.get(t_name, table.apriori)
                     writer.apriori(
-                        table.apriori,
+                        apriori,
                         t_index,
-                        separator=table.apriori.separator,
-                        ignore_error=table.apriori.ignore_error,
-                        expand_trivial=table.apriori.expand_trivial,
+                        separator=apriori.separator,
+                        ignore_error=apriori.ignore_error,
+                        expand_trivial=apriori.expand_trivial,
                     )
 
                 for variable, recode in table.recodes.items():
+                    recode = self._encoded_recodes.get((t_name, variable), recode)
                     writer.recode(t_index, variable, recode)
 
                 if table.suppress_method:
@@ -263,7 +345,50 @@ class Job:
             if self.interactive:
                 writer.go_interactive()
 
-    def check(self):
+    def fingerprint(self) -> str:
+        """Hash of the batch file and the content of the input files it refers to.
+
+        Jobs with the same fingerprint produce the same results.
+        The job should be set up.
+        """
+        sha = hashlib.sha256()
+        with open(self.batch_filepath, 'rb') as reader:
+            sha.update(reader.read())
+
+        input_filepath = str(self.input_data.filepath)
+        for filepath in sorted({str(path) for path in self._input_files()}):
+            sha.update(filepath.encode())
+            if filepath == input_filepath:
+                # Usually the largest file, which is shared by many jobs
+                sha.update(self.input_data._content_digest().encode())
+            else:
+                sha.update(_file_digest(filepath).encode())
+
+        return sha.hexdigest()
+
+    def _input_files(self) -> Iterator[Path]:
+        """Files that are read by TauArgus when running this job."""
+        yield self.input_data.filepath
+        yield self.metadata.filepath
+        for obj in [*self.input_data.hierarchies.values(), *self.input_data.codelists.values()]:
+            if getattr(obj, 'filepath', None):
+                yield obj.filepath
+
+        for t_name, table in self.tables.items():
+            apriori = self._encoded_aprioris.get(t_name, table.apriori)
+            if apriori and apriori.filepath:
+                yield apriori.filepath
+            for col, recode in table.recodes.items():
+                recode = self._encoded_recodes.get((t_name, col), recode)
+                if getattr(recode, 'filepath', None):
+                    yield recode.filepath
+
+    def check(self, additivity: bool = False):
+        """Check whether the job can be run.
+
+        :param additivity: Whether to check that the totals of TableData add up.
+        :raises JobSetupError: If there are problems.
+        """
         problems = []
         for table in self.tables.values():
             for var in table.find_variables():
@@ -287,10 +412,122 @@ class Job:
                 else:
                     problems.append(f"Variable {var} not in metadata")
 
+        if additivity and isinstance(self.input_data, TableData):
+            violations = self.input_data.check_additivity()
+            if len(violations):
+                worst = violations.iloc[0]
+                cell = tuple(worst[self.input_data.explanatory])
+                problems.append(f"{len(violations)} totals don't add up. "
+                                f"Largest difference: {worst['difference']} "
+                                f"in {worst['column']} of cell {cell}.")
+
         if problems:
             raise JobSetupError(problems)
 
 
+def setup_all(
+    jobs: Iterable[Job],
+    executor: Optional[Executor] = None,
+    check: bool = True,
+) -> Iterator[Job]:
+    """Set up many jobs concurrently.
+
+    The jobs should be created with `setup=False`.
+    Files that only depend on input data are generated once for each distinct input data.
+    Jobs are yielded as soon as their setup has finished,
+    so they can be run while the other jobs are still being set up:
+
+    >>> for job in setup_all(jobs):
+    ...     tau.run(job)
+
+    :param jobs: The jobs to set up.
+    :param executor: Executor to use. Defaults to a thread pool.
+        When a process pool is used, jobs need an explicit directory.
+    :param check: Whether to check each job after setting it up.
+    :returns: The jobs in the order in which their setup finished.
+    """
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor()
+
+    # Group jobs by their input data, so shared inputs are generated only once
+    groups = dict()
+    for job in jobs:
+        groups.setdefault(id(job.input_data), []).append(job)
+
+    pending = dict()
+    try:
+        for group in groups.values():
+            future = executor.submit(_setup_job_inputs, group[0])
+            pending[future] = group
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                result = future.result()
+                if isinstance(item, list):
+                    # Inputs of a group are ready
+                    _copy_input_state(item[0].input_data, result.input_data)
+                    for job in item:
+                        pending[executor.submit(_setup_job, job, check)] = job
+                else:
+                    _copy_job_state(item, result)
+                    yield item
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown()
+
+
+def _setup_job_inputs(job: Job) -> Job:
+    job._setup_inputs()
+    return job
+
+
+def _setup_job(job: Job, check: bool) -> Job:
+    job._setup_job(check)
+    return job
+
+
+def _copy_input_state(target: InputData, source: InputData):
+    """Copy the setup state back when source was set up in a different process."""
+    if target is source:
+        return
+
+    target.filepath = source.filepath
+    target.column_lengths = source.column_lengths
+    for col, hierarchy in source.hierarchies.items():
+        if hasattr(hierarchy, 'filepath'):
+            target.hierarchies[col].filepath = hierarchy.filepath
+    for col, codelist in source.codelists.items():
+        target.codelists[col].filepath = codelist.filepath
+
+
+def _copy_job_state(target: Job, source: Job):
+    """Copy the setup state back when source was set up in a different process."""
+    if target is source:
+        return
+
+    target.metadata = source.metadata
+    target._encoded_aprioris = source._encoded_aprioris
+    target._encoded_recodes = source._encoded_recodes
+    for t_name, table in source.tables.items():
+        target_table = target.tables[t_name]
+        target_table.filepath_out = table.filepath_out
+        if table.apriori:
+            target_table.apriori.filepath = table.apriori.filepath
+        for col, recode in table.recodes.items():
+            if isinstance(recode, TreeRecode):
+                target_table.recodes[col].filepath = recode.filepath
+
+
+def _is_encoded(encoding, columns) -> bool:
+    """Whether the codes of any of the columns are encoded."""
+    return encoding is not None and any(col in encoding for col in columns)
+
+
 class JobSetupError(Exception):
     """Exception to raise when the problem specification is wrong."""
     def __init__(self, problems):
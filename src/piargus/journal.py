@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+from .result import ArgusReport
+
+
+class Journal:
+    """
+    Durable record of the jobs that were run, used to resume after a crash.
+
+    Every finished job is appended to a file as a line of json and flushed to disk immediately.
+    When a run is restarted, jobs that already succeeded with the same fingerprint
+    can be skipped, so only failed and pending jobs are run again.
+    The last entry of a key is the one that counts.
+    A line that was only partially written when the process crashed is ignored.
+    """
+    def __init__(self, filepath: Union[str, Path]):
+        """
+        Open a journal. It is created when the first entry is recorded.
+
+        :param filepath: Location of the journal, for example `"tau/journal.jsonl"`.
+        """
+        self.filepath = Path(filepath).absolute()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._n_lines = 0
+        self._needs_newline = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({str(self.filepath)!r})"
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return str(key) in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._entries))
+
+    def get(self, key) -> Optional[Dict[str, Any]]:
+        """Return the last entry of key or None if it wasn't recorded."""
+        return self._entries.get(str(key))
+
+    def record(
+        self,
+        key,
+        fingerprint: Optional[str],
+        status: str,
+        report: Optional[ArgusReport] = None,
+        **extra,
+    ) -> Dict[str, Any]:
+        """Append an entry to the journal.
+
+        :param key: Identifies the job, usually its name.
+        :param fingerprint: Hash of everything that determines the outcome of the job.
+        :param status: Outcome of the job, such as "success" or "failed".
+        :param report: Report of the TauArgus run, if there was one.
+        :param extra: Other information to store, which should be json serializable.
+        :returns: The entry that was recorded.
+        """
+        entry = {
+            "key": str(key),
+            "fingerprint": fingerprint,
+            "status": status,
+            "time": time.time(),
+            "report": None if report is None else report.to_dict(),
+            **extra,
+        }
+        line = json.dumps(entry, default=str) + "\n"
+
+        with self._lock:
+            if self._needs_newline:
+                # Don't continue on a partially written line
+                line = "\n" + line
+                self._needs_newline = False
+            self.filepath.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.filepath, 'a') as writer:
+                writer.write(line)
+                writer.flush()
+                os.fsync(writer.fileno())
+            self._entries[entry["key"]] = entry
+            self._n_lines += 1
+
+        return entry
+
+    def is_done(self, key, fingerprint: Optional[str] = None) -> bool:
+        """Whether the job succeeded before.
+
+        :param fingerprint: If given, the job only counts as done if it had the same fingerprint.
+        """
+        entry = self.get(key)
+        if entry is None or entry["status"] != "success":
+            return False
+        return fingerprint is None or entry["fingerprint"] == fingerprint
+
+    def report(self, key) -> Optional[ArgusReport]:
+        """Return the report that was recorded for key."""
+        entry = self.get(key)
+        if entry is None or entry["report"] is None:
+            return None
+        return ArgusReport.from_dict(entry["report"])
+
+    def compact(self):
+        """Rewrite the journal so that it only contains the last entry of each key."""
+        with self._lock:
+            if self._n_lines == len(self._entries):
+                return
+
+            tmp_file = self.filepath.with_suffix(self.filepath.suffix + ".tmp")
+            with open(tmp_file, 'w') as writer:
+                for entry in self._entries.values():
+                    writer.write(json.dumps(entry, default=str) + "\n")
+                writer.flush()
+                os.fsync(writer.fileno())
+            tmp_file.replace(self.filepath)
+            self._n_lines = len(self._entries)
+
+    def _load(self):
+        try:
+            reader = open(self.filepath)
+        except FileNotFoundError:
+            return
+
+        with reader:
+            line = ""
+            for line in reader:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Written partially during a crash
+                    continue
+                self._entries[entry["key"]] = entry
+                self._n_lines += 1
+
+            self._needs_newline = bool(line) and not line.endswith("\n")
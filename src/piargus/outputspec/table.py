@@ -1,7 +1,5 @@
 from typing import Union, Optional, Sequence, Collection, Iterable, Any, Mapping
 
-import pandas as pd
-
 from .apriori import Apriori
 from .safetyrule import make_safety_rule, SafetyRule
 from ..result.tableresult import TableResult
@@ -83,6 +81,7 @@ class Table:
         self.cost = cost
         self.labda = labda
         self.filepath_out = None
+        self.code_encoding = None
         self.safety_rule = safety_rule
         self.apriori = apriori
         self.recodes = recodes
@@ -111,12 +110,16 @@ class Table:
 
     def load_result(self) -> TableResult:
         """After tau argus has run, this obtains the protected data."""
+        import pandas as pd
+
         if self.response == FREQUENCY_RESPONSE:
             response = 'Freq'
         else:
             response = self.response
 
         df = pd.read_csv(self.filepath_out, index_col=self.explanatory)
+        if self.code_encoding is not None:
+            df.index = self.code_encoding.decode_index(df.index)
         return TableResult(df, response)
 
     def find_variables(self, categorical=True, numeric=True):
@@ -1,6 +1,7 @@
 import io
 import os
 from pathlib import Path
+from typing import Any, Callable, Optional
 
 
 class TreeRecode:
@@ -24,11 +25,49 @@ class TreeRecode:
 
         codes = list()
         for line in file:
-            if line.strip().upper() != cls.HEADER:
-                codes.append(line)
+            code = line.strip()
+            if code and code.upper() != cls.HEADER:
+                codes.append(code)
 
         return cls(codes)
 
+    @classmethod
+    def from_hierarchy(cls, hierarchy, max_depth: Optional[int] = None,
+                       collapse: Optional[Callable[[Any], bool]] = None):
+        """Collapse a TreeHierarchy.
+
+        The children of a collapsed node are hidden from the output.
+
+        :param hierarchy: The TreeHierarchy to recode.
+        :param max_depth: Collapse all nodes at this depth, so no deeper codes are shown.
+            Children of the total code have depth 1.
+        :param collapse: Function that receives a node and returns whether to collapse it.
+        """
+        codes = []
+        stack = [(child, 1) for child in reversed(hierarchy.root.children)]
+        while stack:
+            node, depth = stack.pop()
+            if not node.children:
+                continue
+            elif (max_depth is not None and depth >= max_depth) or (collapse and collapse(node)):
+                # Descendants of a collapsed node don't need to be visited
+                codes.append(node.code)
+            else:
+                stack.extend((child, depth + 1) for child in reversed(node.children))
+
+        return cls(codes)
+
+    def __eq__(self, other):
+        if isinstance(other, TreeRecode):
+            return self.codes == other.codes
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(tuple(self.codes))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.codes!r})"
+
     def to_grc(self, file=None, length=0):
         """Write to grc file."""
         if file is None:
@@ -0,0 +1,209 @@
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Hashable, Iterable, Iterator, Optional, Union
+
+from .job import Job
+from .journal import Journal
+from .result import ArgusReport, TableResult
+
+# Marks the end of the stream of jobs
+_DONE = object()
+
+# Seconds to block on a queue before checking whether the pipeline was cancelled
+_POLL_INTERVAL = 0.1
+
+
+class PipelineResult:
+    """Outcome of a job that went through a Pipeline."""
+    def __init__(self, job: Job):
+        self.job = job
+        self.report: Optional[ArgusReport] = None
+        self.results: Dict[Hashable, TableResult] = {}
+        self.error: Optional[BaseException] = None
+        self.fingerprint: Optional[str] = None
+        self.skipped = False
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} job={self.job} status={self.status}>"
+
+    @property
+    def status(self) -> str:
+        """Return whether the job succeeded, failed or was skipped as text."""
+        if self.is_succesful:
+            return "skipped" if self.skipped else "success"
+        else:
+            return "failed"
+
+    @property
+    def is_succesful(self) -> bool:
+        """Whether the job was set up, run and loaded without problems."""
+        return self.error is None and self.report is not None and self.report.is_succesful
+
+
+class Pipeline:
+    """
+    Run many jobs while overlapping setup, TauArgus and loading results.
+
+    While TauArgus is solving one job, the next job is being set up
+    and the results of the previous job are being loaded.
+    Bounded queues between the stages keep the number of jobs in flight limited.
+    """
+    def __init__(
+        self,
+        tau,
+        *,
+        setup_workers: int = 1,
+        run_workers: int = 1,
+        load_workers: int = 1,
+        queue_size: int = 2,
+        check: bool = True,
+        journal: Optional[Journal] = None,
+    ):
+        """
+        Create a pipeline.
+
+        :param tau: The TauArgus instance that runs the jobs.
+        :param setup_workers: Number of jobs that can be set up at the same time.
+        :param run_workers: Number of TauArgus processes that can run at the same time.
+        :param load_workers: Number of jobs whose results can be loaded at the same time.
+        :param queue_size: Maximum number of jobs waiting between two stages.
+        :param check: Whether to check jobs after setting them up.
+        :param journal: Where to record the outcome of each job.
+            Jobs that succeeded before with the same fingerprint are not run again,
+            so an interrupted run can be resumed. This requires that jobs have a fixed name.
+        """
+        self.tau = tau
+        self.setup_workers = setup_workers
+        self.run_workers = run_workers
+        self.load_workers = load_workers
+        self.queue_size = queue_size
+        self.check = check
+        self.journal = journal
+
+    def run(self, jobs: Iterable[Union[Job, Callable[[], Job]]]) -> Iterator[PipelineResult]:
+        """Run jobs through the pipeline.
+
+        :param jobs: Jobs created with `setup=False` or functions that create such jobs.
+            This can be a generator, in which case jobs are only created when needed.
+        :returns: A result for each job in the order in which they finish.
+            Failures are reported through the result instead of raising an exception.
+        """
+        cancelled = threading.Event()
+        queues = [queue.Queue(self.queue_size) for _ in range(3)]
+        output = queue.Queue(self.queue_size)
+        errors = []
+
+        def setup(item):
+            result = PipelineResult(item)
+            try:
+                job = item() if callable(item) else item
+                result.job = job
+                job.setup(check=self.check)
+                if self.journal is not None:
+                    result.fingerprint = job.fingerprint()
+                    if (self.journal.is_done(job.name, result.fingerprint)
+                            and _has_outputs(job)):
+                        result.report = self.journal.report(job.name)
+                        result.skipped = True
+            except Exception as err:
+                result.error = err
+            return result
+
+        def run(result):
+            if result.error is None and not result.skipped:
+                try:
+                    result.report = self.tau.run(result.job, check=False)
+                except Exception as err:
+                    result.error = err
+
+                if self.journal is not None:
+                    status = "failed" if result.report is None else result.report.status
+                    self.journal.record(result.job.name, result.fingerprint, status,
+                                        result.report)
+            return result
+
+        def load(result):
+            if result.error is None and result.report.is_succesful:
+                try:
+                    for name, table in result.job.tables.items():
+                        result.results[name] = table.load_result()
+                except Exception as err:
+                    result.error = err
+            return result
+
+        def feed():
+            try:
+                for item in jobs:
+                    if not _put(queues[0], item, cancelled):
+                        return
+            except BaseException as err:
+                errors.append(err)
+            finally:
+                _put(queues[0], _DONE, cancelled)
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        stages = [(setup, self.setup_workers), (run, self.run_workers), (load, self.load_workers)]
+        outboxes = [*queues[1:], output]
+        for (func, workers), inbox, outbox in zip(stages, queues, outboxes):
+            threads.extend(_start_stage(func, workers, inbox, outbox, cancelled))
+
+        for thread in threads:
+            thread.start()
+
+        try:
+            while (result := output.get()) is not _DONE:
+                yield result
+            if errors:
+                raise errors[0]
+        finally:
+            # Jobs that are already in progress are finished first
+            cancelled.set()
+            for thread in threads:
+                thread.join()
+
+
+def _has_outputs(job) -> bool:
+    return all(table.filepath_out and Path(table.filepath_out).exists()
+               for table in job.tables.values())
+
+
+def _start_stage(func, workers, inbox, outbox, cancelled):
+    remaining = [workers]
+    lock = threading.Lock()
+
+    def work():
+        while (item := _get(inbox, cancelled)) is not None:
+            if item is _DONE:
+                # Let sibling workers know as well and let the last worker pass it on
+                _put(inbox, _DONE, cancelled)
+                with lock:
+                    remaining[0] -= 1
+                    is_last = remaining[0] == 0
+                if is_last:
+                    _put(outbox, _DONE, cancelled)
+                return
+
+            if not _put(outbox, func(item), cancelled):
+                return
+
+    return [threading.Thread(target=work, daemon=True) for _ in range(workers)]
+
+
+def _get(inbox, cancelled):
+    while not cancelled.is_set():
+        try:
+            return inbox.get(timeout=_POLL_INTERVAL)
+        except queue.Empty:
+            pass
+    return None
+
+
+def _put(outbox, item, cancelled) -> bool:
+    while not cancelled.is_set():
+        try:
+            outbox.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
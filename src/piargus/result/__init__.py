@@ -1,8 +1,12 @@
 __all__ = [
     "ArgusReport",
+    "LogbookSummary",
+    "ResourceUsage",
     "TableResult",
     "TauArgusException",
 ]
 
 from .tableresult import TableResult
 from .argusreport import ArgusReport, TauArgusException
+from .logbook import LogbookSummary
+from .resourceusage import ResourceUsage
@@ -1,9 +1,18 @@
+import io
+import os
 import textwrap
-from typing import Sequence
+import time
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional, Sequence
+
+from .logbook import LogbookSummary, parse_logbook
+from .resourceusage import ResourceUsage
 
 SEP_MARKER = '--------------------'
 END_MARKER = "End of TauArgus run"
 
+# Size of the blocks that are read when scanning the logbook backwards
+TAIL_CHUNK_SIZE = 64 * 1024
+
 
 class ArgusReport:
     """Report of argus run."""
@@ -14,6 +23,42 @@ class ArgusReport:
         self.workdir = str(workdir)
         self.batch = None
         self.logbook = None
+        self.timed_out = False
+        self.timed_out_table = None
+        self.suppress_methods = None
+        self.fallbacks = []
+        self.resources = None
+        self.error = None
+        self._summary = None
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "ArgusReport":
+        """Recreate a report from the result of `to_dict`."""
+        report = cls(data["returncode"], batch_file=data.get("batch_file"),
+                     logbook_file=data.get("logbook_file"), workdir=data.get("workdir"))
+        report.timed_out = data.get("timed_out", False)
+        report.timed_out_table = data.get("timed_out_table")
+        report.suppress_methods = data.get("suppress_methods")
+        report.fallbacks = [tuple(fallback) for fallback in data.get("fallbacks", [])]
+        if data.get("resources") is not None:
+            report.resources = ResourceUsage(**data["resources"])
+        report.error = data.get("error")
+        return report
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a dict that can be stored as json. The logbook is not included."""
+        return {
+            "returncode": self.returncode,
+            "batch_file": self.batch_file,
+            "logbook_file": self.logbook_file,
+            "workdir": self.workdir,
+            "timed_out": self.timed_out,
+            "timed_out_table": self.timed_out_table,
+            "suppress_methods": self.suppress_methods,
+            "fallbacks": [list(fallback) for fallback in self.fallbacks],
+            "resources": None if self.resources is None else self.resources._asdict(),
+            "error": self.error,
+        }
 
     def read_batch(self) -> Sequence[str]:
         """Read batchfile and return lines."""
@@ -25,24 +70,54 @@ class ArgusReport:
         return self.batch
 
     def read_log(self) -> Sequence[str]:
-        """Read logfile and return lines."""
+        """Read logfile and return lines.
+
+        Only the lines belonging to the last run are returned.
+        The logbook is scanned backwards from the end,
+        so this stays fast even if the logbook is shared by many runs.
+        """
         if self.logbook_file and self.logbook is None:
-            self.logbook = []
             try:
-                is_end = False
-                with open(self.logbook_file) as reader:
-                    for line in reader:
-                        self.logbook.append(line)
-                        if SEP_MARKER in line or is_end:
-                            self.logbook.clear()
-                            is_end = False
-                        elif END_MARKER in line:
-                            is_end = True
+                self.logbook = _read_last_run(self.logbook_file)
             except FileNotFoundError:
                 self.logbook = None
 
         return self.logbook
 
+    def parse_log(self) -> Optional[LogbookSummary]:
+        """Parse the logbook into timings and solver metrics per table.
+
+        Returns None if the logbook can't be read.
+        """
+        if self._summary is None:
+            log = self.read_log()
+            if log is not None:
+                self._summary = parse_logbook(log)
+
+        return self._summary
+
+    def follow(
+        self,
+        stop: Optional[Callable[[], bool]] = None,
+        poll_interval: float = 0.1,
+    ) -> Iterator[str]:
+        """Yield lines as they are appended to the logbook.
+
+        Only lines written after calling this method are returned.
+        This can be used to report progress while TauArgus is still running.
+
+        :param stop: Callable that returns True when no more lines are expected.
+            The remaining lines are yielded before the generator finishes.
+            If omitted, the logbook is followed indefinitely.
+        :param poll_interval: Seconds to wait before checking the logbook again.
+        """
+        try:
+            offset = os.path.getsize(self.logbook_file)
+        except FileNotFoundError:
+            offset = 0
+
+        return _follow(self.logbook_file, offset, stop, poll_interval)
+
     def check(self):
         """Raise an exception if the run failed."""
         if self.is_failed:
@@ -70,6 +145,19 @@ class ArgusReport:
         out = [f"<{self.__class__.__name__}>",
                f"status: {self.status} <{self.returncode}>"]
 
+        if self.timed_out:
+            out.append("timed out" if self.timed_out_table is None
+                       else f"timed out on table {self.timed_out_table}")
+
+        if self.resources is not None:
+            out.append(f"resources: {self.resources}")
+
+        if self.error is not None:
+            out.append(f"error: {self.error}")
+
+        for table, old_method, new_method in self.fallbacks:
+            out.append(f"fallback: {table}: {old_method} -> {new_method}")
+
         if self.batch_file:
             out.append("batch_file: " + self.batch_file)
 
@@ -92,3 +180,90 @@ class TauArgusException(Exception):
 
     def __str__(self):
         return str(self.result)
+
+
+def _read_last_run(logbook_file, chunk_size=TAIL_CHUNK_SIZE) -> Sequence[str]:
+    """Read the lines written after the last separator in the logbook."""
+    with open(logbook_file, 'rb') as reader:
+        offset = _find_tail_offset(reader, SEP_MARKER.encode(), chunk_size)
+        reader.seek(offset)
+        tail = reader.read()
+
+    lines = []
+    is_end = False
+    for line in io.TextIOWrapper(io.BytesIO(tail)):
+        lines.append(line)
+        if is_end:
+            lines.clear()
+            is_end = False
+        elif END_MARKER in line:
+            is_end = True
+
+    return lines
+
+
+def _find_tail_offset(reader, marker: bytes, chunk_size) -> int:
+    """Find the offset of the line following the last line containing marker.
+
+    Returns 0 if the marker does not occur.
+    """
+    end = reader.seek(0, os.SEEK_END)
+    position = end
+    # Start of the block that was read before, in case the marker spans two blocks
+    carry = b""
+    while position > 0:
+        read_size = min(chunk_size, position)
+        position -= read_size
+        reader.seek(position)
+        block = reader.read(read_size) + carry
+        index = block.rfind(marker)
+        if index >= 0:
+            return _find_line_end(reader, position + index + len(marker), chunk_size)
+        carry = block[:len(marker) - 1]
+
+    return 0
+
+
+def _find_line_end(reader, position, chunk_size) -> int:
+    """Find the offset after the first newline at or after position or the end of the file."""
+    reader.seek(position)
+    while True:
+        block = reader.read(chunk_size)
+        if not block:
+            return position
+        newline = block.find(b"\n")
+        if newline >= 0:
+            return position + newline + 1
+        position += len(block)
+
+
+def _follow(logbook_file, offset, stop, poll_interval) -> Iterator[str]:
+    pending = b""
+    while True:
+        is_stopped = stop is not None and stop()
+        try:
+            with open(logbook_file, 'rb') as reader:
+                if reader.seek(0, os.SEEK_END) < offset:
+                    # Logbook was replaced. Start from the beginning.
+                    offset = 0
+                reader.seek(offset)
+                data = reader.read()
+        except FileNotFoundError:
+            data = b""
+
+        offset += len(data)
+        pending += data
+        *complete, pending = pending.split(b"\n")
+        for line in complete:
+            yield _decode_line(line + b"\n")
+
+        if is_stopped:
+            if pending:
+                yield _decode_line(pending)
+            return
+
+        time.sleep(poll_interval)
+
+
+def _decode_line(line: bytes) -> str:
+    return io.TextIOWrapper(io.BytesIO(line)).read()
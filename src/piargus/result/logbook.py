@@ -0,0 +1,228 @@
+import re
+from datetime import datetime, timedelta, time as dtime
+from typing import Iterable, List, Optional, Sequence
+
+from ..batchprogram import COMMAND_PATTERN
+
+# TauArgus writes lines like "25-Aug-2023 16:49:24 : <SUPPRESS> OPT(1)"
+TIMESTAMP_PATTERN = re.compile(r"^\s*(?:(?P<date>\d{1,2}-[A-Za-z]{3}-\d{4})\s+)?"
+                               r"(?P<time>\d{1,2}:\d{2}:\d{2})\s*:\s?(?P<message>.*?)\s*$")
+TABLE_ARG_PATTERN = re.compile(r"^\(?\s*(?P<table>\d+)")
+SUPPRESS_ARG_PATTERN = re.compile(r"^(?P<method>[A-Za-z]+)\s*\(\s*(?P<table>\d+)")
+TABLE_MENTION_PATTERN = re.compile(r"\btable\s*:?\s*(?P<table>\d+)\b", re.IGNORECASE)
+
+# Patterns to find metrics in the messages written by TauArgus
+UNSAFE_PATTERNS = [
+    re.compile(r"(?P<count>\d+)\s+(?:primary\s+)?unsafe\s+cells?", re.IGNORECASE),
+    re.compile(r"unsafe\s+cells?\s*[:=]\s*(?P<count>\d+)", re.IGNORECASE),
+]
+SUPPRESSED_PATTERNS = [
+    re.compile(r"(?P<count>\d+)\s+(?:cells?\s+)?(?:secondary\s+)?(?:suppressed|suppressions)",
+               re.IGNORECASE),
+    re.compile(r"(?:suppressions?|suppressed\s+cells?)\s*[:=]\s*(?P<count>\d+)", re.IGNORECASE),
+]
+ITERATION_PATTERNS = [
+    re.compile(r"(?P<count>\d+)\s+iterations?", re.IGNORECASE),
+    re.compile(r"iterations?\s*[:=]\s*(?P<count>\d+)", re.IGNORECASE),
+]
+
+
+class LogEvent:
+    """A single timestamped line from the logbook."""
+    __slots__ = "time", "message", "details"
+
+    def __init__(self, time: Optional[dtime], message: str, details: Sequence[str] = ()):
+        self.time = time
+        self.message = message
+        self.details = list(details)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.time}, {self.message!r})"
+
+    @property
+    def command(self) -> Optional[str]:
+        """Batch command that this event logs, if any."""
+        match = COMMAND_PATTERN.match(self.message)
+        return match["command"].upper() if match else None
+
+    @property
+    def argument(self) -> Optional[str]:
+        """Argument of the batch command that this event logs, if any."""
+        match = COMMAND_PATTERN.match(self.message)
+        return match["arg"] if match else None
+
+    @property
+    def text(self) -> str:
+        """Message including the lines that belong to it."""
+        return "\n".join([self.message, *self.details])
+
+
+class TableRecord:
+    """Metrics of a single table within a TauArgus run."""
+    def __init__(self, index: int, specification: str):
+        self.index = index
+        self.specification = specification
+        self.safety_rule = None
+        self.suppress_method = None
+        self.suppress_start = None
+        self.suppress_end = None
+        self.unsafe_cells = None
+        self.suppressed_cells = None
+        self.iterations = None
+        self.written = False
+        # Messages about this table, which may contain information that isn't recognized
+        self.messages = []
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}({self.index}, {self.specification!r}, "
+                f"suppress_method={self.suppress_method!r}, "
+                f"suppress_duration={self.suppress_duration!r}, "
+                f"unsafe_cells={self.unsafe_cells!r}, "
+                f"suppressed_cells={self.suppressed_cells!r}, "
+                f"iterations={self.iterations!r})")
+
+    @property
+    def suppress_duration(self) -> Optional[float]:
+        """Seconds spent on secondary suppression."""
+        return _duration(self.suppress_start, self.suppress_end)
+
+    def to_dict(self) -> dict:
+        return {
+            "index": self.index,
+            "specification": self.specification,
+            "safety_rule": self.safety_rule,
+            "suppress_method": self.suppress_method,
+            "suppress_duration": self.suppress_duration,
+            "unsafe_cells": self.unsafe_cells,
+            "suppressed_cells": self.suppressed_cells,
+            "iterations": self.iterations,
+            "written": self.written,
+            "messages": list(self.messages),
+        }
+
+
+class LogbookSummary:
+    """Structured information extracted from the logbook of a single run."""
+    def __init__(self, events: Sequence[LogEvent], tables: Sequence[TableRecord]):
+        self.events = list(events)
+        self.tables = list(tables)
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(duration={self.duration!r}, "
+                f"tables={self.tables!r})")
+
+    @property
+    def start(self) -> Optional[dtime]:
+        """Time of the first event."""
+        times = [event.time for event in self.events if event.time is not None]
+        return times[0] if times else None
+
+    @property
+    def end(self) -> Optional[dtime]:
+        """Time of the last event."""
+        times = [event.time for event in self.events if event.time is not None]
+        return times[-1] if times else None
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds between the first and last event."""
+        return _duration(self.start, self.end)
+
+    def to_records(self) -> List[dict]:
+        """Return a dict for each table. Useful to create a DataFrame."""
+        return [table.to_dict() for table in self.tables]
+
+
+def parse_logbook(lines: Iterable[str]) -> LogbookSummary:
+    """Extract events and table metrics from the lines of a logbook.
+
+    The lines should belong to a single run, such as those returned by ArgusReport.read_log.
+    Lines without a timestamp are attached to the preceding event.
+    Messages that are logged while a table is suppressed or that mention a table
+    are kept in `messages` of that table, including those from which no metrics are recognized.
+    """
+    events = []
+    for line in lines:
+        match = TIMESTAMP_PATTERN.match(line)
+        if match:
+            timestamp = datetime.strptime(match["time"], "%H:%M:%S").time()
+            events.append(LogEvent(timestamp, match["message"]))
+        elif not line.strip():
+            continue
+        elif events:
+            events[-1].details.append(line.strip())
+        else:
+            events.append(LogEvent(None, line.strip()))
+
+    tables = []
+    active = []  # Tables on which the current suppression works
+    for event in events:
+        command = event.command
+        if command is not None:
+            # A new command ends the suppression of the previous command
+            for table in active:
+                table.suppress_end = event.time
+            active = []
+
+        if command == "SPECIFYTABLE":
+            tables.append(TableRecord(len(tables) + 1, event.argument))
+        elif command == "SAFETYRULE" and tables:
+            tables[-1].safety_rule = event.argument
+        elif command == "SUPPRESS":
+            match = SUPPRESS_ARG_PATTERN.match(event.argument)
+            if match:
+                index = int(match["table"])
+                # Table 0 means linked suppression of all tables
+                active = tables if index == 0 else tables[index - 1:index]
+                for table in active:
+                    table.suppress_method = match["method"]
+                    table.suppress_start = event.time
+        elif command == "WRITETABLE":
+            match = TABLE_ARG_PATTERN.match(event.argument)
+            if match and 0 < int(match["table"]) <= len(tables):
+                tables[int(match["table"]) - 1].written = True
+        elif command is None:
+            for table in active:
+                table.suppress_end = event.time
+                _update_counts(table, event.text)
+
+            if not active:
+                match = TABLE_MENTION_PATTERN.search(event.text)
+                if match and 0 < int(match["table"]) <= len(tables):
+                    _update_counts(tables[int(match["table"]) - 1], event.text)
+
+    return LogbookSummary(events, tables)
+
+
+def _update_counts(table: TableRecord, text: str):
+    table.messages.append(text)
+    unsafe_cells = _search_count(UNSAFE_PATTERNS, text)
+    suppressed_cells = _search_count(SUPPRESSED_PATTERNS, text)
+    iterations = _search_count(ITERATION_PATTERNS, text)
+
+    if unsafe_cells is not None:
+        table.unsafe_cells = unsafe_cells
+    if suppressed_cells is not None:
+        table.suppressed_cells = suppressed_cells
+    if iterations is not None:
+        table.iterations = iterations
+
+
+def _search_count(patterns, text) -> Optional[int]:
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return int(match["count"])
+    return None
+
+
+def _duration(start: Optional[dtime], end: Optional[dtime]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+
+    start = datetime.combine(datetime.min, start)
+    end = datetime.combine(datetime.min, end)
+    if end < start:
+        # Run passed midnight
+        end += timedelta(days=1)
+    return (end - start).total_seconds()
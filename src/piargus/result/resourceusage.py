@@ -0,0 +1,32 @@
+import sys
+from typing import NamedTuple, Optional
+
+
+class ResourceUsage(NamedTuple):
+    """Resources used by a TauArgus process."""
+    wall_seconds: float
+    user_seconds: Optional[float] = None
+    system_seconds: Optional[float] = None
+    max_rss: Optional[int] = None
+
+    @classmethod
+    def from_rusage(cls, rusage, wall_seconds: float) -> "ResourceUsage":
+        """Create from the result of `os.wait4` or `resource.getrusage`."""
+        # Linux reports the maximum resident set size in kilobytes, macOS in bytes
+        scale = 1 if sys.platform == "darwin" else 1024
+        return cls(wall_seconds, rusage.ru_utime, rusage.ru_stime, rusage.ru_maxrss * scale)
+
+    @property
+    def cpu_seconds(self) -> Optional[float]:
+        """Time spent on the CPU by the process."""
+        if self.user_seconds is None or self.system_seconds is None:
+            return None
+        return self.user_seconds + self.system_seconds
+
+    def __str__(self):
+        out = [f"wall: {self.wall_seconds:.2f} s"]
+        if self.cpu_seconds is not None:
+            out.append(f"cpu: {self.cpu_seconds:.2f} s")
+        if self.max_rss is not None:
+            out.append(f"max rss: {self.max_rss / 2 ** 20:.1f} MB")
+        return ", ".join(out)
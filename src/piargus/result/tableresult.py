@@ -1,4 +1,4 @@
-import pandas as pd
+from typing import TYPE_CHECKING
 
 from piargus.constants import SAFE, UNSAFE, PROTECTED, SUPPRESSED, EMPTY
 
@@ -11,6 +11,9 @@ STATUS_CODES = {
     EMPTY: [13, 14],
 }
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class TableResult:
     """Resulting table after protection."""
@@ -18,14 +21,14 @@ class TableResult:
         self._df = df
         self._response = response
 
-    def unsafe(self) -> pd.Series:
+    def unsafe(self) -> "pd.Series":
         """Return the unsafe original response.
 
         :returns: The raw unprotected totals as a series.
         """
         return self._df[self._response]
 
-    def status(self, recode=True) -> pd.Series:
+    def status(self, recode=True) -> "pd.Series":
         """Return the status of each response.
 
         :param recode: If True, readable codes will be returned.
@@ -42,6 +45,8 @@ class TableResult:
         status_num = self._df['Status']
 
         if recode:
+            import pandas as pd
+
             status_code = pd.Series('?', index=status_num.index, name='status')
             for code, nums in STATUS_CODES.items():
                 status_code[status_num.isin(nums)] = code
@@ -49,7 +54,7 @@ class TableResult:
         else:
             return status_num
 
-    def safe(self, unsafe_marker='x') -> pd.Series:
+    def safe(self, unsafe_marker='x') -> "pd.Series":
         """Return the (safe) totals of the response.
 
         :param unsafe_marker: The marker to shield unsafe values
@@ -64,8 +69,10 @@ class TableResult:
     def __str__(self):
         return f"Response: {self._response}\n{self.dataframe()}"
 
-    def dataframe(self) -> pd.DataFrame:
+    def dataframe(self) -> "pd.DataFrame":
         """Combines safe, status and unsafe in a dataframe."""
+        import pandas as pd
+
         return pd.DataFrame({
             'safe': self.safe(),
             'status': self.status(),
@@ -0,0 +1,269 @@
+import io
+import json
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .constants import GHMITER, MODULAR, NETWORK, OPTIMAL, ROUNDING, TABULAR_ADJUSTMENT
+from .job import Job
+from .result import ArgusReport
+
+# Rough seconds per cell for each suppression method, used until enough runs are observed
+PRIOR_SECONDS_PER_CELL = {
+    None: 1e-5,
+    GHMITER: 1e-4,
+    MODULAR: 1e-3,
+    NETWORK: 1e-3,
+    ROUNDING: 1e-2,
+    TABULAR_ADJUSTMENT: 1e-2,
+    OPTIMAL: 1e-2,
+}
+
+# Regularization of the fitted coefficients
+RIDGE_PENALTY = 1e-3
+
+
+class JobFeatures(NamedTuple):
+    """Properties of a job that determine how long TauArgus needs to solve it."""
+    cells: int
+    dimensions: int
+    depth: int
+    method: Optional[str]
+
+    @classmethod
+    def from_job(cls, job: Job) -> "JobFeatures":
+        """Estimate the features of a job from its input data and tables.
+
+        The number of cells includes the margins of the hierarchies.
+        The method is the most expensive suppression method used by the job.
+        """
+        input_data = job.input_data
+        code_counts = {}
+        cells = dimensions = depth = 0
+        methods = {job.linked_suppress_method}
+        for table in job.tables.values():
+            table_cells = 1
+            for col in table.explanatory:
+                if col not in code_counts:
+                    code_counts[col] = _count_codes(input_data, col)
+                table_cells *= code_counts[col][0]
+                depth = max(depth, code_counts[col][1])
+
+            cells += table_cells
+            dimensions = max(dimensions, len(table.explanatory))
+            methods.add(table.suppress_method)
+
+        method = max(methods, key=_method_cost)
+        return cls(cells, dimensions, depth, _method_name(method))
+
+
+class RuntimeModel:
+    """
+    Predict how long TauArgus needs for a job.
+
+    The logarithm of the run time is fitted linearly on the logarithm of the number of cells,
+    the number of dimensions, the depth of the hierarchies and the suppression method.
+    Until enough runs are observed, a rough estimate per cell is used.
+    """
+    @classmethod
+    def from_json(cls, file) -> "RuntimeModel":
+        """Read observations from a json-file."""
+        if not hasattr(file, 'read'):
+            with open(file) as reader:
+                return cls.from_json(reader)
+
+        observations = [(JobFeatures(**observation["features"]), observation["seconds"])
+                        for observation in json.load(file)]
+        return cls(observations)
+
+    def __init__(self, observations: Iterable[Tuple[JobFeatures, float]] = ()):
+        self.observations: List[Tuple[JobFeatures, float]] = []
+        self._coefficients = None
+        self._methods = []
+        self._lock = threading.Lock()
+        for features, seconds in observations:
+            self.record(features, seconds)
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} observations={len(self.observations)}>"
+
+    def record(self, features: JobFeatures, seconds: float):
+        """Add an observed run time."""
+        with self._lock:
+            self.observations.append((features, seconds))
+            self._coefficients = None
+
+    def predict(self, features: JobFeatures) -> float:
+        """Predict the run time in seconds."""
+        with self._lock:
+            if self._coefficients is None:
+                self._fit()
+            coefficients = self._coefficients
+
+        if coefficients is None:
+            return PRIOR_SECONDS_PER_CELL.get(features.method, 1e-3) * max(features.cells, 1)
+
+        x = self._design_row(features)
+        return math.exp(sum(c * v for c, v in zip(coefficients, x)))
+
+    def to_json(self, file=None):
+        """Write observations to a json-file."""
+        if file is None:
+            buffer = io.StringIO()
+            self.to_json(buffer)
+            return buffer.getvalue()
+        elif not hasattr(file, 'write'):
+            with open(Path(file), 'w') as writer:
+                self.to_json(writer)
+        else:
+            with self._lock:
+                observations = [{"features": features._asdict(), "seconds": seconds}
+                                for features, seconds in self.observations]
+            json.dump(observations, file, indent=2)
+
+    def _fit(self):
+        self._methods = sorted({features.method or "" for features, _ in self.observations})
+        n_coefficients = len(self._methods) + 3
+        if len(self.observations) < n_coefficients:
+            self._coefficients = None
+            return
+
+        import numpy as np
+
+        x = np.array([self._design_row(features) for features, _ in self.observations])
+        y = np.log([max(seconds, 1e-3) for _, seconds in self.observations])
+        penalty = RIDGE_PENALTY * np.eye(n_coefficients)
+        self._coefficients = np.linalg.solve(x.T @ x + penalty, x.T @ y).tolist()
+
+    def _design_row(self, features: JobFeatures) -> List[float]:
+        method_columns = [float((features.method or "") == method) for method in self._methods]
+        return [
+            *method_columns,
+            math.log(max(features.cells, 1)),
+            float(features.dimensions),
+            float(features.depth),
+        ]
+
+
+class ScheduledRun:
+    """Outcome of a job that was run by a Scheduler."""
+    def __init__(self, job: Job, predicted: float):
+        self.job = job
+        self.predicted = predicted
+        self.seconds: Optional[float] = None
+        self.report: Optional[ArgusReport] = None
+
+    def __repr__(self):
+        return f"<{self.__class__.__name__} job={self.job} status={self.status}>"
+
+    @property
+    def status(self) -> str:
+        if self.report is None:
+            return "skipped"
+        elif self.report.is_succesful:
+            return "success"
+        else:
+            return "failed"
+
+
+class Scheduler:
+    """
+    Run jobs in parallel, starting with the job that is predicted to take longest.
+
+    Starting long jobs first prevents a single long job from running alone at the end.
+    If a deadline is given, a job is skipped if it is not predicted to finish before it.
+    """
+    def __init__(
+        self,
+        tau,
+        model: Optional[RuntimeModel] = None,
+        workers: int = 1,
+        deadline: Optional[float] = None,
+    ):
+        """
+        Create a scheduler.
+
+        :param tau: The TauArgus to run jobs with.
+        :param model: Model to predict run times. Observed run times are added to it.
+        :param workers: Number of TauArgus processes to run at the same time.
+        :param deadline: Number of seconds after which no job should be running.
+        """
+        if model is None:
+            model = RuntimeModel()
+
+        self.tau = tau
+        self.model = model
+        self.workers = workers
+        self.deadline = deadline
+
+    def order(self, jobs: Iterable[Job]) -> List[Tuple[Job, JobFeatures, float]]:
+        """Order jobs from the longest to the shortest predicted run time."""
+        predictions = []
+        for job in jobs:
+            features = JobFeatures.from_job(job)
+            predictions.append((job, features, self.model.predict(features)))
+        predictions.sort(key=lambda prediction: prediction[2], reverse=True)
+        return predictions
+
+    def run(self, jobs: Iterable[Job]) -> Iterator[ScheduledRun]:
+        """Run jobs that are set up.
+
+        :returns: A ScheduledRun for each job, in the order in which they finish.
+            Jobs that are skipped because of the deadline are yielded when they are skipped.
+        """
+        start = time.monotonic()
+        pending = deque(self.order(jobs))
+        running = {}
+        with ThreadPoolExecutor(self.workers) as executor:
+            while pending or running:
+                while pending and len(running) < self.workers:
+                    job, features, predicted = pending.popleft()
+                    scheduled = ScheduledRun(job, predicted)
+                    elapsed = time.monotonic() - start
+                    if self.deadline is not None and elapsed + predicted > self.deadline:
+                        yield scheduled
+                    else:
+                        running[executor.submit(self._run, job, features)] = scheduled
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    scheduled = running.pop(future)
+                    scheduled.report, scheduled.seconds = future.result()
+                    yield scheduled
+
+    def _run(self, job, features) -> Tuple[ArgusReport, float]:
+        start = time.perf_counter()
+        report = self.tau.run(job, check=False)
+        seconds = time.perf_counter() - start
+        if report.is_succesful:
+            self.model.record(features, seconds)
+        return report, seconds
+
+
+def _count_codes(input_data, col) -> Tuple[int, int]:
+    """Estimate the number of codes (including margins) and the depth of a variable."""
+    hierarchy = input_data.hierarchies.get(col)
+    if hasattr(hierarchy, "depth_counts"):
+        depth_counts = hierarchy.depth_counts
+        return sum(depth_counts.values()) + 1, max(depth_counts, default=0)
+
+    n_codes = int(input_data.dataset[col].nunique())
+    levels = getattr(hierarchy, "levels", None)
+    if levels:
+        return n_codes * len(levels) + 1, len(levels)
+    else:
+        return n_codes + 1, 1
+
+
+def _method_name(method) -> Optional[str]:
+    if method is None:
+        return None
+    return str(method).split("(")[0].strip().upper()
+
+
+def _method_cost(method) -> float:
+    return PRIOR_SECONDS_PER_CELL.get(_method_name(method), 1e-3)
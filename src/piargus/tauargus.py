@@ -1,19 +1,55 @@
+import functools
+import os
 import re
+import shutil
 import subprocess
 import tempfile
+import time
 from pathlib import Path
-from typing import Union, Sequence
+from typing import Union, Sequence, Optional, Callable, Any, Iterable, List, Tuple
 
+from .batchprogram import COMMAND_PATTERN, BatchProgram
 from .batchwriter import BatchWriter
-from .result import ArgusReport
+from .constants import GHMITER, MODULAR
+from .result import ArgusReport, ResourceUsage
+from .result.logbook import SUPPRESS_ARG_PATTERN, TIMESTAMP_PATTERN
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+DEFAULT_PACK_SIZE = 20
+RUN_DIRECTORY_PREFIX = "run_"
+RUN_LOGBOOK = "TauLogbook.txt"
+DEFAULT_FALLBACK = (MODULAR, GHMITER)
 
 
 class TauArgus:
     """Representation of the tau argus program that is run in the background."""
     DEFAULT_LOGBOOK = Path(tempfile.gettempdir()) / 'TauLogbook.txt'
 
-    def __init__(self, program: Union[str, Path] = 'TauArgus'):
+    def __init__(
+        self,
+        program: Union[str, Path] = 'TauArgus',
+        memory_limit: Optional[int] = None,
+        keep_workdir: bool = False,
+    ):
+        """
+        :param program: Path to the TauArgus executable.
+        :param memory_limit: Maximum memory in megabytes that a TauArgus process may use.
+            A process that needs more fails instead of pushing the host into swap.
+            Only supported on POSIX systems.
+        :param keep_workdir: Whether to keep the directory of every run after it finished,
+            which can help to debug TauArgus. By default, it's removed.
+        """
+        if memory_limit is not None and resource is None:
+            raise ValueError("memory_limit is only supported on POSIX systems.")
+
         self.program = str(program)
+        self.memory_limit = memory_limit
+        self.keep_workdir = keep_workdir
 
     def run(self, batch_or_job=None, check: bool = True, *args, **kwargs) -> ArgusReport:
         """Run either a batch file or a job."""
@@ -42,60 +78,331 @@ class TauArgus:
         subprocess_result = subprocess.run(cmd)
         return ArgusReport(subprocess_result.returncode, logbook_file=self.DEFAULT_LOGBOOK)
 
-    def _run_job(self, job):
-        return self._run_batch(job.batch_filepath, job.logbook_filepath, job.workdir)
+    def _run_job(self, job, progress=None, timeout=None, table_timeout=None):
+        return self._run_isolated(job.batch_filepath, job.logbook_filepath, job.workdir,
+                                  progress=progress, timeout=timeout, table_timeout=table_timeout)
 
-    def _run_batch(self, batch_file: Union[str, Path], logbook_file=None, workdir=None):
-        """Run a batchfile str or Path"""
-        cmd = [self.program, str(Path(batch_file).absolute())]
+    def _run_isolated(self, batch_file, logbook_file, workdir=None, **kwargs):
+        """Run a batch file in a new directory inside workdir.
 
-        if logbook_file is not None:
-            cmd.append(str(Path(logbook_file).absolute()))
-        if workdir is not None:
-            cmd.append(str(Path(workdir).absolute()))
+        Afterwards, the logbook of the run is appended to logbook_file.
+        """
+        run_directory = _make_run_directory(workdir)
+        try:
+            report = self._run_process(batch_file, run_directory / RUN_LOGBOOK, run_directory,
+                                       **kwargs)
+            self._finish_run(report, logbook_file)
+        finally:
+            self._remove_run_directory(run_directory)
 
-        subprocess_result = subprocess.run(cmd)
-        if logbook_file is None:
-            logbook_file = self.DEFAULT_LOGBOOK
-        return ArgusReport(
-            subprocess_result.returncode,
+        return report
+
+    def _finish_run(self, report, logbook_file):
+        """Append the logbook of a run to logbook_file and let the report refer to it.
+
+        The lines of the run are kept in the report, so they can still be read when the
+        run directory is gone or logbook_file is shared with other runs.
+        """
+        if report.read_log() is None:
+            # TauArgus didn't get as far as writing a logbook
+            report.logbook = []
+        _append_logbook(report.logbook_file, logbook_file)
+        report.logbook_file = str(logbook_file)
+        if not self.keep_workdir:
+            # The run directory will be removed
+            report.workdir = str(Path(report.workdir).parent)
+
+    def _remove_run_directory(self, run_directory):
+        if not self.keep_workdir:
+            shutil.rmtree(run_directory, ignore_errors=True)
+
+    def _run_batch(
+        self,
+        batch_file: Union[str, Path],
+        logbook_file=None,
+        workdir=None,
+        **kwargs,
+    ):
+        """Run a batchfile str or Path
+
+        If no logbook or workdir is given, the batch file runs in a new directory,
+        after which its logbook is appended to logbook_file (by default `DEFAULT_LOGBOOK`).
+        """
+        if logbook_file is None or workdir is None:
+            if logbook_file is None:
+                logbook_file = self.DEFAULT_LOGBOOK
+            return self._run_isolated(batch_file, logbook_file, workdir, **kwargs)
+
+        return self._run_process(batch_file, logbook_file, workdir, **kwargs)
+
+    def _run_process(
+        self,
+        batch_file: Union[str, Path],
+        logbook_file,
+        workdir,
+        progress: Optional[Callable[[str], Any]] = None,
+        timeout: Optional[float] = None,
+        table_timeout: Optional[float] = None,
+    ):
+        """Run TauArgus with the given logbook and workdir.
+
+        :param progress: Called with every line written to the logbook during the run.
+        :param timeout: Seconds after which TauArgus is killed.
+        :param table_timeout: Seconds that the suppression of a single table may take,
+            after which TauArgus is killed.
+        """
+        cmd = [self.program, str(Path(batch_file).absolute()),
+               str(Path(logbook_file).absolute()), str(Path(workdir).absolute())]
+
+        report = ArgusReport(
+            None,
             batch_file=batch_file,
             logbook_file=logbook_file,
             workdir=workdir,
         )
 
+        if progress is None and timeout is None and table_timeout is None:
+            process = self._start(cmd)
+            report.returncode = process.wait()
+        else:
+            # Start following before the process can write to the logbook
+            lines = report.follow(stop=lambda: monitor.should_stop())
+            process = self._start(cmd)
+            monitor = _RunMonitor(process, timeout, table_timeout)
+            try:
+                for line in lines:
+                    monitor.feed(line)
+                    if progress is not None:
+                        progress(line)
+            finally:
+                if process.poll() is None:
+                    process.kill()
+                report.returncode = process.wait()
+                report.timed_out = monitor.timed_out
+                report.timed_out_table = monitor.timed_out_table
+
+        report.resources = process.resources
+
+        return report
+
+    def run_with_fallback(
+        self,
+        job,
+        table_timeout: float,
+        fallback: Sequence[Union[str, Tuple[str, Sequence[Any]]]] = DEFAULT_FALLBACK,
+        timeout: Optional[float] = None,
+        check: bool = True,
+    ) -> ArgusReport:
+        """Run a job, switching to cheaper suppression methods for tables that take too long.
+
+        When the suppression of a table takes longer than `table_timeout`,
+        TauArgus is killed and the job is run again.
+        The table that was being suppressed then uses the next method of `fallback`.
+        Afterwards the job and its tables get back their original methods.
+
+        :param job: The job to run. It should be set up.
+        :param table_timeout: Seconds that the suppression of a single table may take.
+        :param fallback: Suppression methods to try in order, such as `[MODULAR, GHMITER]`.
+            A method can also be given as a tuple of method and arguments.
+        :param timeout: Seconds that a single attempt may take in total.
+        :param check: Whether to raise an exception if the job failed.
+        :returns: Report of the last attempt.
+            `report.suppress_methods` contains the method used for each table
+            and `report.fallbacks` contains the changes that were made.
+        """
+        fallback = [(method, ()) if isinstance(method, str) else (method[0], tuple(method[1]))
+                    for method in fallback]
+        tables = list(job.tables.items())
+        original_methods = [(table.suppress_method, table.suppress_method_args)
+                            for _, table in tables]
+        original_linked = job.linked_suppress_method, job.linked_suppress_method_args
+        fallbacks = []
+        try:
+            while True:
+                report = self._run_job(job, timeout=timeout, table_timeout=table_timeout)
+                index = report.timed_out_table
+                if index is None or index > len(tables):
+                    break
+
+                # Table 0 means linked suppression
+                if index == 0:
+                    current = job.linked_suppress_method
+                else:
+                    current = tables[index - 1][1].suppress_method
+
+                methods = [method for method, _ in fallback]
+                position = methods.index(current) + 1 if current in methods else 0
+                if position >= len(fallback):
+                    break
+
+                method, args = fallback[position]
+                if index == 0:
+                    job.linked_suppress_method = method
+                    job.linked_suppress_method_args = args
+                    fallbacks.append((None, current, method))
+                else:
+                    name, table = tables[index - 1]
+                    table.suppress_method = method
+                    table.suppress_method_args = args
+                    fallbacks.append((name, current, method))
+                job._setup_batch()
+
+            report.fallbacks = fallbacks
+            report.suppress_methods = {name: job.linked_suppress_method or table.suppress_method
+                                       for name, table in tables}
+        finally:
+            for (_, table), (method, args) in zip(tables, original_methods):
+                table.suppress_method = method
+                table.suppress_method_args = args
+            job.linked_suppress_method, job.linked_suppress_method_args = original_linked
+            if fallbacks:
+                job._setup_batch()
+
+        if check:
+            report.check()
+
+        return report
+
     def _run_parallel(self, jobs: Sequence, timeout=None):
-        """Run multiple jobs at the same time (experimental)"""
+        """Run multiple jobs at the same time (experimental)
+
+        :param timeout: Seconds after which jobs that are still running are killed.
+        """
         jobs = list(jobs)
         processes = []
+        run_directories = []
+        deadline = None if timeout is None else time.monotonic() + timeout
 
         try:
             for job in jobs:
+                run_directory = _make_run_directory(job.workdir)
+                run_directories.append(run_directory)
                 batch_file = str(job.batch_filepath.absolute())
-                log_file = str(job.logbook_filepath.absolute())
-                workdir = str(job.workdir.absolute())
+                log_file = str(run_directory / RUN_LOGBOOK)
+                workdir = str(run_directory)
                 cmd = [self.program, batch_file, log_file, workdir]
-                process = subprocess.Popen(cmd)
+                process = self._start(cmd)
                 processes.append((cmd, process))
 
             results = []
             for cmd, process in processes:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                try:
+                    returncode = process.wait(remaining)
+                    timed_out = False
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    returncode = process.wait()
+                    timed_out = True
+
                 result = ArgusReport(
-                    process.wait(timeout),
+                    returncode,
                     batch_file=Path(process.args[1]),
                     logbook_file=Path(process.args[2]),
                     workdir=Path(process.args[3]),
                 )
+                result.timed_out = timed_out
+                result.resources = process.resources
                 results.append(result)
-                if timeout is not None:
-                    timeout = 1
+
+            for job, result in zip(jobs, results):
+                self._finish_run(result, job.logbook_filepath)
         finally:
             for _, process in processes:
                 if process.poll() is None:
                     process.kill()
+                    process.wait()
+            for run_directory in run_directories:
+                self._remove_run_directory(run_directory)
 
         return results
 
+    def run_packed(
+        self,
+        jobs: Iterable,
+        pack_size: int = DEFAULT_PACK_SIZE,
+        check: bool = True,
+    ) -> List[ArgusReport]:
+        """Run many small jobs while starting TauArgus only once for every pack of jobs.
+
+        The batch files of up to `pack_size` jobs are combined into a single batch file,
+        separated by CLEAR.
+        Each job keeps its own logbook and output files,
+        so a separate report is returned for each job.
+        The resources of these reports are not known,
+        because the jobs of a pack share a single process.
+
+        If TauArgus fails, the jobs of which all output tables were written are still
+        considered successful.
+
+        :param jobs: Jobs to run. They should be set up and not be interactive.
+        :param pack_size: Maximum number of jobs to run by a single TauArgus process.
+        :param check: Whether to raise an exception if one of the jobs failed.
+        :returns: A report for each job in the same order as jobs.
+        """
+        if pack_size < 1:
+            raise ValueError("pack_size should be positive")
+
+        jobs = list(jobs)
+        reports = []
+        for start in range(0, len(jobs), pack_size):
+            reports.extend(self._run_pack(jobs[start:start + pack_size]))
+
+        if check:
+            for report in reports:
+                report.check()
+
+        return reports
+
+    def _run_pack(self, jobs: Sequence) -> List[ArgusReport]:
+        for job in jobs:
+            if job.interactive:
+                raise ValueError(f"Interactive job {job} can't be packed.")
+
+        # Every job of the pack writes to its own logbook in the run directory
+        run_directory = _make_run_directory(jobs[0].workdir)
+        logbook_files = [run_directory / f"job{i}_{RUN_LOGBOOK}" for i in range(len(jobs))]
+        try:
+            programs = []
+            for job, logbook_file in zip(jobs, logbook_files):
+                writer = BatchWriter()
+                writer.logbook(logbook_file)
+                programs.append(writer.program + BatchProgram.from_arb(job.batch_filepath))
+
+            pack_file = run_directory / "pack.arb"
+            BatchProgram.join(programs).to_arb(pack_file)
+
+            # Make sure that the reports only contain the output of this run
+            for job in jobs:
+                for table in job.tables.values():
+                    Path(table.filepath_out).unlink(missing_ok=True)
+
+            pack_report = self._run_process(pack_file, run_directory / RUN_LOGBOOK,
+                                            run_directory)
+
+            reports = []
+            for job, logbook_file in zip(jobs, logbook_files):
+                if pack_report.is_succesful or _has_written_tables(job):
+                    returncode = 0
+                else:
+                    returncode = pack_report.returncode
+
+                report = ArgusReport(
+                    returncode,
+                    batch_file=job.batch_filepath,
+                    logbook_file=logbook_file,
+                    workdir=run_directory,
+                )
+                self._finish_run(report, job.logbook_filepath)
+                reports.append(report)
+        finally:
+            self._remove_run_directory(run_directory)
+
+        return reports
+
+    def _start(self, cmd) -> "_TauArgusProcess":
+        return _TauArgusProcess(cmd, self.memory_limit)
+
     def version_info(self) -> dict:
         with tempfile.NamedTemporaryFile(mode='w', delete=False) as versioninfo:
             pass
@@ -119,3 +426,160 @@ class TauArgus:
         finally:
             Path(batch_file.name).unlink()
             Path(versioninfo.name).unlink()
+
+
+class _TauArgusProcess:
+    """Running TauArgus process that keeps track of the resources it uses.
+
+    On POSIX systems the process is reaped with `os.wait4`,
+    which returns its cpu time and maximum memory use.
+    Elsewhere only the wall time is known.
+    """
+    def __init__(self, cmd, memory_limit=None):
+        limits = None
+        preexec_fn = None
+        if memory_limit is not None:
+            limits = (memory_limit * 2 ** 20, memory_limit * 2 ** 20)
+            if not hasattr(resource, "prlimit"):
+                # Runs in the child between fork and exec, so it shouldn't import or allocate
+                preexec_fn = functools.partial(resource.setrlimit, resource.RLIMIT_AS, limits)
+
+        self.start = time.monotonic()
+        self.process = subprocess.Popen(cmd, preexec_fn=preexec_fn)
+        self.args = self.process.args
+        self.resources = None
+
+        if limits is not None and preexec_fn is None:
+            _limit_memory(self.process, limits)
+
+    def poll(self) -> Optional[int]:
+        """Return the returncode if the process has finished, otherwise None."""
+        if self.process.returncode is None:
+            if hasattr(os, "wait4"):
+                self._wait4(os.WNOHANG)
+            elif self.process.poll() is not None:
+                self.resources = ResourceUsage(time.monotonic() - self.start)
+
+        return self.process.returncode
+
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """Wait for the process to finish and return its returncode.
+
+        :raises subprocess.TimeoutExpired: If the process didn't finish within timeout.
+        """
+        if not hasattr(os, "wait4"):
+            returncode = self.process.wait(timeout)
+            if self.resources is None:
+                self.resources = ResourceUsage(time.monotonic() - self.start)
+            return returncode
+
+        if timeout is None:
+            while self.process.returncode is None:
+                self._wait4(0)
+        else:
+            deadline = time.monotonic() + timeout
+            while self.poll() is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(self.args, timeout)
+                time.sleep(min(remaining, 0.05))
+
+        return self.process.returncode
+
+    def kill(self):
+        self.process.kill()
+
+    def _wait4(self, options):
+        try:
+            pid, status, rusage = os.wait4(self.process.pid, options)
+        except ChildProcessError:
+            # Already reaped by someone else, so the resources are unknown
+            self.process.wait()
+            self.resources = ResourceUsage(time.monotonic() - self.start)
+            return
+
+        if pid:
+            self.process.returncode = os.waitstatus_to_exitcode(status)
+            self.resources = ResourceUsage.from_rusage(rusage, time.monotonic() - self.start)
+
+
+def _limit_memory(process, limits: Tuple[int, int]):
+    """Limit the address space of a process that was just started."""
+    try:
+        resource.prlimit(process.pid, resource.RLIMIT_AS, limits)
+    except ProcessLookupError:
+        # Already finished
+        pass
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+
+
+class _RunMonitor:
+    """Keep track of a running TauArgus process and kill it when it takes too long."""
+    def __init__(self, process, timeout=None, table_timeout=None):
+        self.process = process
+        self.timeout = timeout
+        self.table_timeout = table_timeout
+        self.start = time.monotonic()
+        self.table = None
+        self.suppress_start = None
+        self.timed_out = False
+        self.timed_out_table = None
+
+    def feed(self, line: str):
+        """Track which table is being suppressed from a line of the logbook."""
+        match = TIMESTAMP_PATTERN.match(line)
+        command = COMMAND_PATTERN.match(match["message"] if match else line.strip())
+        if command:
+            suppress = SUPPRESS_ARG_PATTERN.match(command["arg"])
+            if command["command"].upper() == "SUPPRESS" and suppress:
+                self.table = int(suppress["table"])
+                self.suppress_start = time.monotonic()
+            else:
+                self.table = None
+
+    def should_stop(self) -> bool:
+        """Whether the process has finished. Kills the process if it takes too long."""
+        if self.process.poll() is not None:
+            return True
+
+        now = time.monotonic()
+        table_expired = (self.table_timeout is not None and self.table is not None
+                         and now - self.suppress_start > self.table_timeout)
+        run_expired = self.timeout is not None and now - self.start > self.timeout
+        if table_expired or run_expired:
+            self.timed_out = True
+            self.timed_out_table = self.table
+            self.process.kill()
+
+        return False
+
+
+def _make_run_directory(parent=None) -> Path:
+    """Create a new directory for a single run.
+
+    The directory is created atomically with a unique name,
+    so runs in other threads or processes never share it.
+    """
+    if parent is not None:
+        Path(parent).mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix=RUN_DIRECTORY_PREFIX, dir=parent)).absolute()
+
+
+def _append_logbook(source, target):
+    """Copy the logbook of a run to the end of a shared logbook in a single write."""
+    try:
+        with open(source) as reader:
+            text = reader.read()
+    except FileNotFoundError:
+        return
+
+    with open(target, 'a') as writer:
+        writer.write(text)
+
+
+def _has_written_tables(job) -> bool:
+    """Whether all output tables of job exist."""
+    return all(Path(table.filepath_out).exists() for table in job.tables.values())
@@ -0,0 +1,250 @@
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .result import ArgusReport
+
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+
+# Seconds between updates of the time of a claim while its job is running
+DEFAULT_HEARTBEAT_INTERVAL = 60.0
+
+
+class WorkQueue:
+    """
+    Queue of jobs in a shared directory, so they can be run by workers on several hosts.
+
+    A coordinator submits jobs that are set up and waits for their reports.
+    Workers on any host that can access the directory claim jobs one by one and run them.
+    A job is claimed by moving its ticket from `pending` to `claimed`,
+    which is atomic, so every job is run by exactly one worker.
+    While the job is running, the worker regularly touches the claimed ticket,
+    so claims that are no longer updated can be recognized as stale.
+    When a job has run, the worker writes its report to `done`,
+    unless its claim was requeued and the job was claimed by another worker in the meantime.
+
+    The directories of the jobs and their input files should be on the shared filesystem as well.
+    """
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory).absolute()
+        for state in [PENDING, CLAIMED, DONE]:
+            (self.directory / state).mkdir(parents=True, exist_ok=True)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({str(self.directory)!r})"
+
+    def submit(self, job) -> str:
+        """Add a job that is set up to the queue.
+
+        :returns: Name of the ticket, which identifies the job in the queue.
+        """
+        name = f"{time.time_ns():020d}_{job.name}_{uuid.uuid4().hex[:8]}"
+        ticket = {
+            "name": name,
+            "job": job.name,
+            "batch_file": str(job.batch_filepath),
+            "logbook_file": str(job.logbook_filepath),
+            "workdir": str(job.workdir),
+            "outputs": [str(table.filepath_out) for table in job.tables.values()],
+            "submitted": time.time(),
+        }
+        self._write(PENDING, ticket)
+        return name
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """Claim the oldest pending job.
+
+        :returns: The ticket of the job or None if no job is pending.
+        """
+        for filepath in sorted((self.directory / PENDING).glob("*.json")):
+            claimed = self.directory / CLAIMED / filepath.name
+            try:
+                os.rename(filepath, claimed)
+            except OSError:
+                # Another worker was first. Depending on the filesystem,
+                # this can also show up as a PermissionError.
+                continue
+
+            # Mark the time of claiming, which is used to detect stale claims
+            os.utime(claimed)
+            with open(claimed) as reader:
+                ticket = json.load(reader)
+
+            # A token identifies this claim, in case the job is requeued and claimed again
+            ticket["claim"] = uuid.uuid4().hex
+            self._write(CLAIMED, ticket)
+            return ticket
+
+        return None
+
+    def complete(self, ticket: Dict[str, Any], report: ArgusReport, **extra) -> bool:
+        """Store the report of a claimed job.
+
+        :returns: Whether the report was stored.
+            It isn't if the claim was requeued in the meantime,
+            because then the job belongs to whichever worker claims it next.
+        """
+        claimed = self.directory / CLAIMED / f"{ticket['name']}.json"
+        try:
+            with open(claimed) as reader:
+                current = json.load(reader)
+        except FileNotFoundError:
+            return False
+        if current.get("claim") != ticket.get("claim"):
+            return False
+
+        done = {**ticket, **extra, "report": report.to_dict(), "worker": _worker_id(),
+                "finished": time.time()}
+        self._write(DONE, done)
+        claimed.unlink(missing_ok=True)
+        return True
+
+    def requeue(self, max_age: float) -> List[str]:
+        """Return claimed jobs to the queue if their claim wasn't updated for max_age seconds.
+
+        This can be used to recover jobs of workers that crashed.
+        Workers update their claim every heartbeat interval while the job is running,
+        so max_age should be several times that interval.
+
+        :returns: Names of the tickets that were returned.
+        """
+        names = []
+        now = time.time()
+        for filepath in (self.directory / CLAIMED).glob("*.json"):
+            try:
+                if now - filepath.stat().st_mtime > max_age:
+                    os.rename(filepath, self.directory / PENDING / filepath.name)
+                    names.append(filepath.stem)
+            except FileNotFoundError:
+                continue
+
+        return names
+
+    def counts(self) -> Dict[str, int]:
+        """Number of tickets that are pending, claimed and done."""
+        return {state: sum(1 for _ in (self.directory / state).glob("*.json"))
+                for state in [PENDING, CLAIMED, DONE]}
+
+    def work(
+        self,
+        tau,
+        wait: bool = False,
+        poll_interval: float = 1.0,
+        max_jobs: Optional[int] = None,
+        heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+    ) -> int:
+        """Claim and run jobs. This is what a worker does.
+
+        :param tau: The TauArgus to run jobs with.
+        :param wait: Whether to wait for new jobs when the queue is empty instead of returning.
+        :param poll_interval: Seconds to wait before checking the queue again.
+        :param max_jobs: Maximum number of jobs to run.
+        :param heartbeat_interval: Seconds between updates of the claim while a job is running.
+        :returns: Number of jobs that were run.
+        """
+        n_jobs = 0
+        while max_jobs is None or n_jobs < max_jobs:
+            ticket = self.claim()
+            if ticket is None:
+                if not wait:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            claimed = self.directory / CLAIMED / f"{ticket['name']}.json"
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=_heartbeat,
+                                         args=(claimed, heartbeat_interval, stop), daemon=True)
+            heartbeat.start()
+            try:
+                report = tau._run_isolated(ticket["batch_file"], ticket["logbook_file"],
+                                           ticket["workdir"])
+            except Exception as err:
+                report = ArgusReport(None, batch_file=ticket["batch_file"])
+                report.error = repr(err)
+            finally:
+                stop.set()
+                heartbeat.join()
+
+            self.complete(ticket, report)
+            n_jobs += 1
+
+        return n_jobs
+
+    def collect(
+        self,
+        names: Iterable[str],
+        timeout: Optional[float] = None,
+        poll_interval: float = 0.5,
+    ) -> Iterator[Tuple[str, ArgusReport]]:
+        """Wait for submitted jobs to finish.
+
+        :param names: Names of the tickets returned by `submit`.
+        :param timeout: Seconds to wait for all jobs.
+        :param poll_interval: Seconds to wait before checking the queue again.
+        :returns: The name of the ticket and the report of each job, in the order they finish.
+            If the worker couldn't run a job, the reason is in `report.error`.
+        :raises TimeoutError: If not all jobs finished within timeout.
+        """
+        remaining = set(names)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while remaining:
+            for name in sorted(remaining):
+                done = self.directory / DONE / f"{name}.json"
+                try:
+                    with open(done) as reader:
+                        entry = json.load(reader)
+                except FileNotFoundError:
+                    continue
+
+                remaining.discard(name)
+                yield name, ArgusReport.from_dict(entry["report"])
+
+            if remaining:
+                if deadline is not None and time.monotonic() > deadline:
+                    raise TimeoutError(f"{len(remaining)} jobs didn't finish in time.")
+                time.sleep(poll_interval)
+
+    def run(
+        self,
+        jobs: Iterable,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Tuple[Any, ArgusReport]]:
+        """Submit jobs and wait for their reports. This is what a coordinator does.
+
+        :param jobs: Jobs that are set up.
+        :param timeout: Seconds to wait for all jobs.
+        :returns: Each job and its report, in the order in which they finish.
+        """
+        submitted = {self.submit(job): job for job in jobs}
+        for name, report in self.collect(submitted, timeout=timeout):
+            yield submitted[name], report
+
+    def _write(self, state, ticket):
+        """Write a ticket atomically, so it's never read partially."""
+        filepath = self.directory / state / f"{ticket['name']}.json"
+        tmp_file = self.directory / state / f".{ticket['name']}.tmp"
+        with open(tmp_file, 'w') as writer:
+            json.dump(ticket, writer, indent=2)
+        os.replace(tmp_file, filepath)
+
+
+def _heartbeat(filepath, interval, stop):
+    """Touch filepath every interval seconds until stop is set."""
+    while not stop.wait(interval):
+        try:
+            os.utime(filepath)
+        except OSError:
+            # The claim may have been requeued or the share may be briefly unavailable
+            pass
+
+
+def _worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
@@ -0,0 +1,121 @@
+"""
+Stand-in for TauArgus that can be used to test runners without TauArgus installed.
+
+It accepts the same command line as TauArgus (batch file, logbook, workdir).
+It logs every command and writes unprotected tables for each WRITETABLE.
+The following environment variables change its behaviour:
+
+- PIARGUS_STUB_SLEEP: Seconds to sleep before starting.
+- PIARGUS_STUB_EXIT: Exit code to return.
+- PIARGUS_STUB_HANG: Comma-separated suppress methods on which to hang.
+- PIARGUS_STUB_ALLOCATE: Megabytes of memory to allocate.
+"""
+import csv
+import os
+import re
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+COMMAND_PATTERN = re.compile(r"^<(?P<command>[A-Z]+)>\t?(?P<arg>.*)$")
+QUOTED_PATTERN = re.compile(r'"([^"]*)"')
+
+
+def make_stub_tauargus(directory) -> Path:
+    """Write an executable copy of this stub to directory."""
+    program = Path(directory) / "stubtauargus"
+    source = Path(__file__).read_text()
+    program.write_text(f"#!{sys.executable}\n{source}")
+    program.chmod(program.stat().st_mode | stat.S_IEXEC)
+    return program
+
+
+def main(batch_file, logbook_file=None, workdir=None):
+    if logbook_file is None:
+        logbook_file = Path(tempfile.gettempdir()) / "TauLogbook.txt"
+
+    time.sleep(float(os.environ.get("PIARGUS_STUB_SLEEP", 0)))
+    hang = set(filter(None, os.environ.get("PIARGUS_STUB_HANG", "").split(",")))
+    allocated = bytearray(int(os.environ.get("PIARGUS_STUB_ALLOCATE", 0)) * 1024 * 1024)
+    allocated[::4096] = b"x" * len(allocated[::4096])
+
+    logbook = open(logbook_file, "a")
+    log(logbook, None)
+    log(logbook, f"Start of batch procedure; file: {batch_file}")
+    state = {"tables": []}
+
+    with open(batch_file) as reader:
+        for line in reader:
+            match = COMMAND_PATTERN.match(line.strip())
+            if not match:
+                continue
+            command, arg = match["command"], match["arg"].strip()
+            if command == "LOGBOOK":
+                logbook.close()
+                logbook = open(QUOTED_PATTERN.search(arg)[1], "a")
+                log(logbook, None)
+            log(logbook, f"<{command}> {arg}")
+
+            if command in {"OPENMICRODATA", "OPENTABLEDATA"}:
+                state["data"] = QUOTED_PATTERN.search(arg)[1]
+            elif command == "OPENMETADATA":
+                state["metadata"] = QUOTED_PATTERN.search(arg)[1]
+            elif command == "SPECIFYTABLE":
+                explanatory, response, *_ = arg.split("|")
+                response = QUOTED_PATTERN.findall(response)
+                state["tables"].append((QUOTED_PATTERN.findall(explanatory), response[0]))
+            elif command == "SUPPRESS":
+                if arg.split("(")[0] in hang:
+                    time.sleep(3600)
+                log(logbook, "0 cells suppressed")
+            elif command == "WRITETABLE":
+                table, _, _, filename = [part.strip() for part in arg.strip("()").split(",")]
+                write_table(state, int(table), filename.strip('"'))
+            elif command == "CLEAR":
+                state = {"tables": []}
+
+    log(logbook, "End of TauArgus run")
+    logbook.close()
+    sys.exit(int(os.environ.get("PIARGUS_STUB_EXIT", 0)))
+
+
+def log(logbook, message):
+    if message is None:
+        logbook.write("--------------------\n")
+    else:
+        # Same format as TauArgus
+        logbook.write(f"{time.strftime('%d-%b-%Y %H:%M:%S')} : {message}\n")
+    logbook.flush()
+
+
+def write_table(state, table, filename):
+    explanatory, response = state["tables"][table - 1]
+    with open(state["metadata"]) as reader:
+        columns = [line.split()[0] for line in reader if line.strip() and not line[0].isspace()]
+
+    cells = {}
+    with open(state["data"], newline="") as reader:
+        for row in csv.reader(reader):
+            record = dict(zip(columns, row))
+            key = tuple(record[col] for col in explanatory)
+            freq, total = cells.get(key, (0, 0.0))
+            value = float(record[response]) if response != "<freq>" else 0.0
+            cells[key] = freq + 1, total + value
+
+    with open(filename, "w", newline="") as writer:
+        csv_writer = csv.writer(writer)
+        header = [*explanatory, "Freq"]
+        if response != "<freq>":
+            header.append(response)
+        csv_writer.writerow([*header, "Status"])
+        for key, (freq, total) in cells.items():
+            row = [*key, freq]
+            if response != "<freq>":
+                row.append(total)
+            csv_writer.writerow([*row, 1])
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,68 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase
+
+from piargus import ArgusReport
+from piargus.result.argusreport import _read_last_run
+
+LOGBOOK = [
+    "--------------------\n",
+    "10:00:00 : Start of batch procedure; file: first.arb\n",
+    "10:00:01 : End of TauArgus run\n",
+    "--------------------\n",
+    "11:00:00 : Start of batch procedure; file: second.arb\n",
+    "11:00:01 : <OPENMICRODATA> \"microdata.csv\"\n",
+    "11:00:02 : End of TauArgus run\n",
+]
+
+
+class TestArgusReport(TestCase):
+    def setUp(self):
+        self._tmp_directory = tempfile.TemporaryDirectory()
+        self.logbook_file = Path(self._tmp_directory.name) / "logbook.txt"
+
+    def tearDown(self):
+        self._tmp_directory.cleanup()
+
+    def test_read_log(self):
+        self.logbook_file.write_text("".join(LOGBOOK))
+        report = ArgusReport(0, logbook_file=self.logbook_file)
+        self.assertEqual(LOGBOOK[4:], report.read_log())
+
+    def test_read_log_small_chunks(self):
+        self.logbook_file.write_text(1000 * "".join(LOGBOOK))
+        for chunk_size in [1, 7, 20, 4096]:
+            with self.subTest(chunk_size=chunk_size):
+                result = _read_last_run(self.logbook_file, chunk_size=chunk_size)
+                self.assertEqual(LOGBOOK[4:], result)
+
+    def test_read_log_without_separator(self):
+        self.logbook_file.write_text("".join(LOGBOOK[4:6]))
+        report = ArgusReport(0, logbook_file=self.logbook_file)
+        self.assertEqual(LOGBOOK[4:6], report.read_log())
+
+    def test_read_log_missing(self):
+        report = ArgusReport(0, logbook_file=self.logbook_file)
+        self.assertIsNone(report.read_log())
+
+    def test_follow(self):
+        self.logbook_file.write_text("".join(LOGBOOK[:4]))
+        report = ArgusReport(0, logbook_file=self.logbook_file)
+        finished = threading.Event()
+
+        def write_log():
+            with open(self.logbook_file, 'a') as writer:
+                for line in LOGBOOK[4:]:
+                    writer.write(line)
+                    writer.flush()
+                    time.sleep(0.01)
+            finished.set()
+
+        lines = report.follow(stop=finished.is_set, poll_interval=0.005)
+        thread = threading.Thread(target=write_log)
+        thread.start()
+        result = list(lines)
+        thread.join()
+        self.assertEqual(LOGBOOK[4:], result)
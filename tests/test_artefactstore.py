@@ -0,0 +1,58 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import pandas as pd
+
+from piargus import ArtefactStore, Job, MicroData, Table, TreeHierarchy
+
+
+class TestArtefactStore(TestCase):
+    def setUp(self):
+        self._tmp_directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp_directory.name)
+
+    def tearDown(self):
+        self._tmp_directory.cleanup()
+
+    def make_microdata(self):
+        dataset = pd.DataFrame({
+            "regio": ["Rotterdam", "Den Haag", "Haarlem", "Rotterdam"],
+            "symbol": ["a", "b", "a", "b"],
+            "income": [10, 20, 30, 40],
+        })
+        hierarchy = TreeHierarchy({
+            "Zuid-Holland": ["Rotterdam", "Den Haag"],
+            "Noord-Holland": ["Haarlem"]})
+        return MicroData(dataset, hierarchies={"regio": hierarchy})
+
+    def test_shared_inputs(self):
+        store = ArtefactStore(self.directory / "store")
+        jobs = [
+            Job(self.make_microdata(), [Table(explanatory, "income")],
+                directory=self.directory / f"job{i}", name=f"job{i}", store=store)
+            for i, explanatory in enumerate([["regio"], ["symbol"], ["regio", "symbol"]])
+        ]
+
+        stored = sorted(path.name.split("_")[0] for path in store.directory.iterdir())
+        self.assertEqual(["hierarchy", "metadata", "microdata"], stored)
+        for job in jobs:
+            self.assertEqual(store.directory, job.input_data.filepath.parent)
+            self.assertEqual(store.directory, job.metadata.filepath.parent)
+            self.assertEqual([], list((job.directory / "input").iterdir()))
+
+    def test_save(self):
+        store = ArtefactStore(self.directory)
+        hierarchy1 = TreeHierarchy(["a", "b"])
+        hierarchy2 = TreeHierarchy(["a", "b"])
+        hierarchy3 = TreeHierarchy(["a", "c"])
+
+        path1 = store.save(hierarchy1, hierarchy1.to_hrc, "hierarchy", ".hrc")
+        path2 = store.save(hierarchy2, hierarchy2.to_hrc, "hierarchy", ".hrc")
+        path3 = store.save(hierarchy3, hierarchy3.to_hrc, "hierarchy", ".hrc")
+
+        self.assertEqual(path1, path2)
+        self.assertNotEqual(path1, path3)
+        self.assertEqual(path2, hierarchy2.filepath)
+        self.assertEqual("a\nb\n", path1.read_text())
+        self.assertEqual(2, len(list(self.directory.iterdir())))
@@ -0,0 +1,84 @@
+import io
+from unittest import TestCase
+
+from piargus import BatchCommand, BatchProgram, BatchWriter
+
+BATCH = (
+    '<OPENMICRODATA>\t"microdata.csv"\n'
+    '<OPENMETADATA>\t"metadata.rda"\n'
+    '<SPECIFYTABLE>\t"sbi"|"income"||\n'
+    '<SAFETYRULE>\tP(10, 1)\n'
+    '<SPECIFYTABLE>\t"regio"|"income"||\n'
+    '<SAFETYRULE>\tNK(3, 70)\n'
+    '<READMICRODATA>\n'
+    '<APRIORI>\t"a, b.hst", 2, ",", 0, 1\n'
+    '<RECODE>\t2, "regio", 1\n'
+    '<SUPPRESS>\tOPT(1)\n'
+    '<SUPPRESS>\tMOD(2,5)\n'
+    '<SUPPRESS>\tGH(0)\n'
+    '<WRITETABLE>\t(1, 2, AS+, "table1.csv")\n'
+    '<WRITETABLE>\t(2, 2, AS+, "table2.csv")\n'
+)
+
+
+class TestBatchProgram(TestCase):
+    def test_round_trip(self):
+        program = BatchProgram.from_arb(io.StringIO("// comment\n\n" + BATCH))
+        self.assertEqual(14, len(program))
+        self.assertEqual(BatchCommand("READMICRODATA"), program[6])
+        self.assertEqual(BATCH, program.to_arb())
+
+    def test_writer(self):
+        writer = BatchWriter()
+        writer.open_microdata("microdata.csv")
+        writer.read_microdata()
+        expected = BatchProgram([
+            ("OPENMICRODATA", '"microdata.csv"'),
+            ("READMICRODATA", None),
+        ])
+        self.assertEqual(expected, writer.program)
+
+    def test_writer_round_trip(self):
+        writer = BatchWriter()
+        writer.open_tabledata("tabledata.csv")
+        writer.read_table(compute_totals=True)
+        program = BatchProgram.from_arb(io.StringIO(writer.program.to_arb()))
+        self.assertEqual(writer.program, program)
+
+    def test_table(self):
+        program = BatchProgram.from_arb(io.StringIO(BATCH))
+        tables = [command.table for command in program]
+        self.assertEqual([None] * 7 + [2, 2, 1, 2, 0, 1, 2], tables)
+        self.assertEqual('"a, b.hst", 7, ",", 0, 1', program[7].with_table(7).arg)
+        self.assertEqual('MOD(7,5)', program[10].with_table(7).arg)
+
+        with self.assertRaisesRegex(ValueError, "SUPPRESS"):
+            BatchCommand.parse("<SUPPRESS> MOD").table
+        with self.assertRaisesRegex(ValueError, "WRITETABLE"):
+            BatchCommand.parse("<WRITETABLE> (AS+)").table
+
+    def test_join_split(self):
+        program1 = BatchProgram.from_arb(io.StringIO(BATCH))
+        program2 = program1[:3]
+        joined = BatchProgram.join([program1, program2])
+        self.assertEqual(BatchCommand("CLEAR"), joined[-1])
+        self.assertEqual([program1, program2], joined.split())
+        self.assertEqual(program1.digest(), joined.split()[0].digest())
+        self.assertNotEqual(program1.digest(), program2.digest())
+
+    def test_select_tables(self):
+        program = BatchProgram.from_arb(io.StringIO(BATCH))
+        result = program.select_tables([2])
+        expected = (
+            '<OPENMICRODATA>\t"microdata.csv"\n'
+            '<OPENMETADATA>\t"metadata.rda"\n'
+            '<SPECIFYTABLE>\t"regio"|"income"||\n'
+            '<SAFETYRULE>\tNK(3, 70)\n'
+            '<READMICRODATA>\n'
+            '<APRIORI>\t"a, b.hst", 1, ",", 0, 1\n'
+            '<RECODE>\t1, "regio", 1\n'
+            '<SUPPRESS>\tMOD(1,5)\n'
+            '<SUPPRESS>\tGH(0)\n'
+            '<WRITETABLE>\t(1, 2, AS+, "table2.csv")\n'
+        )
+        self.assertEqual(expected, result.to_arb())
@@ -0,0 +1,150 @@
+import io
+import os
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import TestCase, skipIf
+
+import pandas as pd
+
+from piargus import MicroData
+from piargus.cli import Manifest, ManifestError, main, run_manifest
+from tests.stubtauargus import make_stub_tauargus
+
+MANIFEST = """
+directory = "out"
+workers = 2
+
+[inputs.companies]
+microdata = "microdata.csv"
+hierarchies = {{ regio = [1, 1] }}
+
+[[jobs]]
+name = "income"
+input = "companies"
+
+[[jobs.tables]]
+name = "by_regio"
+explanatory = ["regio"]
+response = "income"
+safety_rule = "NK(3, 70)"
+
+[[jobs]]
+name = "symbol"
+input = "companies"
+
+[[jobs.tables]]
+explanatory = ["symbol"]
+response = "{response}"
+"""
+
+
+@skipIf(os.name == 'nt', "Stub TauArgus requires a POSIX shell")
+class TestCli(TestCase):
+    def setUp(self):
+        self._tmp_directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp_directory.name)
+        self.program = str(make_stub_tauargus(self.directory))
+        pd.DataFrame({
+            "regio": ["A1", "B1", "A2", "B2", "A1"],
+            "symbol": ["x", "x", "y", "y", "y"],
+            "income": [10, 20, 30, 40, 50],
+        }).to_csv(self.directory / "microdata.csv", index=False)
+        self.write_manifest()
+
+    def tearDown(self):
+        self._tmp_directory.cleanup()
+
+    def write_manifest(self, response="income"):
+        self.manifest_file = self.directory / "manifest.toml"
+        self.manifest_file.write_text(MANIFEST.format(response=response))
+
+    def run_manifest(self, **kwargs):
+        out = io.StringIO()
+        manifest = Manifest.from_toml(self.manifest_file)
+        return run_manifest(manifest, program=self.program, out=out, **kwargs)
+
+    def test_create_job(self):
+        manifest = Manifest.from_toml(self.manifest_file)
+        self.assertEqual(["income", "symbol"], manifest.job_names)
+        self.assertEqual(self.directory / "out", manifest.directory)
+
+        job = manifest.create_job("income")
+        self.assertEqual(["by_regio"], list(job.tables))
+        self.assertEqual([1, 1], job.input_data.hierarchies["regio"].levels)
+
+        # Input data is shared between jobs
+        self.assertIs(job.input_data, manifest.create_job("symbol").input_data)
+
+    def test_metadata(self):
+        microdata = MicroData(pd.read_csv(self.directory / "microdata.csv"))
+        microdata.generate_metadata().to_rda(self.directory / "metadata.rda")
+        self.manifest_file.write_text(MANIFEST.format(response="income").replace(
+            'microdata = "microdata.csv"\n',
+            'microdata = "microdata.csv"\nmetadata = "metadata.rda"\n'))
+
+        manifest = Manifest.from_toml(self.manifest_file)
+        job = manifest.create_job("income")
+        self.assertEqual(self.directory / "metadata.rda", Path(job.metadata.filepath))
+
+        job.setup()
+        self.assertIn(str(self.directory / "metadata.rda"), job.batch_filepath.read_text())
+
+    def test_invalid(self):
+        with self.assertRaises(ManifestError):
+            Manifest({"jobs": [{"input": "missing"}]})
+
+        with self.assertRaises(ManifestError):
+            Manifest({"inputs": {"a": {}}, "jobs": [{"input": "a", "name": "x"},
+                                                    {"input": "a", "name": "x"}]})
+
+    def test_run(self):
+        statuses = self.run_manifest()
+        self.assertEqual({"income": "success", "symbol": "success"}, statuses)
+        self.assertTrue((self.directory / "out" / "output" / "income_by_regio.csv").exists())
+
+        # Unchanged jobs are skipped
+        statuses = self.run_manifest()
+        self.assertEqual({"income": "skipped", "symbol": "skipped"}, statuses)
+
+        # Changed jobs are run again
+        self.write_manifest(response="<freq>")
+        statuses = self.run_manifest()
+        self.assertEqual({"income": "skipped", "symbol": "success"}, statuses)
+
+        # Unless forced
+        statuses = self.run_manifest(force=True)
+        self.assertEqual({"income": "success", "symbol": "success"}, statuses)
+
+    def test_run_name_is_not_slug(self):
+        self.manifest_file.write_text(MANIFEST.format(response="income").replace(
+            'name = "income"', 'name = "Income 2024"'))
+        statuses = self.run_manifest()
+        self.assertEqual({"Income 2024": "success", "symbol": "success"}, statuses)
+
+        statuses = self.run_manifest()
+        self.assertEqual({"Income 2024": "skipped", "symbol": "skipped"}, statuses)
+
+    def test_rerun_after_input_change(self):
+        self.run_manifest()
+        data_file = self.directory / "microdata.csv"
+        stat = data_file.stat()
+        os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        statuses = self.run_manifest()
+        self.assertEqual({"income": "success", "symbol": "success"}, statuses)
+
+    def test_failure(self):
+        self.write_manifest(response="unknown")
+        statuses = self.run_manifest()
+        self.assertEqual("failed", statuses["symbol"])
+
+        # Failed jobs are not cached
+        statuses = self.run_manifest()
+        self.assertEqual("skipped", statuses["income"])
+        self.assertEqual("failed", statuses["symbol"])
+
+    def test_main(self):
+        with redirect_stdout(io.StringIO()):
+            returncode = main(["run", str(self.manifest_file), "--program", self.program])
+        self.assertEqual(0, returncode)
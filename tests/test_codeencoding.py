@@ -0,0 +1,174 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase, skipIf
+
+import pandas as pd
+
+from piargus import (Apriori, Job, LevelHierarchy, MicroData, Table, TauArgus, TreeHierarchy,
+                     TreeRecode)
+from piargus.inputspec.codeencoding import CodeEncoding
+from tests.stubtauargus import make_stub_tauargus
+
+PRODUCTS = ["Apple pie with whipped cream", "Banana bread with walnuts", "Carrot cake"]
+
+
+def make_microdata():
+    dataset = pd.DataFrame({
+        "product": [PRODUCTS[0], PRODUCTS[1], PRODUCTS[2], PRODUCTS[0], None],
+        "sbi": ["11", "12", "21", "11", "12"],
+        "income": [10, 20, 30, 40, 50],
+    })
+    hierarchy = TreeHierarchy({"Pies and cakes": [PRODUCTS[0], PRODUCTS[2]],
+                               "Bread": [PRODUCTS[1]]}, total_code="All products")
+    return MicroData(dataset, hierarchies={"product": hierarchy, "sbi": LevelHierarchy([1, 1])})
+
+
+class TestCodeEncoding(TestCase):
+    def setUp(self):
+        self.input_data = make_microdata()
+        self.encoding = CodeEncoding.from_input_data(self.input_data, ["product", "sbi"])
+
+    def test_columns(self):
+        # Columns with a LevelHierarchy keep their codes
+        self.assertIn("product", self.encoding)
+        self.assertNotIn("sbi", self.encoding)
+
+    def test_round_trip(self):
+        values = self.input_data.dataset["product"]
+        encoded = self.encoding.encode("product", values)
+        self.assertTrue(encoded.dropna().str.len().max() <= 1)
+        self.assertTrue(pd.isna(encoded.iloc[-1]))
+
+        decoded = self.encoding.decode("product", encoded.dropna())
+        self.assertEqual(list(values.dropna()), list(decoded))
+
+    def test_decode_index(self):
+        codes = [self.encoding.encode_code("product", code) for code in PRODUCTS]
+        index = pd.MultiIndex.from_arrays([[int(code) for code in codes], ["11", "12", "21"]],
+                                          names=["product", "sbi"])
+        result = self.encoding.decode_index(index)
+        self.assertEqual(PRODUCTS, list(result.get_level_values("product")))
+        self.assertEqual(["11", "12", "21"], list(result.get_level_values("sbi")))
+
+    def test_integer_codes(self):
+        dataset = pd.DataFrame({"postcode": [1011, 2511, 1011, 3011], "income": [1, 2, 3, 4]})
+        encoding = CodeEncoding.from_input_data(MicroData(dataset), ["postcode"])
+        encoded = encoding.encode("postcode", dataset["postcode"])
+        self.assertEqual(["0", "1", "0", "2"], list(encoded))
+
+        # Decoded codes have their original type
+        decoded = encoding.decode("postcode", encoded)
+        self.assertEqual("int64", decoded.dtype)
+        self.assertEqual([1011, 2511, 1011, 3011], list(decoded))
+
+        index = pd.Index([0, 2], name="postcode")
+        self.assertEqual([1011, 3011], list(encoding.decode_index(index)))
+
+    def test_float_codes(self):
+        # A missing value turns integer codes into floats, but they are still written as integers
+        dataset = pd.DataFrame({"postcode": [1011, None, 2511], "income": [1, 2, 3]})
+        encoding = CodeEncoding.from_input_data(MicroData(dataset), ["postcode"])
+        self.assertEqual(["1011", "2511"], list(encoding._keys["postcode"]))
+        self.assertEqual("0", encoding.encode_code("postcode", "1011"))
+
+    def test_encode_input_data(self):
+        encoded = self.input_data.encode_codes(["product", "sbi"])
+        self.assertIs(encoded, self.input_data.encode_codes(["sbi", "product"]))
+        self.assertIsNone(self.input_data.encoding)
+
+        hierarchy = encoded.hierarchies["product"]
+        self.assertEqual(self.encoding.encode_code("product", "All products"),
+                         hierarchy.total_code)
+        self.assertEqual(len(PRODUCTS) + 2, len(list(hierarchy.root.iter_descendants())))
+        self.assertEqual(1, hierarchy.code_length)
+
+        # The original is left alone
+        self.assertEqual(PRODUCTS[0], self.input_data.dataset["product"].iloc[0])
+
+    def test_encode_apriori(self):
+        apriori = Apriori([((PRODUCTS[1], "12"), "s")])
+        result = self.encoding.encode_apriori(["product", "sbi"], apriori)
+        self.assertEqual([self.encoding.encode_code("product", PRODUCTS[1]), "12"],
+                         result.changes[0].cell)
+
+        with self.assertRaises(ValueError):
+            self.encoding.encode_code("product", "Unknown")
+
+
+@skipIf(os.name == 'nt', "Stub TauArgus requires a POSIX shell")
+class TestEncodedJob(TestCase):
+    def setUp(self):
+        self._tmp_directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp_directory.name)
+        self.tau = TauArgus(make_stub_tauargus(self.directory))
+
+    def tearDown(self):
+        self._tmp_directory.cleanup()
+
+    def test_run(self):
+        input_data = make_microdata()
+        table = Table(["product"], "income")
+        job = Job(input_data, [table], directory=self.directory, encode_codes=True)
+        self.assertEqual(1, job.input_data.column_lengths["product"])
+
+        report = self.tau.run(job)
+        self.assertTrue(report.is_succesful)
+
+        raw = pd.read_csv(table.filepath_out)
+        self.assertTrue(raw["product"].dropna().isin(range(10)).all())
+
+        result = table.load_result()
+        income = result.unsafe()
+        self.assertEqual(50, income[PRODUCTS[0]])
+        self.assertEqual(30, income[PRODUCTS[2]])
+
+    def test_shared_recode(self):
+        dataset = pd.DataFrame({
+            "product": PRODUCTS,
+            "dessert": list(reversed(PRODUCTS)),
+            "income": [10, 20, 30],
+        })
+        input_data = MicroData(dataset)
+        tables = [Table(["product"], "income", recodes={"product": TreeRecode([PRODUCTS[0]])}),
+                  Table(["dessert"], "income", recodes={"dessert": TreeRecode([PRODUCTS[0]])})]
+        job = Job(input_data, tables, directory=self.directory, encode_codes=True)
+
+        # The same codes are encoded differently for each column
+        encoding = job.input_data.encoding
+        self.assertNotEqual(encoding.encode_code("product", PRODUCTS[0]),
+                            encoding.encode_code("dessert", PRODUCTS[0]))
+        grc_files = sorted((self.directory / "input").glob("*.grc"))
+        self.assertEqual(2, len(grc_files))
+        self.assertCountEqual(
+            [encoding.encode_code(col, PRODUCTS[0]) for col in ["product", "dessert"]],
+            [TreeRecode.from_grc(grc_file).codes[0].strip() for grc_file in grc_files])
+
+    def test_recode_of_caller(self):
+        input_data = make_microdata()
+        recode = TreeRecode(["Pies and cakes"])
+        table = Table(["product"], "income", recodes={"product": recode})
+        Job(input_data, [table], directory=self.directory / "encoded", encode_codes=True)
+
+        # The encoded recode file belongs to the job, not to the recode of the caller
+        self.assertIsNone(recode.filepath)
+
+        Job(input_data, [table], directory=self.directory / "raw")
+        self.assertEqual(["Pies and cakes"], TreeRecode.from_grc(recode.filepath).codes)
+
+        # A raw recode file is not used for encoded codes
+        job = Job(input_data, [table], directory=self.directory / "again", encode_codes=True)
+        grc_files = list((self.directory / "again" / "input").glob("*.grc"))
+        self.assertEqual(1, len(grc_files))
+        self.assertIn(str(grc_files[0]), job.batch_filepath.read_text())
+        self.assertNotIn(str(recode.filepath), job.batch_filepath.read_text())
+
+    def test_run_integer_codes(self):
+        dataset = pd.DataFrame({"postcode": [1011, 2511, 1011, 3011], "income": [1, 2, 3, 4]})
+        table = Table(["postcode"], "income")
+        job = Job(MicroData(dataset), [table], directory=self.directory, encode_codes=True)
+        self.assertTrue(self.tau.run(job).is_succesful)
+
+        income = table.load_result().unsafe()
+        self.assertEqual(4, income[1011])
+        self.assertEqual(4, income[3011])
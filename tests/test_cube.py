@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+import pandas as pd
+
+from piargus import LevelHierarchy, MicroData, TreeHierarchy
+
+
+class TestCube(TestCase):
+    def setUp(self):
+        self.dataset = pd.DataFrame({
+            "sbi": ["11", "12", "11", "21", "21", "12"],
+            "regio": ["A", "A", "B", "B", "B", "A"],
+            "size": [1, 2, 1, 2, 2, 1],
+            "income": [10, 20, 30, 40, 50, 60],
+        })
+        self.microdata = MicroData(self.dataset, hierarchies={"sbi": LevelHierarchy([1, 1])})
+        self.cube = self.microdata.cube(["sbi", "regio", "size"], ["income"], top_k=2)
+
+    def test_aggregate(self):
+        # One row for each non-empty cell
+        self.assertEqual(5, len(self.cube.aggregate))
+        self.assertEqual(6, self.cube.aggregate["freq"].sum())
+
+    def test_table(self):
+        result = self.cube.table(["sbi"])
+        self.assertEqual({"11": 40, "12": 80, "21": 90}, result["income"].to_dict())
+        self.assertEqual({"11": 2, "12": 2, "21": 2}, result["freq"].to_dict())
+        self.assertEqual({"11": 30, "12": 60, "21": 50}, result["income_top1"].to_dict())
+        self.assertEqual({"11": 10, "12": 20, "21": 40}, result["income_top2"].to_dict())
+
+        # Tables are derived once
+        self.assertIs(result, self.cube.table(["sbi"]))
+
+        with self.assertRaises(ValueError):
+            self.cube.table(["unknown"])
+
+    def test_table_margins(self):
+        result = self.cube.table(["sbi", "regio"], margins=True)
+        expected = self.dataset.groupby(["regio"])["income"].sum()
+        for regio, income in expected.items():
+            self.assertEqual(income, result.loc[("Total", regio), "income"])
+
+        self.assertEqual(120, result.loc[("1", "Total"), "income"])
+        self.assertEqual(4, result.loc[("1", "Total"), "freq"])
+        self.assertEqual(60, result.loc[("1", "Total"), "income_top1"])
+        self.assertEqual(30, result.loc[("1", "Total"), "income_top2"])
+        self.assertEqual(210, result.loc[("Total", "Total"), "income"])
+        self.assertEqual(50, result.loc[("Total", "Total"), "income_top2"])
+
+    def test_missing_codes(self):
+        # A missing value turns the integer codes of size into floats
+        dataset = self.dataset.assign(size=[1, 2, None, 2, 2, 1])
+        cube = MicroData(dataset).cube(["size"], ["income"], top_k=1)
+        result = cube.table(["size"], margins=True)
+        self.assertEqual({"1": 70, "2": 110, "Total": 180}, result["income"].to_dict())
+        self.assertEqual({"1": 60, "2": 50, "Total": 60}, result["income_top1"].to_dict())
+
+    def test_tree_hierarchy(self):
+        hierarchy = TreeHierarchy({"West": ["A"], "East": ["B"]}, total_code="NL")
+        microdata = MicroData(self.dataset, hierarchies={"regio": hierarchy})
+        result = microdata.cube(["regio"], ["income"]).table(["regio"], margins=True)
+        self.assertEqual({"A": 90, "B": 120, "West": 90, "East": 120, "NL": 210},
+                         result["income"].to_dict())
+
+    def test_to_tabledata(self):
+        table_data = self.cube.to_tabledata(["sbi"], "income", safety_rule="NK(2, 70)")
+        self.assertEqual(["sbi"], table_data.explanatory)
+        self.assertEqual("freq", table_data.frequency)
+        self.assertEqual(["income_top1", "income_top2"], table_data.top_contributors)
+        self.assertEqual(6, len(table_data.dataset))
+        self.assertFalse(table_data.dataset.isna().any().any())
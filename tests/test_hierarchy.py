@@ -1,9 +1,13 @@
 import io
 import os
+import pickle
+from collections import Counter
 from unittest import TestCase
 
+import littletree
 import pandas as pd
-from piargus import TreeHierarchy
+from piargus import TreeHierarchy, TreeHierarchyNode
+from piargus.inputspec.hierarchy.treehierarchy import _ChildDict
 
 
 class TestHierarchy(TestCase):
@@ -116,3 +120,105 @@ class TestHierarchy(TestCase):
         self.assertCountEqual(expected1, result1)
         self.assertCountEqual(expected2, result2)
         self.assertEqual(13, hierarchy.code_length)
+
+    def test_code_index(self):
+        hierarchy = TreeHierarchy({
+            "Zuid-Holland": ["Rotterdam", "Den Haag"],
+            "Noord-Holland": ["Haarlem"]})
+
+        def assert_index():
+            codes = [(node.code, item.depth)
+                     for node, item in hierarchy.root.iter_descendants(with_item=True)]
+            self.assertEqual(max(len(code) for code, _ in codes), hierarchy.code_length)
+            self.assertEqual(dict(Counter(depth for _, depth in codes)), hierarchy.depth_counts)
+
+        self.assertEqual({1: 2, 2: 3}, hierarchy.depth_counts)
+
+        hierarchy.create_node("Zuid-Holland/Rotterdam/Kralingen-Crooswijk")
+        self.assertEqual(19, hierarchy.code_length)
+        self.assertEqual({1: 2, 2: 3, 3: 1}, hierarchy.depth_counts)
+        assert_index()
+
+        hierarchy.get_node("Zuid-Holland/Rotterdam").detach()
+        self.assertEqual(13, hierarchy.code_length)
+        self.assertEqual({1: 2, 2: 2}, hierarchy.depth_counts)
+        assert_index()
+
+        hierarchy.get_node("Noord-Holland").code = "NH"
+        self.assertEqual(12, hierarchy.code_length)
+        assert_index()
+
+        moved = hierarchy.get_node("Zuid-Holland").detach()
+        hierarchy.get_node("NH/Haarlem").update([moved], mode="detach")
+        hierarchy.root.sort_children(recursive=True)
+        self.assertEqual({1: 1, 2: 1, 3: 1, 4: 1}, hierarchy.depth_counts)
+        assert_index()
+
+        hierarchy.root.children = [TreeHierarchyNode("A"), TreeHierarchyNode("BB")]
+        self.assertEqual(2, hierarchy.code_length)
+        assert_index()
+
+        # The code length can still be overridden
+        hierarchy.code_length = 5
+        self.assertEqual(5, hierarchy.code_length)
+        del hierarchy.code_length
+        self.assertEqual(2, hierarchy.code_length)
+
+    def test_child_dict(self):
+        # TreeHierarchyNode relies on littletree storing the children of a node in _cdict
+        self.assertIn("_cdict", littletree.BaseNode.__slots__)
+        hierarchy = TreeHierarchy({"A": ["A1"], "B": []})
+        root = hierarchy.root
+        self.assertIsInstance(root._cdict, _ChildDict)
+        self.assertEqual(["A", "B"], [child.code for child in root.children])
+        root["A"].detach()
+        self.assertEqual(["B"], list(root._cdict))
+
+        # All methods that change the children keep the index up to date
+        for name in ["__setitem__", "__delitem__", "pop", "popitem", "clear", "update",
+                     "setdefault"]:
+            self.assertIsNot(getattr(dict, name), getattr(_ChildDict, name), name)
+
+        child = root._cdict.setdefault("CCC", TreeHierarchyNode("CCC"))
+        self.assertIs(child, root._cdict.setdefault("CCC"))
+        self.assertEqual(3, hierarchy.code_length)
+        self.assertEqual(("CCC", child), root._cdict.popitem())
+        self.assertEqual(1, hierarchy.code_length)
+
+    def test_from_frame(self):
+        frame = pd.DataFrame({
+            "province": ["Zuid-Holland", "Zuid-Holland", "Noord-Holland", "Zuid-Holland",
+                         "Utrecht"],
+            "municipality": ["Rotterdam", "Den Haag", "Haarlem", "Rotterdam", None],
+            "population": [1, 2, 3, 4, 5],
+        })
+        hierarchy = TreeHierarchy.from_frame(frame, levels=["province", "municipality"],
+                                             total_code="NL")
+        expected = TreeHierarchy({
+            "Zuid-Holland": ["Rotterdam", "Den Haag"],
+            "Noord-Holland": ["Haarlem"],
+            "Utrecht": []}, total_code="NL")
+        self.assertEqual(expected, hierarchy)
+        self.assertEqual("NL", hierarchy.total_code)
+
+    def test_from_frame_repeated_codes(self):
+        # The same code can occur under different parents
+        frame = pd.DataFrame({"level1": ["A", "A", "B"], "level2": [1, 2, 1]})
+        hierarchy = TreeHierarchy.from_frame(frame)
+        self.assertEqual(TreeHierarchy({"A": ["1", "2"], "B": ["1"]}), hierarchy)
+        self.assertEqual({1: 2, 2: 3}, hierarchy.depth_counts)
+
+    def test_from_frame_integers_with_missing(self):
+        # Pandas stores integers as floats if there are missing values
+        frame = pd.DataFrame({"level1": ["A", "A", "B"], "level2": [1, 2, None]})
+        hierarchy = TreeHierarchy.from_frame(frame)
+        self.assertEqual(TreeHierarchy({"A": ["1", "2"], "B": []}), hierarchy)
+
+    def test_pickle(self):
+        hierarchy = TreeHierarchy({
+            "Zuid-Holland": {"Rotterdam": (),
+                             "Den Haag": ["Schilderswijk"]},
+            "Noord-Holland": ["Haarlem"]}, total_code="NL")
+        result = pickle.loads(pickle.dumps(hierarchy))
+        self.assertEqual(hierarchy, result)
+        self.assertEqual("NL", result.total_code)
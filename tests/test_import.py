@@ -0,0 +1,32 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+# Modules that are slow to import and should only be imported when needed
+HEAVY_MODULES = {"pandas", "numpy", "littletree"}
+
+
+def import_times(statement):
+    """Run statement in a new interpreter and return the cumulative import time per module."""
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                             capture_output=True, text=True, check=True)
+    times = {}
+    for line in process.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdigit():
+                times[module.strip()] = int(cumulative)
+    return times
+
+
+class TestImport(TestCase):
+    def test_import_time(self):
+        times = import_times("import piargus")
+        heavy = {module for module in times if module.split(".")[0] in HEAVY_MODULES}
+        self.assertIn("piargus", times)
+        self.assertEqual(set(), heavy)
+
+    def test_lazy_attributes(self):
+        times = import_times("import piargus; piargus.TreeHierarchy; piargus.Node")
+        self.assertIn("littletree", times)
+        self.assertNotIn("pandas", times)
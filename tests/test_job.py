@@ -0,0 +1,105 @@
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from unittest import TestCase, mock
+
+import pandas as pd
+
+from piargus import Job, MicroData, Table, TreeHierarchy, setup_all
+from piargus.artefactstore import _file_digest
+
+
+def make_microdata():
+    dataset = pd.DataFrame({
+        "regio": ["Rotterdam", "Den Haag", "Haarlem", "Rotterdam"],
+        "symbol": ["a", "b", "a", "b"],
+        "income": [10, 20, 30, 40],
+    })
+    hierarchy = TreeHierarchy({
+        "Zuid-Holland": ["Rotterdam", "Den Haag"],
+        "Noord-Holland": ["Haarlem"]})
+    return MicroData(dataset, hierarchies={"regio": hierarchy})
+
+
+class TestSetupAll(TestCase):
+    def setUp(self):
+        self._tmp_directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp_directory.name)
+
+    def tearDown(self):
+        self._tmp_directory.cleanup()
+
+    def make_jobs(self, input_data):
+        explanatories = [["regio"], ["symbol"], ["regio", "symbol"]]
+        return [Job(input_data, [Table(explanatory, "income")], directory=self.directory,
+                    name=f"job{i}", setup=False)
+                for i, explanatory in enumerate(explanatories)]
+
+    def test_setup_all(self):
+        input_data = make_microdata()
+        jobs = self.make_jobs(input_data)
+        result = list(setup_all(jobs))
+
+        self.assertCountEqual(jobs, result)
+        for job in jobs:
+            self.assertTrue(job.batch_filepath.exists())
+            self.assertIsNotNone(job.metadata.filepath)
+
+        # Inputs are shared between jobs
+        self.assertEqual(1, len(list((self.directory / "input").glob("*.csv"))))
+        self.assertEqual(1, len(list((self.directory / "input").glob("*.hrc"))))
+
+    def test_setup_all_threads(self):
+        input_data = make_microdata()
+        jobs = [Job(input_data, [Table(["regio"], "income")], directory=self.directory,
+                    name=f"job{i}", setup=False)
+                for i in range(8)]
+
+        def slowly(func):
+            def wrapper(*args, **kwargs):
+                time.sleep(0.01)
+                return func(*args, **kwargs)
+            return mock.Mock(wraps=wrapper)
+
+        with mock.patch.object(input_data, "to_csv", slowly(input_data.to_csv)) as to_csv, \
+                mock.patch.object(input_data, "_generate_column",
+                                  slowly(input_data._generate_column)) as generate_column:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                result = list(setup_all(jobs, executor=executor))
+
+            # Inputs shared by jobs that are set up at the same time are generated only once
+            self.assertEqual(8, len(result))
+            self.assertEqual(1, to_csv.call_count)
+            self.assertEqual(len(input_data.dataset.columns), generate_column.call_count)
+
+    def test_fingerprint(self):
+        input_data = make_microdata()
+        jobs = list(setup_all(self.make_jobs(input_data)))
+        with mock.patch("piargus.inputspec.inputdata._file_digest",
+                        wraps=_file_digest) as file_digest:
+            fingerprints = [job.fingerprint() for job in jobs]
+
+        # The input data is only read once for all jobs
+        self.assertEqual(1, file_digest.call_count)
+        self.assertEqual(3, len(set(fingerprints)))
+        self.assertEqual(fingerprints, [job.fingerprint() for job in jobs])
+
+        with open(input_data.filepath, 'a') as writer:
+            writer.write("Haarlem,a,50\n")
+        self.assertNotEqual(fingerprints[0], jobs[0].fingerprint())
+
+    def test_setup_all_processes(self):
+        input_data = make_microdata()
+        jobs = self.make_jobs(input_data)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            result = list(setup_all(jobs, executor=executor))
+
+        self.assertCountEqual(jobs, result)
+        self.assertIsNotNone(input_data.filepath)
+        self.assertIsNotNone(input_data.hierarchies["regio"].filepath)
+        for job in jobs:
+            self.assertTrue(job.batch_filepath.exists())
+            self.assertIsNotNone(job.metadata.filepath)
+            for table in job.tables.values():
+                self.assertIsNotNone(table.filepath_out)
@@ -0,0 +1,54 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from piargus import ArgusReport, Journal, ResourceUsage
+
+
+class TestJournal(TestCase):
+    def setUp(self):
+        self._tmp_directory = tempfile.TemporaryDirectory()
+        self.filepath = Path(self._tmp_directory.name) / "journal.jsonl"
+
+    def tearDown(self):
+        self._tmp_directory.cleanup()
+
+    def test_record(self):
+        report = ArgusReport(0, batch_file="job.arb", logbook_file="logbook.txt")
+        report.resources = ResourceUsage(1.5, 1.0, 0.25, 2048)
+        journal = Journal(self.filepath)
+        journal.record("a", "abc", "success", report, outputs=["a.csv"])
+        journal.record("b", "def", "failed")
+
+        journal = Journal(self.filepath)
+        self.assertEqual(2, len(journal))
+        self.assertTrue(journal.is_done("a"))
+        self.assertTrue(journal.is_done("a", "abc"))
+        self.assertFalse(journal.is_done("a", "changed"))
+        self.assertFalse(journal.is_done("b"))
+        self.assertFalse(journal.is_done("c"))
+        self.assertEqual(["a.csv"], journal.get("a")["outputs"])
+        self.assertEqual(report.to_dict(), journal.report("a").to_dict())
+        self.assertEqual(1.25, journal.report("a").resources.cpu_seconds)
+        self.assertIsNone(journal.report("b"))
+
+    def test_last_entry_counts(self):
+        journal = Journal(self.filepath)
+        journal.record("a", "abc", "failed")
+        journal.record("a", "abc", "success")
+        self.assertTrue(Journal(self.filepath).is_done("a"))
+
+        journal.compact()
+        self.assertEqual(1, len(self.filepath.read_text().splitlines()))
+        self.assertTrue(Journal(self.filepath).is_done("a"))
+
+    def test_partial_line(self):
+        journal = Journal(self.filepath)
+        journal.record("a", "abc", "success")
+        with open(self.filepath, 'a') as writer:
+            writer.write('{"key": "b", "fingerp')
+
+        journal = Journal(self.filepath)
+        self.assertEqual(["a"], list(journal))
+        journal.record("c", "ghi", "success")
+        self.assertEqual(["a", "c"], list(Journal(self.filepath)))
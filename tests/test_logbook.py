@@ -0,0 +1,119 @@
+from unittest import TestCase
+
+from piargus.result.logbook import parse_logbook
+
+LOGBOOK = """\
+14:22:13 : Start of batch procedure; file: job.arb
+14:22:13 : <OPENMICRODATA> "microdata.csv"
+14:22:13 : <OPENMETADATA> "metadata.rda"
+14:22:13 : <SPECIFYTABLE> "symbol""regio"|"income"||
+14:22:13 : <SAFETYRULE> P(10, 1)
+14:22:13 : <SPECIFYTABLE> "symbol"|"income"||
+14:22:13 : <SAFETYRULE> NK(3, 75)
+14:22:13 : <READMICRODATA>
+14:22:14 : Tables have been computed
+14:22:14 : Table 1: 7 unsafe cells
+14:22:14 : Table 2: 2 unsafe cells
+14:22:14 : <SUPPRESS> OPT(1)
+14:22:14 : Start of the optimal suppression procedure (table 1)
+14:22:19 : End of optimal suppression
+           Number of iterations: 31
+           Number of suppressions: 12
+14:22:19 : <SUPPRESS> MOD(2)
+14:22:20 : 4 cells suppressed
+14:22:21 : <WRITETABLE> (1, 2, AS+, "table1.csv")
+14:22:21 : <WRITETABLE> (2, 2, AS+, "table2.csv")
+14:22:22 : End of TauArgus run
+"""
+
+# Excerpt of a logbook written by TauArgus
+REAL_LOGBOOK = """\
+25-Aug-2023 16:49:24 : <OPENMICRODATA> "tau\\input\\basic-example_microdata.csv"
+25-Aug-2023 16:49:24 : <OPENMETADATA> "tau\\input\\basic-example_microdata.rda"
+25-Aug-2023 16:49:24 : <SPECIFYTABLE> "symbol""regio"|"income"||
+25-Aug-2023 16:49:24 : <SAFETYRULE> P(10, 1)
+25-Aug-2023 16:49:24 : <READMICRODATA>
+25-Aug-2023 16:49:24 : Start explore file: tau\\input\\basic-example_microdata.csv
+25-Aug-2023 16:49:24 : Start computing tables
+25-Aug-2023 16:49:24 : Table: symbol x regio | income has been specified
+25-Aug-2023 16:49:24 : Tables have been computed
+25-Aug-2023 16:49:24 : Micro data file read; processing time 0 seconds
+25-Aug-2023 16:49:24 : Tables from microdata have been read
+25-Aug-2023 16:49:24 : <SUPPRESS> OPT(1)
+25-Aug-2023 16:49:25 : End of Optimal protection. Time used 0 seconds
+                       Number of suppressions: 4
+25-Aug-2023 16:49:25 : <WRITETABLE> (1, 2, AS+, "tau\\output\\basic-example_table-1.csv")
+25-Aug-2023 16:49:25 : Table: symbol x regio | income has been written
+                       Output file name: tau\\output\\basic-example_table-1.csv
+25-Aug-2023 16:49:25 : End of TauArgus run
+"""
+
+
+class TestLogbook(TestCase):
+    def test_parse_real_logbook(self):
+        summary = parse_logbook(REAL_LOGBOOK.splitlines(keepends=True))
+        [table] = summary.tables
+        self.assertEqual('"symbol""regio"|"income"||', table.specification)
+        self.assertEqual("P(10, 1)", table.safety_rule)
+        self.assertEqual("OPT", table.suppress_method)
+        self.assertEqual(1.0, table.suppress_duration)
+        self.assertEqual(4, table.suppressed_cells)
+        self.assertTrue(table.written)
+        self.assertEqual(1.0, summary.duration)
+        self.assertEqual(18, len(summary.events) + sum(len(e.details) for e in summary.events))
+
+    def test_unrecognized_messages(self):
+        lines = [
+            "10:00:00 : <SPECIFYTABLE> \"a\"|<freq>||\n",
+            "10:00:01 : <SUPPRESS> OPT(1)\n",
+            "10:00:02 : Solver reported something new\n",
+            "10:00:03 : <WRITETABLE> (1, 2, AS+, \"a.csv\")\n",
+        ]
+        [table] = parse_logbook(lines).tables
+        self.assertIsNone(table.suppressed_cells)
+        self.assertEqual(["Solver reported something new"], table.messages)
+
+    def test_parse_logbook(self):
+        summary = parse_logbook(LOGBOOK.splitlines(keepends=True))
+        table1, table2 = summary.tables
+
+        self.assertEqual(1, table1.index)
+        self.assertEqual('"symbol""regio"|"income"||', table1.specification)
+        self.assertEqual("P(10, 1)", table1.safety_rule)
+        self.assertEqual("OPT", table1.suppress_method)
+        self.assertEqual(5.0, table1.suppress_duration)
+        self.assertEqual(7, table1.unsafe_cells)
+        self.assertEqual(12, table1.suppressed_cells)
+        self.assertEqual(31, table1.iterations)
+        self.assertTrue(table1.written)
+
+        self.assertEqual("NK(3, 75)", table2.safety_rule)
+        self.assertEqual("MOD", table2.suppress_method)
+        self.assertEqual(2.0, table2.suppress_duration)
+        self.assertEqual(2, table2.unsafe_cells)
+        self.assertEqual(4, table2.suppressed_cells)
+        self.assertIsNone(table2.iterations)
+
+        self.assertEqual(9.0, summary.duration)
+
+    def test_linked_suppression(self):
+        lines = [
+            "10:00:00 : <SPECIFYTABLE> \"a\"|<freq>||\n",
+            "10:00:00 : <SPECIFYTABLE> \"b\"|<freq>||\n",
+            "10:00:01 : <SUPPRESS> GH(0)\n",
+            "10:00:04 : <WRITETABLE> (1, 2, AS+, \"a.csv\")\n",
+        ]
+        summary = parse_logbook(lines)
+        self.assertEqual(["GH", "GH"], [table.suppress_method for table in summary.tables])
+        self.assertEqual([3.0, 3.0], [table.suppress_duration for table in summary.tables])
+        self.assertEqual([True, False], [table.written for table in summary.tables])
+
+    def test_midnight(self):
+        lines = [
+            "23:59:58 : <SPECIFYTABLE> \"a\"|<freq>||\n",
+            "23:59:59 : <SUPPRESS> OPT(1)\n",
+            "00:00:03 : <WRITETABLE> (1, 2, AS+, \"a.csv\")\n",
+        ]
+        summary = parse_logbook(lines)
+        self.assertEqual(4.0, summary.tables[0].suppress_duration)
+        self.assertEqual(5.0, summary.duration)
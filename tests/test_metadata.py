@@ -0,0 +1,126 @@
+import io
+import os
+import shlex
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock
+
+import pandas as pd
+
+from piargus import LevelHierarchy, MetaData, MicroData, TableData
+from piargus.inputspec.metadata import _tokenize
+
+RDA = """\
+    <SEPARATOR> ,
+    <SAFE> S
+regio 5
+    <RECODABLE>
+    <HIERARCHICAL>
+    <HIERLEVELS> 1 2 2
+    <TOTCODE> "Total NL"
+income 20 99 999
+    <NUMERIC>
+    <DECIMALS> 2
+
+request 1
+    <REQUEST> "1" "2"
+"""
+
+
+class TestMetaData(TestCase):
+    def test_tokenize(self):
+        lines = ['a"b c" d', '<X> "a b" c', "a'b c' d", '"ab"cd e', 'x "" y', ' <A>\t1\n']
+        for line in lines:
+            with self.subTest(line=line):
+                self.assertEqual(shlex.split(line, posix=False), _tokenize(line))
+
+        with self.assertRaises(ValueError):
+            _tokenize('<X> "a" "b')
+
+    def test_from_rda(self):
+        metadata = MetaData.from_rda(io.StringIO(RDA))
+        self.assertEqual(",", metadata.separator)
+        self.assertEqual({"SAFE": "S"}, metadata.status_markers)
+        self.assertEqual("5", metadata["regio"].width)
+        self.assertTrue(metadata["regio"]["RECODABLE"])
+        self.assertEqual("1 2 2", metadata["regio"]["HIERLEVELS"])
+        self.assertEqual('"Total NL"', metadata["regio"]["TOTCODE"])
+        self.assertEqual(["99", "999"], metadata["income"].missing)
+        self.assertEqual("2", metadata["income"]["DECIMALS"])
+        self.assertEqual('"1" "2"', metadata["request"]["REQUEST"])
+        self.assertEqual([2, 2], metadata["regio"].get_hierarchy().levels[1:])
+
+    def test_round_trip(self):
+        metadata = MetaData.from_rda(io.StringIO(RDA))
+        result = MetaData.from_rda(io.StringIO(metadata.to_rda()))
+        self.assertEqual(metadata.to_rda(), result.to_rda())
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filepath = Path(directory) / "metadata.rda"
+            filepath.write_text(RDA)
+
+            metadata1 = MetaData.from_rda(filepath)
+            metadata1["regio"]["TOTCODE"] = "Modified"
+            metadata2 = MetaData.from_rda(filepath)
+            self.assertEqual('"Total NL"', metadata2["regio"]["TOTCODE"])
+            self.assertEqual(filepath, metadata2.filepath)
+
+            filepath.write_text(RDA.replace("regio 5", "region 5"))
+            os.utime(filepath, ns=(0, 0))
+            metadata3 = MetaData.from_rda(filepath)
+            self.assertIn("region", metadata3)
+            self.assertNotIn("regio", metadata3)
+
+
+class TestGenerateMetadata(TestCase):
+    def setUp(self):
+        self.dataset = pd.DataFrame({
+            "regio": ["A", "B", "A"],
+            "symbol": pd.Categorical(["x", "y", "x"]),
+            "income": [1.5, 2.0, 3.0],
+            "count": [1, 2, 3],
+        })
+
+    def test_generate_metadata(self):
+        microdata = MicroData(self.dataset, weight="count")
+        metadata = microdata.generate_metadata()
+        self.assertTrue(metadata["income"]["NUMERIC"])
+        self.assertEqual(10, metadata["income"]["DECIMALS"])
+        self.assertFalse(metadata["regio"]["NUMERIC"])
+        self.assertEqual(1, metadata["symbol"].width)
+        self.assertTrue(metadata["count"]["WEIGHT"])
+
+    def test_incremental(self):
+        microdata = MicroData(self.dataset)
+        with mock.patch.object(MicroData, "_generate_column",
+                               side_effect=MicroData._generate_column,
+                               autospec=True) as generate_column:
+            metadata1 = microdata.generate_metadata()
+            self.assertEqual(4, generate_column.call_count)
+
+            metadata2 = microdata.generate_metadata()
+            self.assertEqual(4, generate_column.call_count)
+            self.assertEqual(metadata1.to_rda(), metadata2.to_rda())
+
+            # Metadata that is returned can be modified without affecting later calls
+            metadata2["income"]["DECIMALS"] = 2
+            self.assertEqual(10, microdata.generate_metadata()["income"]["DECIMALS"])
+
+            microdata.hierarchies["regio"] = LevelHierarchy([1])
+            microdata.dataset = microdata.dataset.astype({"count": float})
+            metadata3 = microdata.generate_metadata()
+            self.assertEqual(6, generate_column.call_count)
+            self.assertEqual("1", metadata3["regio"]["HIERLEVELS"])
+            self.assertEqual(10, metadata3["count"]["DECIMALS"])
+
+    def test_tabledata(self):
+        tabledata = TableData(self.dataset, ["regio", "symbol"], "income", frequency="count")
+        metadata = tabledata.generate_metadata()
+        self.assertTrue(metadata["regio"]["RECODABLE"])
+        self.assertEqual('Total', metadata["regio"]["TOTCODE"])
+        self.assertTrue(metadata["count"]["FREQUENCY"])
+
+        tabledata.frequency = None
+        metadata = tabledata.generate_metadata()
+        self.assertIsNone(metadata["count"]["FREQUENCY"])
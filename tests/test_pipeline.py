@@ -0,0 +1,109 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import TestCase, mock, skipIf
+
+import pandas as pd
+
+from piargus import Job, Journal, MicroData, Pipeline, Table, TauArgus
+from tests.stubtauargus import make_stub_tauargus
+
+
+@skipIf(os.name == 'nt', "Stub TauArgus requires a POSIX shell")
+class TestPipeline(TestCase):
+    def setUp(self):
+        self._tmp_directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp_directory.name)
+        self.tau = TauArgus(make_stub_tauargus(self.directory))
+        self.input_data = MicroData(pd.DataFrame({
+            "regio": ["A", "B", "A", "B", "A"],
+            "symbol": ["x", "x", "y", "y", "y"],
+            "income": [10, 20, 30, 40, 50],
+        }))
+
+    def tearDown(self):
+        self._tmp_directory.cleanup()
+
+    def make_jobs(self, n):
+        for i in range(n):
+            explanatory = [["regio"], ["symbol"], ["regio", "symbol"]][i % 3]
+            yield Job(self.input_data, {"table": Table(explanatory, "income")},
+                      directory=self.directory / "jobs", name=f"job{i}", setup=False)
+
+    def test_run(self):
+        pipeline = Pipeline(self.tau, setup_workers=2, run_workers=3, queue_size=1)
+        results = list(pipeline.run(self.make_jobs(7)))
+
+        self.assertEqual(7, len(results))
+        self.assertCountEqual([f"job{i}" for i in range(7)], [r.job.name for r in results])
+        for result in results:
+            self.assertTrue(result.is_succesful, result.error)
+            table_result = result.results["table"]
+            self.assertEqual(150, table_result.unsafe().sum())
+
+        # Input data is shared by all jobs
+        self.assertEqual(1, len(list((self.directory / "jobs" / "input").glob("*.csv"))))
+
+    def test_concurrent_setup(self):
+        to_csv = self.input_data.to_csv
+
+        def slow_to_csv(*args, **kwargs):
+            time.sleep(0.01)
+            return to_csv(*args, **kwargs)
+
+        pipeline = Pipeline(self.tau, setup_workers=4)
+        with mock.patch.object(self.input_data, "to_csv", side_effect=slow_to_csv) as mocked:
+            results = list(pipeline.run(self.make_jobs(8)))
+
+        # Setup workers generate the shared input data only once
+        self.assertTrue(all(result.is_succesful for result in results))
+        self.assertEqual(1, mocked.call_count)
+
+    def test_run_callables(self):
+        jobs = [lambda job=job: job for job in self.make_jobs(2)]
+        results = list(Pipeline(self.tau).run(jobs))
+        self.assertEqual(2, len(results))
+        self.assertTrue(all(result.is_succesful for result in results))
+
+    def test_failures(self):
+        def jobs():
+            yield from self.make_jobs(1)
+            yield Job(self.input_data, [Table(["unknown"], "income")],
+                      directory=self.directory, name="bad", setup=False)
+
+        with mock.patch.dict(os.environ, {"PIARGUS_STUB_EXIT": "1"}):
+            results = {result.job.name: result for result in Pipeline(self.tau).run(jobs())}
+
+        self.assertIsNone(results["job0"].error)
+        self.assertTrue(results["job0"].report.is_failed)
+        self.assertEqual({}, results["job0"].results)
+        self.assertIsNotNone(results["bad"].error)
+        self.assertIsNone(results["bad"].report)
+
+    def test_stop_early(self):
+        results = Pipeline(self.tau).run(self.make_jobs(10))
+        first = next(results)
+        results.close()
+        self.assertTrue(first.is_succesful)
+
+    def test_resume(self):
+        journal = Journal(self.directory / "journal.jsonl")
+        results = list(Pipeline(self.tau, journal=journal).run(self.make_jobs(3)))
+        self.assertEqual(["success"] * 3, [result.status for result in results])
+
+        # After a restart, jobs that succeeded are skipped
+        journal = Journal(self.directory / "journal.jsonl")
+        with mock.patch.dict(os.environ, {"PIARGUS_STUB_EXIT": "1"}):
+            results = list(Pipeline(self.tau, journal=journal).run(self.make_jobs(4)))
+        statuses = {result.job.name: result.status for result in results}
+        self.assertEqual({"job0": "skipped", "job1": "skipped", "job2": "skipped",
+                          "job3": "failed"}, statuses)
+        for result in results[:3]:
+            self.assertEqual(150, result.results["table"].unsafe().sum())
+
+        # Failed jobs are run again
+        results = list(Pipeline(self.tau, journal=journal).run(self.make_jobs(4)))
+        statuses = {result.job.name: result.status for result in results}
+        self.assertEqual("success", statuses["job3"])
+        self.assertTrue(journal.is_done("job3"))
@@ -0,0 +1,97 @@
+import io
+import math
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase, skipIf
+
+import pandas as pd
+
+from piargus import (GHMITER, MODULAR, OPTIMAL, Job, JobFeatures, MicroData, RuntimeModel,
+                     Scheduler, Table, TauArgus, TreeHierarchy)
+from tests.stubtauargus import make_stub_tauargus
+
+
+def make_microdata():
+    dataset = pd.DataFrame({
+        "regio": ["Rotterdam", "Den Haag", "Haarlem", "Rotterdam"],
+        "symbol": ["a", "b", "a", "c"],
+        "income": [10, 20, 30, 40],
+    })
+    hierarchy = TreeHierarchy({
+        "Zuid-Holland": ["Rotterdam", "Den Haag"],
+        "Noord-Holland": ["Haarlem"]})
+    return MicroData(dataset, hierarchies={"regio": hierarchy})
+
+
+class TestRuntimeModel(TestCase):
+    def test_features(self):
+        input_data = make_microdata()
+        tables = [Table(["regio"], "income", suppress_method=MODULAR),
+                  Table(["regio", "symbol"], "income", suppress_method=OPTIMAL)]
+        job = Job(input_data, tables, setup=False)
+        features = JobFeatures.from_job(job)
+
+        # regio has 5 codes and a total, symbol has 3 codes and a total
+        self.assertEqual(JobFeatures(cells=6 + 6 * 4, dimensions=2, depth=2, method=OPTIMAL),
+                         features)
+
+    def test_prior(self):
+        model = RuntimeModel()
+        slow = model.predict(JobFeatures(1000, 2, 2, OPTIMAL))
+        fast = model.predict(JobFeatures(1000, 2, 2, GHMITER))
+        self.assertGreater(slow, fast)
+
+    def test_fit(self):
+        model = RuntimeModel()
+        for cells in [10, 100, 1000, 10000]:
+            for method, factor in [(OPTIMAL, 1e-2), (MODULAR, 1e-3)]:
+                model.record(JobFeatures(cells, 2, 1, method), factor * cells)
+
+        predicted = model.predict(JobFeatures(5000, 2, 1, OPTIMAL))
+        self.assertAlmostEqual(math.log(50), math.log(predicted), delta=0.1)
+        predicted = model.predict(JobFeatures(5000, 2, 1, MODULAR))
+        self.assertAlmostEqual(math.log(5), math.log(predicted), delta=0.1)
+
+    def test_json(self):
+        model = RuntimeModel([(JobFeatures(10, 1, 1, OPTIMAL), 1.5)])
+        result = RuntimeModel.from_json(io.StringIO(model.to_json()))
+        self.assertEqual(model.observations, result.observations)
+
+
+@skipIf(os.name == 'nt', "Stub TauArgus requires a POSIX shell")
+class TestScheduler(TestCase):
+    def setUp(self):
+        self._tmp_directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp_directory.name)
+        self.tau = TauArgus(make_stub_tauargus(self.directory))
+        input_data = make_microdata()
+        explanatories = [["symbol"], ["regio", "symbol"], ["regio"]]
+        self.jobs = [Job(input_data, [Table(explanatory, "income")], directory=self.directory,
+                         name=f"job{i}")
+                     for i, explanatory in enumerate(explanatories)]
+
+    def tearDown(self):
+        self._tmp_directory.cleanup()
+
+    def test_run(self):
+        model = RuntimeModel()
+        scheduler = Scheduler(self.tau, model, workers=1)
+        results = list(scheduler.run(self.jobs))
+
+        # With one worker, jobs finish from the longest to the shortest prediction
+        self.assertEqual(["job1", "job2", "job0"], [result.job.name for result in results])
+        self.assertTrue(all(result.status == "success" for result in results))
+        self.assertEqual(3, len(model.observations))
+        self.assertTrue(all(result.seconds > 0 for result in results))
+
+    def test_deadline(self):
+        model = RuntimeModel()
+        scheduler = Scheduler(self.tau, model, workers=2, deadline=0.2)
+        features = JobFeatures.from_job(self.jobs[1])
+        self.assertGreater(model.predict(features), 0.2)
+
+        results = {result.job.name: result for result in scheduler.run(self.jobs)}
+        self.assertEqual("skipped", results["job1"].status)
+        self.assertEqual("success", results["job0"].status)
+        self.assertEqual("success", results["job2"].status)
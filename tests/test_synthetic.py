@@ -0,0 +1,61 @@
+from unittest import TestCase
+
+import pandas as pd
+
+from piargus import LevelHierarchy
+from piargus.inputspec import synthetic
+from piargus.inputspec.hierarchy import TreeHierarchy
+
+
+class TestSynthetic(TestCase):
+    def test_level_codes(self):
+        codes = synthetic.level_codes(2, 12)
+        self.assertEqual(144, len(codes))
+        self.assertEqual(["01", "0101"], list(codes.iloc[0]))
+        self.assertEqual(["12", "1212"], list(codes.iloc[-1]))
+
+    def test_make_hierarchy(self):
+        tree = synthetic.make_hierarchy(3, 4)
+        self.assertIsInstance(tree, TreeHierarchy)
+        self.assertEqual({1: 4, 2: 16, 3: 64}, dict(tree.depth_counts))
+        self.assertEqual(["11", "1", "Total"], tree.get_ancestors(["111"])["111"])
+
+        level = synthetic.make_hierarchy(3, 12, kind="level")
+        self.assertIsInstance(level, LevelHierarchy)
+        self.assertEqual([2, 2, 2], level.levels)
+
+        with self.assertRaises(ValueError):
+            synthetic.make_hierarchy(2, 2, kind="unknown")
+
+    def test_make_microdata(self):
+        kwargs = dict(explanatory={"regio": (2, 5), "sbi": (1, 3)},
+                      responses=["income", "profit"], holdings=10, weight=True, seed=42)
+        microdata = synthetic.make_microdata(1000, **kwargs)
+        dataset = microdata.dataset
+
+        self.assertEqual(1000, len(dataset))
+        self.assertEqual(["regio", "sbi", "income", "profit", "holding", "weight"],
+                         list(dataset.columns))
+        self.assertEqual("holding", microdata.holding)
+        self.assertEqual("weight", microdata.weight)
+        self.assertTrue(dataset["regio"].isin(synthetic.level_codes(2, 5)["level2"]).all())
+        self.assertTrue((dataset["income"] >= 100).all())
+        self.assertEqual(1000, len(microdata.to_csv().splitlines()))
+
+        # Reproducible
+        pd.testing.assert_frame_equal(dataset, synthetic.make_microdata(1000, **kwargs).dataset)
+
+    def test_skew(self):
+        uniform = synthetic.make_microdata(10000, {"regio": (1, 10)}, skew=0, seed=1)
+        skewed = synthetic.make_microdata(10000, {"regio": (1, 10)}, skew=2, seed=1)
+        self.assertLess(uniform.dataset["regio"].value_counts().max(), 1500)
+        self.assertGreater(skewed.dataset["regio"].value_counts().max(), 5000)
+
+    def test_make_tabledata(self):
+        tabledata = synthetic.make_tabledata(500, {"regio": (2, 3), "sbi": (1, 2)}, seed=3)
+        dataset = tabledata.dataset.set_index(["regio", "sbi"])
+
+        self.assertEqual(["income_top1", "income_top2"], tabledata.top_contributors)
+        self.assertEqual(500, dataset.loc[("Total", "Total"), "freq"])
+        regions = dataset.loc[(["1", "2", "3"], "Total"), "income"]
+        self.assertAlmostEqual(dataset.loc[("Total", "Total"), "income"], regions.sum())
@@ -0,0 +1,152 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import pandas as pd
+
+from piargus import Job, JobSetupError, LevelHierarchy, TableData, TreeHierarchy
+
+
+def make_dataset():
+    # Region by size class, including all totals
+    rows = [
+        ("11", "small", 1, 10),
+        ("11", "large", 2, 20),
+        ("11", "Total", 3, 30),
+        ("12", "small", 3, 30),
+        ("12", "large", 4, 40),
+        ("12", "Total", 7, 70),
+        ("1", "small", 4, 40),
+        ("1", "large", 6, 60),
+        ("1", "Total", 10, 100),
+        ("2", "small", 5, 50),
+        ("2", "Total", 5, 50),
+        ("Total", "small", 9, 90),
+        ("Total", "large", 6, 60),
+        ("Total", "Total", 15, 150),
+    ]
+    return pd.DataFrame(rows, columns=["regio", "size", "freq", "income"])
+
+
+class TestTableData(TestCase):
+    def make_tabledata(self, dataset=None, hierarchy=None):
+        if dataset is None:
+            dataset = make_dataset()
+        if hierarchy is None:
+            hierarchy = TreeHierarchy({"1": ["11", "12"], "2": []})
+        return TableData(dataset, ["regio", "size"], "income", frequency="freq",
+                         hierarchies={"regio": hierarchy}, total_codes={"size": "Total"})
+
+    def test_check_additivity(self):
+        self.assertEqual(0, len(self.make_tabledata().check_additivity()))
+        self.assertEqual(0, len(self.make_tabledata(hierarchy=LevelHierarchy([1, 1]))
+                                .check_additivity()))
+
+    def test_check_additivity_violations(self):
+        dataset = make_dataset()
+        dataset.loc[dataset["regio"].eq("12") & dataset["size"].eq("Total"), "income"] = 75
+        violations = self.make_tabledata(dataset).check_additivity()
+
+        # The total of 12 is wrong compared to its parts and as part of region 1
+        self.assertEqual(2, len(violations))
+        self.assertEqual({("12", "Total", "size"), ("1", "Total", "regio")},
+                         set(violations[["regio", "size", "variable"]].itertuples(index=False)))
+        self.assertEqual({5, -5}, set(violations["difference"]))
+        self.assertEqual({"income"}, set(violations["column"]))
+
+    def test_check_additivity_missing_total(self):
+        dataset = make_dataset()
+        dataset = dataset[~(dataset["regio"].eq("2") & dataset["size"].eq("Total"))]
+        violations = self.make_tabledata(dataset).check_additivity(columns=["freq"])
+
+        # The missing total is reported first, then the grand total that lacks a part
+        self.assertEqual(2, len(violations))
+        missing = violations.iloc[0]
+        self.assertEqual(("2", "Total"), (missing["regio"], missing["size"]))
+        self.assertTrue(pd.isna(missing["actual"]))
+        self.assertEqual(5, missing["expected"])
+        grand_total = violations.iloc[1]
+        self.assertEqual(("Total", "Total"), (grand_total["regio"], grand_total["size"]))
+        self.assertEqual(5, grand_total["difference"])
+
+    def test_check_additivity_codes(self):
+        # Integer codes, which pandas stores as floats because of a missing code
+        dataset = pd.DataFrame({
+            "regio": [11, 12, 1, 2, 0, None],
+            "income": [30, 70, 100, 50, 150, 10],
+        })
+        hierarchy = TreeHierarchy({"1": ["11", "12"], "2": []}, total_code="0")
+        tabledata = TableData(dataset, ["regio"], "income", hierarchies={"regio": hierarchy})
+        self.assertEqual(0, len(tabledata.check_additivity()))
+
+        dataset.loc[0, "income"] = 35
+        violations = TableData(dataset, ["regio"], "income",
+                               hierarchies={"regio": hierarchy}).check_additivity()
+        self.assertEqual(["1"], list(violations["regio"]))
+        self.assertEqual([-5], list(violations["difference"]))
+
+    def test_job_check_additivity(self):
+        dataset = make_dataset()
+        dataset.loc[0, "income"] = 11
+        tabledata = self.make_tabledata(dataset)
+        with tempfile.TemporaryDirectory() as directory:
+            job = Job(tabledata, directory=Path(directory), setup=False)
+            job.setup()
+            with self.assertRaises(JobSetupError):
+                job.check(additivity=True)
+
+    def test_with_totals(self):
+        dataset = make_dataset()
+        for hierarchy in [TreeHierarchy({"1": ["11", "12"], "2": []}), LevelHierarchy([1, 1])]:
+            with self.subTest(hierarchy=hierarchy):
+                # Only the most detailed cells and some of the totals
+                partial = dataset[dataset["regio"].isin(["11", "12", "2", "Total"])
+                                  & dataset["size"].ne("Total")]
+                original = self.make_tabledata(partial, hierarchy)
+                tabledata = original.with_totals()
+                self.assertIsNot(original.hierarchies["regio"], tabledata.hierarchies["regio"])
+                self.assertEqual(repr(original.hierarchies), repr(tabledata.hierarchies))
+                self.assertIsNot(original.codelists, tabledata.codelists)
+                self.assertEqual(original.explanatory, tabledata.explanatory)
+
+                result = tabledata.dataset.set_index(["regio", "size"]).sort_index()
+                expected = dataset.set_index(["regio", "size"]).sort_index()
+                pd.testing.assert_frame_equal(expected, result, check_dtype=False)
+                self.assertEqual(0, len(tabledata.check_additivity()))
+                self.assertIsNone(tabledata.filepath)
+
+    def test_with_totals_top_contributors(self):
+        dataset = pd.DataFrame({
+            "regio": ["11", "12", "2"],
+            "income": [30, 70, 50],
+            "top1": [20, 40, 50],
+            "top2": [10, 20, 0],
+            "status": ["S", "U", "S"],
+        })
+        tabledata = TableData(dataset, ["regio"], "income", top_contributors=["top1", "top2"],
+                              status_indicator="status",
+                              hierarchies={"regio": LevelHierarchy([1, 1])}).with_totals()
+
+        result = tabledata.dataset.set_index("regio")
+        self.assertEqual(["income", "top1", "top2", "status"], list(result.columns))
+        self.assertEqual([100, 40, 20], list(result.loc["1", ["income", "top1", "top2"]]))
+        self.assertEqual([150, 50, 40], list(result.loc["Total", ["income", "top1", "top2"]]))
+        self.assertEqual("U", result.loc["12", "status"])
+        self.assertTrue(pd.isna(result.loc["Total", "status"]))
+
+    def test_with_totals_codes(self):
+        dataset = pd.DataFrame({
+            "regio": [11, 12, 2, None],
+            "income": [30, 70, 50, 10],
+        })
+        hierarchy = TreeHierarchy({"1": ["11", "12"], "2": []}, total_code="0")
+        tabledata = TableData(dataset, ["regio"], "income", hierarchies={"regio": hierarchy})
+        result = tabledata.with_totals().dataset.set_index("regio")["income"]
+
+        # Codes of the dataset keep their values, the missing code is left out
+        self.assertEqual({11: 30, 12: 70, 2: 50, "1": 100, "0": 150}, result.to_dict())
+
+        dataset = dataset.dropna().astype({"regio": "int64"})
+        tabledata = TableData(dataset, ["regio"], "income", hierarchies={"regio": hierarchy})
+        result = tabledata.with_totals().dataset
+        self.assertEqual([11, 12, 2], list(result.loc[result["income"] < 100, "regio"]))
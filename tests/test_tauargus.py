@@ -0,0 +1,162 @@
+import os
+import tempfile
+from pathlib import Path
+from unittest import TestCase, mock, skipIf
+
+import pandas as pd
+
+from piargus import GHMITER, MODULAR, OPTIMAL, Job, MicroData, Table, TauArgus
+from tests.stubtauargus import make_stub_tauargus
+
+
+@skipIf(os.name == 'nt', "Stub TauArgus requires a POSIX shell")
+class TestTauArgus(TestCase):
+    def setUp(self):
+        self._tmp_directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp_directory.name)
+        self.tau = TauArgus(make_stub_tauargus(self.directory))
+        self.input_data = MicroData(pd.DataFrame({
+            "regio": ["A", "B", "A", "B", "A"],
+            "symbol": ["x", "x", "y", "y", "y"],
+            "income": [10, 20, 30, 40, 50],
+        }))
+
+    def tearDown(self):
+        self._tmp_directory.cleanup()
+
+    def make_jobs(self, n):
+        return [Job(self.input_data, [Table([["regio"], ["symbol"]][i % 2], "income")],
+                    directory=self.directory / "jobs", name=f"job{i}")
+                for i in range(n)]
+
+    def run_directories(self):
+        return list((self.directory / "jobs" / "work").glob("*/run_*"))
+
+    def test_run_job(self):
+        [job] = self.make_jobs(1)
+        lines = []
+        report = self.tau.run(job, progress=lines.append)
+        self.assertTrue(report.is_succesful)
+        self.assertEqual(lines[1:], report.read_log())
+        self.assertEqual(150, job.tables["table-1"].load_result().unsafe().sum())
+
+    def test_run_packed(self):
+        jobs = self.make_jobs(5)
+        reports = self.tau.run_packed(jobs, pack_size=2)
+
+        self.assertEqual(5, len(reports))
+        self.assertEqual([], self.run_directories())
+        for job, report in zip(jobs, reports):
+            self.assertTrue(report.is_succesful)
+            self.assertEqual(str(job.logbook_filepath), report.logbook_file)
+            # The logbook of a job doesn't contain the other jobs of the pack
+            with open(job.logbook_filepath) as reader:
+                self.assertEqual(1, reader.read().count("<SPECIFYTABLE>"))
+            # The jobs share a process, so their resources are unknown
+            self.assertIsNone(report.resources)
+            log = "".join(report.read_log())
+            self.assertIn(f'<SPECIFYTABLE> "{["regio", "symbol"][int(job.name[-1]) % 2]}"', log)
+            self.assertEqual(1, log.count("<SPECIFYTABLE>"))
+            result = job.tables["table-1"].load_result()
+            self.assertEqual(150, result.unsafe().sum())
+
+    def test_run_packed_failure(self):
+        jobs = self.make_jobs(2)
+        with mock.patch.dict(os.environ, {"PIARGUS_STUB_EXIT": "3"}):
+            # All tables were written, so jobs are successful
+            reports = self.tau.run_packed(jobs)
+        self.assertTrue(all(report.is_succesful for report in reports))
+
+        with mock.patch.dict(os.environ, {"PIARGUS_STUB_EXIT": "3"}):
+            jobs[1].tables["table-1"].filepath_out = self.directory / "missing" / "x.csv"
+            reports = self.tau.run_packed(jobs, check=False)
+        self.assertEqual([0, 3], [report.returncode for report in reports])
+
+    def test_run_timeout(self):
+        [job] = self.make_jobs(1)
+        with mock.patch.dict(os.environ, {"PIARGUS_STUB_HANG": OPTIMAL}):
+            report = self.tau.run(job, check=False, timeout=0.5)
+        self.assertTrue(report.timed_out)
+        self.assertEqual(1, report.timed_out_table)
+        self.assertTrue(report.is_failed)
+
+    def test_run_with_fallback(self):
+        [job] = self.make_jobs(1)
+        with mock.patch.dict(os.environ, {"PIARGUS_STUB_HANG": f"{OPTIMAL},{MODULAR}"}):
+            report = self.tau.run_with_fallback(job, table_timeout=0.3)
+
+        self.assertTrue(report.is_succesful)
+        self.assertEqual([("table-1", OPTIMAL, MODULAR), ("table-1", MODULAR, GHMITER)],
+                         report.fallbacks)
+        self.assertEqual({"table-1": GHMITER}, report.suppress_methods)
+        self.assertIn("<SUPPRESS> GH(1", "".join(report.read_log()))
+
+        # The job is left as it was
+        self.assertEqual(OPTIMAL, job.tables["table-1"].suppress_method)
+        self.assertIn(f"<SUPPRESS>\t{OPTIMAL}(1)", job.batch_filepath.read_text())
+
+    def test_run_with_fallback_exhausted(self):
+        [job] = self.make_jobs(1)
+        with mock.patch.dict(os.environ, {"PIARGUS_STUB_HANG": f"{OPTIMAL},{MODULAR}"}):
+            report = self.tau.run_with_fallback(job, table_timeout=0.3, fallback=[MODULAR],
+                                                check=False)
+        self.assertTrue(report.timed_out)
+        self.assertEqual({"table-1": MODULAR}, report.suppress_methods)
+
+    def test_resources(self):
+        [job] = self.make_jobs(1)
+        with mock.patch.dict(os.environ, {"PIARGUS_STUB_ALLOCATE": "64"}):
+            report = self.tau.run(job)
+
+        self.assertGreater(report.resources.wall_seconds, 0)
+        self.assertIsNotNone(report.resources.cpu_seconds)
+        self.assertGreater(report.resources.max_rss, 64 * 2 ** 20)
+        self.assertIn("max rss", str(report))
+
+    def test_memory_limit(self):
+        [job] = self.make_jobs(1)
+        tau = TauArgus(self.tau.program, memory_limit=256)
+        self.assertTrue(tau.run(job).is_succesful)
+
+        with mock.patch.dict(os.environ, {"PIARGUS_STUB_ALLOCATE": "512"}):
+            report = tau.run(job, check=False)
+        self.assertTrue(report.is_failed)
+
+        with mock.patch("piargus.tauargus.resource", None):
+            with self.assertRaises(ValueError):
+                TauArgus(self.tau.program, memory_limit=256)
+
+    def test_isolated_runs(self):
+        jobs = self.make_jobs(2)
+        self.assertNotEqual(Job(self.input_data, [], setup=False).name,
+                            Job(self.input_data, [], setup=False).name)
+
+        # The same job can run concurrently without sharing a logbook or workdir
+        jobs[1].name = jobs[0].name
+        jobs[1].setup()
+        reports = self.tau.run(jobs)
+        for report in reports:
+            self.assertEqual(1, "".join(report.read_log()).count("<SPECIFYTABLE>"))
+
+        # The logbook of the job contains both runs
+        with open(jobs[0].logbook_filepath) as reader:
+            self.assertEqual(2, reader.read().count("End of TauArgus run"))
+
+        # Run directories are removed afterwards, unless they should be kept
+        self.assertEqual([], self.run_directories())
+        tau = TauArgus(self.tau.program, keep_workdir=True)
+        reports = tau.run(jobs)
+        self.assertNotEqual(reports[0].workdir, reports[1].workdir)
+        self.assertEqual(2, len(self.run_directories()))
+
+    def test_run_batch_without_logbook(self):
+        [job] = self.make_jobs(1)
+        self.tau.DEFAULT_LOGBOOK = self.directory / "TauLogbook.txt"
+        tmp_directory = self.directory / "tmp"
+        tmp_directory.mkdir()
+        with mock.patch.object(tempfile, "tempdir", str(tmp_directory)):
+            reports = [self.tau.run(str(job.batch_filepath)) for _ in range(2)]
+
+        self.assertEqual(str(self.tau.DEFAULT_LOGBOOK), reports[0].logbook_file)
+        self.assertEqual(1, "".join(reports[1].read_log()).count("<SPECIFYTABLE>"))
+        self.assertEqual([], list(tmp_directory.iterdir()))
@@ -0,0 +1,53 @@
+import io
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import pandas as pd
+
+from piargus import Job, MicroData, Table, TreeHierarchy, TreeRecode
+
+
+class TestTreeRecode(TestCase):
+    def setUp(self):
+        self.hierarchy = TreeHierarchy({
+            "Zuid-Holland": {"Rotterdam": ["Kralingen", "Charlois"], "Den Haag": ()},
+            "Noord-Holland": ["Haarlem"],
+            "Flevoland": ()})
+
+    def test_grc(self):
+        recode = TreeRecode(["Zuid-Holland", "Rotterdam"])
+        result = TreeRecode.from_grc(io.StringIO(recode.to_grc(length=15)))
+        self.assertEqual(recode, result)
+        self.assertEqual(hash(recode), hash(result))
+        self.assertEqual(1, len({recode, result}))
+
+    def test_from_hierarchy_max_depth(self):
+        result = TreeRecode.from_hierarchy(self.hierarchy, max_depth=1)
+        self.assertEqual(["Zuid-Holland", "Noord-Holland"], result.codes)
+
+        result = TreeRecode.from_hierarchy(self.hierarchy, max_depth=2)
+        self.assertEqual(["Rotterdam"], result.codes)
+
+        result = TreeRecode.from_hierarchy(self.hierarchy, max_depth=3)
+        self.assertEqual([], result.codes)
+
+    def test_from_hierarchy_collapse(self):
+        result = TreeRecode.from_hierarchy(self.hierarchy,
+                                           collapse=lambda node: len(node.children) == 1)
+        self.assertEqual(["Noord-Holland"], result.codes)
+
+    def test_shared_recode(self):
+        dataset = pd.DataFrame({
+            "regio": ["Kralingen", "Den Haag", "Haarlem", "Charlois"],
+            "income": [10, 20, 30, 40],
+        })
+        input_data = MicroData(dataset, hierarchies={"regio": self.hierarchy})
+        tables = [Table(["regio"], "income",
+                        recodes={"regio": TreeRecode.from_hierarchy(self.hierarchy, max_depth=1)})
+                  for _ in range(3)]
+
+        with tempfile.TemporaryDirectory() as directory:
+            Job(input_data, tables, directory=directory)
+            self.assertEqual(1, len(list(Path(directory, "input").glob("*.grc"))))
+            self.assertEqual(1, len({table.recodes["regio"].filepath for table in tables}))
@@ -0,0 +1,140 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import TestCase, mock, skipIf
+
+import pandas as pd
+
+from piargus import Job, MicroData, Table, TauArgus, WorkQueue
+from tests.stubtauargus import make_stub_tauargus
+
+
+@skipIf(os.name == 'nt', "Stub TauArgus requires a POSIX shell")
+class TestWorkQueue(TestCase):
+    def setUp(self):
+        self._tmp_directory = tempfile.TemporaryDirectory()
+        self.directory = Path(self._tmp_directory.name)
+        self.program = str(make_stub_tauargus(self.directory))
+        self.queue = WorkQueue(self.directory / "queue")
+        self.input_data = MicroData(pd.DataFrame({
+            "regio": ["A", "B", "A", "B", "A"],
+            "symbol": ["x", "x", "y", "y", "y"],
+            "income": [10, 20, 30, 40, 50],
+        }))
+
+    def tearDown(self):
+        self._tmp_directory.cleanup()
+
+    def make_jobs(self, n):
+        return [Job(self.input_data, [Table([["regio"], ["symbol"]][i % 2], "income")],
+                    directory=self.directory / "jobs", name=f"job{i}")
+                for i in range(n)]
+
+    def test_claim(self):
+        [first, second] = [self.queue.submit(job) for job in self.make_jobs(2)]
+        self.assertEqual({"pending": 2, "claimed": 0, "done": 0}, self.queue.counts())
+
+        ticket = self.queue.claim()
+        self.assertEqual(first, ticket["name"])
+        self.assertEqual(second, self.queue.claim()["name"])
+        self.assertIsNone(self.queue.claim())
+
+        # Stale claims can be returned to the queue
+        self.assertEqual([], self.queue.requeue(max_age=60))
+        self.assertEqual(2, len(self.queue.requeue(max_age=-1)))
+        self.assertEqual({"pending": 2, "claimed": 0, "done": 0}, self.queue.counts())
+
+        # Some filesystems report a lost race as a PermissionError
+        with mock.patch("os.rename", side_effect=PermissionError):
+            self.assertIsNone(self.queue.claim())
+
+    def test_complete_requeued(self):
+        [job] = self.make_jobs(1)
+        name = self.queue.submit(job)
+        report = TauArgus(self.program).run(job)
+
+        # The claim of a slow worker is requeued and the job is claimed by another worker
+        stale = self.queue.claim()
+        self.queue.requeue(max_age=-1)
+        ticket = self.queue.claim()
+        self.assertEqual(name, ticket["name"])
+        self.assertNotEqual(stale["claim"], ticket["claim"])
+
+        # Only the worker that holds the claim stores a report
+        self.assertFalse(self.queue.complete(stale, report))
+        self.assertEqual({"pending": 0, "claimed": 1, "done": 0}, self.queue.counts())
+        self.assertTrue(self.queue.complete(ticket, report))
+        self.assertEqual({"pending": 0, "claimed": 0, "done": 1}, self.queue.counts())
+        self.assertFalse(self.queue.complete(ticket, report))
+
+    def test_work(self):
+        jobs = self.make_jobs(3)
+        names = [self.queue.submit(job) for job in jobs]
+        self.assertEqual(3, self.queue.work(TauArgus(self.program)))
+
+        reports = dict(self.queue.collect(names, timeout=10))
+        self.assertTrue(all(report.is_succesful for report in reports.values()))
+        self.assertEqual({"pending": 0, "claimed": 0, "done": 3}, self.queue.counts())
+        self.assertEqual(150, jobs[0].tables["table-1"].load_result().unsafe().sum())
+
+    def test_heartbeat(self):
+        [job] = self.make_jobs(1)
+        self.queue.submit(job)
+        with mock.patch.dict(os.environ, {"PIARGUS_STUB_SLEEP": "1"}):
+            worker = threading.Thread(target=self.queue.work,
+                                      args=(TauArgus(self.program),),
+                                      kwargs={"heartbeat_interval": 0.05})
+            worker.start()
+            try:
+                while self.queue.counts()["claimed"] == 0:
+                    time.sleep(0.01)
+                [claimed] = (self.queue.directory / "claimed").glob("*.json")
+                os.utime(claimed, (time.time() - 3600, time.time() - 3600))
+                time.sleep(0.3)
+
+                # The claim is still fresh, because the job is running
+                self.assertEqual([], self.queue.requeue(max_age=60))
+            finally:
+                worker.join()
+
+        self.assertEqual({"pending": 0, "claimed": 0, "done": 1}, self.queue.counts())
+
+    def test_work_error(self):
+        [job] = self.make_jobs(1)
+        name = self.queue.submit(job)
+        self.queue.work(TauArgus(self.directory / "missing"))
+        [(_, report)] = self.queue.collect([name], timeout=10)
+        self.assertTrue(report.is_failed)
+        self.assertIn("FileNotFoundError", report.error)
+        self.assertIn("error: FileNotFoundError", str(report))
+
+    def test_worker_processes(self):
+        jobs = self.make_jobs(8)
+        env = {**os.environ, "PIARGUS_STUB_SLEEP": "0.1"}
+        cmd = [sys.executable, "-m", "piargus.cli", "worker", str(self.queue.directory),
+               "--program", self.program, "--wait", "--poll-interval", "0.05"]
+        workers = [subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL) for _ in range(3)]
+        try:
+            results = list(self.queue.run(jobs, timeout=60))
+        finally:
+            for worker in workers:
+                worker.kill()
+                worker.wait()
+
+        self.assertCountEqual(jobs, [job for job, _ in results])
+        self.assertTrue(all(report.is_succesful for _, report in results))
+        for job in jobs:
+            log = Path(job.logbook_filepath).read_text()
+            self.assertEqual(1, log.count("End of TauArgus run"))
+
+    def test_collect_timeout(self):
+        [job] = self.make_jobs(1)
+        name = self.queue.submit(job)
+        start = time.monotonic()
+        with self.assertRaises(TimeoutError):
+            list(self.queue.collect([name], timeout=0.2, poll_interval=0.05))
+        self.assertLess(time.monotonic() - start, 5)